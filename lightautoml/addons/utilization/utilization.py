@@ -1,8 +1,11 @@
 """Tools to configure time utilization."""
 
+import time
 from copy import deepcopy
-from typing import Optional, Any, Sequence, Type, Union, Iterable
+from typing import Optional, Any, Sequence, Type, Union, Iterable, List, Tuple
 
+import numpy as np
+from joblib import delayed
 from log_calls import record_history
 
 from ...automl.base import AutoML
@@ -12,7 +15,9 @@ from ...dataset.base import LAMLDataset
 from ...ml_algo.base import MLAlgo
 from ...pipelines.ml.base import MLPipeline
 from ...tasks import Task
+from ...utils.cache import RunCache
 from ...utils.logging import get_logger
+from ...utils.parallel import thread_budget, split_thread_budget, process_parallel
 from ...utils.timer import PipelineTimer
 
 logger = get_logger(__name__)
@@ -67,6 +72,8 @@ class TimeUtilization:
     If time left - it can perform multistart on same configs with new random state.
     In best case - blend different configurations of single preset
     In worst case - averaging multiple automl's with different states
+    Several automl's may be trained concurrently in processes with equal shares of cpu_limit and memory_limit
+    and common deadline, so small runs that utilize cpus poorly explore more configurations in the same time.
 
     Note:
         Basic usage
@@ -92,6 +99,8 @@ class TimeUtilization:
                  max_runs_per_config: int = 5,
                  random_state_keys: Optional[dict] = None,
                  random_state: int = 42,
+                 n_jobs: int = 1,
+                 share_cache: bool = True,
                  **kwargs
                  ):
         """
@@ -116,6 +125,13 @@ class TimeUtilization:
                 If not found - assume, that seeds are not fixed and each run is random by default
                 For ex. {'reader_params': {'random_state': 42}, 'gbm_params': {'default_params': {'seed': 42}}}
             random_state: initial random_state value that will be set in case of search in config.
+            n_jobs: number of automl's trained concurrently in separate processes. Each one gets
+                ``cpu_limit / n_jobs`` cpus and ``memory_limit / n_jobs`` memory. Runs are started by batches
+                of ``n_jobs`` in the same order as sequentially, new batch is started only if time left
+                is more than mean duration of finished runs. Failed runs are skipped.
+            share_cache: share read data, features roles, folds and outputs of first level feature pipelines
+                between sequential runs of single ``fit_predict``, so next runs spend time mostly on models training.
+                Processes of concurrent runs don't share cache.
             **kwargs:
 
         """
@@ -151,6 +167,9 @@ class TimeUtilization:
         if outer_blend is None:
             self.outer_blend = BestModelSelector()
         self.drop_last = drop_last
+        self.n_jobs = n_jobs
+        self.share_cache = share_cache
+        self._run_cache = None
         self.kwargs = kwargs
 
     def _search_for_key(self, config, key, value: int = 42) -> dict:
@@ -186,15 +205,138 @@ class TimeUtilization:
 
         return d
 
-    def fit_predict(self, train_data: Any,
-                    roles: dict,
-                    train_features: Optional[Sequence[str]] = None,
-                    cv_iter: Optional[Iterable] = None,
-                    valid_data: Optional[Any] = None,
-                    valid_features: Optional[Sequence[str]] = None) -> LAMLDataset:
-        """Same as automl's fit predict.
+    def _create_automl(self, config: Optional[str], upd_state_val: int, timeout: float,
+                       cpu_limit: Optional[int] = None, memory_limit: Optional[float] = None) -> AutoMLPreset:
+        """Create automl of single run.
+
+        Args:
+            config: path to config.
+            upd_state_val: value added to random states.
+            timeout: timeout of run.
+            cpu_limit: cpu limit of run, if ``None`` - whole cpu_limit.
+            memory_limit: memory limit of run, if ``None`` - whole memory_limit.
+
+        Returns:
+            automl instance.
+
+        """
+        random_states = self._get_upd_states(self.random_state_keys, upd_state_val)
+        logger.info('CUR SETUP FOR RANDOM STATE: {}'.format(random_states))
+        cur_kwargs = self.kwargs.copy()
+        for k in random_states.keys():
+            if k in self.kwargs:
+                logger.info('FOUND {} in kwargs, need to combine'.format(k))
+                random_states[k] = {**cur_kwargs[k], **random_states[k]}
+                del cur_kwargs[k]
+                logger.info('MERGED VARIANT FOR {} = {}'.format(k, random_states[k]))
+
+        automl = self.automl_factory(self.task, timeout,
+                                     memory_limit=self.memoty_limit if memory_limit is None else memory_limit,
+                                     cpu_limit=self.cpu_limit if cpu_limit is None else cpu_limit,
+                                     gpu_ids=self.gpu_ids,
+                                     verbose=self.verbose,
+                                     timing_params=self.timing_params,
+                                     config_path=config, **random_states, **cur_kwargs)
+        automl.set_run_cache(self._run_cache)
+
+        return automl
+
+    def _fit_run(self, n_run: int, timeout: float, cpu_limit: int, memory_limit: float,
+                 fit_args: dict) -> Tuple[Optional[AutoMLPreset], Optional[LAMLDataset], float, Optional[str]]:
+        """Train single automl, ex. in worker process.
+
+        Args:
+            n_run: number of run, defines config and random states.
+            timeout: timeout of run.
+            cpu_limit: cpu limit of run.
+            memory_limit: memory limit of run.
+            fit_args: automl fit_predict arguments.
+
+        Returns:
+            Tuple (automl, out-of-fold predictions, duration, error). If run failed,
+            automl and predictions are ``None`` and error is the description of exception.
+
+        """
+        start = time.time()
+        try:
+            automl = self._create_automl(self.configs_list[n_run % len(self.configs_list)], n_run, timeout,
+                                         cpu_limit=cpu_limit, memory_limit=memory_limit)
+            val_pred = automl.fit_predict(**fit_args)
+        except Exception as e:
+            return None, None, time.time() - start, repr(e)
+
+        return automl, val_pred, time.time() - start, None
+
+    def _fit_predict_parallel(self, timer: PipelineTimer, fit_args: dict) -> Tuple[List[list], List[list]]:
+        """Train automl's concurrently in separate processes.
+
+        Random seeds, torch and BLAS threads limits and peak memory are process-wide,
+        so every run gets its own process. Runs are started by batches of ``n_jobs`` in the order
+        of sequential runs, time limit is checked after each batch. Failed runs are skipped.
+
+        Args:
+            timer: common timer of runs.
+            fit_args: automl fit_predict arguments.
+
+        Returns:
+            Tuple (automl pipes, out-of-fold predictions) grouped by configs.
+
+        """
+        n_configs = len(self.configs_list)
+        n_runs = self.max_runs_per_config * n_configs
+        durations = []
+        results = {}
+
+        with thread_budget(self.cpu_limit):
+            n_jobs, n_threads = split_thread_budget(self.n_jobs)
+        memory_limit = self.memoty_limit / n_jobs
+        logger.info('Train {0} automls concurrently with {1} cpus each'.format(n_jobs, n_threads))
+
+        with thread_budget(self.cpu_limit), process_parallel(n_jobs) as p:
+            for n_batch in range(0, n_runs, n_jobs):
+                # same stop rule as sequential runs - next run is expected to take mean time of finished runs
+                if timer.time_left <= 0 or (len(durations) > 0 and timer.time_left < np.mean(durations)):
+                    break
+
+                batch = list(range(n_batch, min(n_batch + n_jobs, n_runs)))
+                timeout = timer.time_left
+                batch_results = p(delayed(self._fit_run)(n_run, timeout, n_threads, memory_limit, fit_args)
+                                  for n_run in batch)
+                in_time = timer.time_left > 0
+
+                for n_run, (automl, val_pred, duration, error) in zip(batch, batch_results):
+                    if error is not None:
+                        logger.warning('Run {0} failed and is skipped: {1}'.format(n_run, error))
+                        continue
+                    durations.append(duration)
+                    results[n_run] = (automl, val_pred, in_time)
+
+        assert len(results) > 0, 'All automl runs failed'
+
+        # runs stopped by common deadline are dropped, except the first run of every config
+        if self.drop_last:
+            dropped = [n for n in results if not results[n][2] and n >= n_configs]
+            if len(dropped) < len(results):
+                for n in dropped:
+                    results.pop(n)
+
+        amls = [[] for _ in range(n_configs)]
+        aml_preds = [[] for _ in range(n_configs)]
+        for n_run in sorted(results):
+            automl, val_pred, _ = results[n_run]
+            amls[n_run % n_configs].append(MLPipeForAutoMLWrapper.from_automl(automl))
+            aml_preds[n_run % n_configs].append(val_pred)
+
+        return amls, aml_preds
+
+    def _fit_predict_sequential(self, timer: PipelineTimer, train_data: Any, roles: dict,
+                                train_features: Optional[Sequence[str]] = None, cv_iter: Optional[Iterable] = None,
+                                valid_data: Optional[Any] = None, valid_features: Optional[Sequence[str]] = None
+                                ) -> Tuple[List[list], List[list]]:
+        """Train automl's one by one while timer is ok.
 
         Args:
+            timer: common timer of runs.
             train_data:  dataset to train.
             roles: roles dict.
             train_features: optional features names, if cannot be inferred from train_data.
@@ -203,9 +345,9 @@ class TimeUtilization:
             valid_features: optional validation dataset features if cannot be inferred from valid_data.
 
         Returns:
-            Dataset.
+            Tuple (automl pipes, out-of-fold predictions) grouped by configs.
+
         """
-        timer = PipelineTimer(self.timeout, **self.timing_params).start()
         history = []
 
         amls = [[] for _ in range(len(self.configs_list))]
@@ -219,22 +361,8 @@ class TimeUtilization:
             n_ms += 1
 
             for n_cfg, config in enumerate(self.configs_list):
-                random_states = self._get_upd_states(self.random_state_keys, upd_state_val)
+                automl = self._create_automl(config, upd_state_val, timer.time_left)
                 upd_state_val += 1
-                logger.info('CUR SETUP FOR RANDOM STATE: {}'.format(random_states))
-                cur_kwargs = self.kwargs.copy()
-                for k in random_states.keys():
-                    if k in self.kwargs:
-                        logger.info('FOUND {} in kwargs, need to combine'.format(k))
-                        random_states[k] = {**cur_kwargs[k], **random_states[k]}
-                        del cur_kwargs[k]
-                        logger.info('MERGED VARIANT FOR {} = {}'.format(k, random_states[k]))
-
-                automl = self.automl_factory(self.task, timer.time_left, memory_limit=self.memoty_limit,
-                                             cpu_limit=self.cpu_limit, gpu_ids=self.gpu_ids,
-                                             verbose=self.verbose,
-                                             timing_params=self.timing_params,
-                                             config_path=config, **random_states, **cur_kwargs)
 
                 val_pred = automl.fit_predict(train_data, roles, train_features, cv_iter,
                                               valid_data, valid_features)
@@ -254,6 +382,45 @@ class TimeUtilization:
             amls[n_cfg].pop()
             aml_preds[n_cfg].pop()
 
+        return amls, aml_preds
+
+    def fit_predict(self, train_data: Any,
+                    roles: dict,
+                    train_features: Optional[Sequence[str]] = None,
+                    cv_iter: Optional[Iterable] = None,
+                    valid_data: Optional[Any] = None,
+                    valid_features: Optional[Sequence[str]] = None) -> LAMLDataset:
+        """Same as automl's fit predict.
+
+        Args:
+            train_data:  dataset to train.
+            roles: roles dict.
+            train_features: optional features names, if cannot be inferred from train_data.
+            cv_iter: custom cv iterator. Ex. TimeSeriesIterator instance.
+            valid_data: optional validation dataset.
+            valid_features: optional validation dataset features if cannot be inferred from valid_data.
+
+        Returns:
+            Dataset.
+        """
+        timer = PipelineTimer(self.timeout, **self.timing_params).start()
+        # processes of concurrent runs don't share cache, so it's created only for sequential runs
+        self._run_cache = RunCache() if self.share_cache and self.n_jobs == 1 else None
+
+        try:
+            if self.n_jobs > 1:
+                fit_args = {'train_data': train_data, 'roles': roles, 'train_features': train_features,
+                            'cv_iter': cv_iter, 'valid_data': valid_data, 'valid_features': valid_features}
+                amls, aml_preds = self._fit_predict_parallel(timer, fit_args)
+            else:
+                amls, aml_preds = self._fit_predict_sequential(timer, train_data, roles, train_features, cv_iter,
+                                                               valid_data, valid_features)
+        finally:
+            # fitted automls keep reference to cache, so stored data is released explicitly
+            if self._run_cache is not None:
+                self._run_cache.clear()
+            self._run_cache = None
+
         # prune empty algos
         amls = [x for x in amls if len(x) > 0]
         aml_preds = [x for x in aml_preds if len(x) > 0]
@@ -1,3 +1,3 @@
 """The main module, which includes the AutoML class, blenders and ready-made presets."""
 
-__all__ = ['base', 'presets', 'blend']
+__all__ = ['base', 'presets', 'blend', 'artifact']
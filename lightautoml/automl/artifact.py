@@ -0,0 +1,348 @@
+"""Save fitted AutoML as a directory of separate components and load it lazily."""
+
+import json
+import os
+import threading
+from typing import Any, Iterator, List, Sequence, Tuple
+
+import catboost as cb
+import joblib
+import lightgbm as lgb
+import numpy as np
+from log_calls import record_history
+from pandas import Series
+
+from .base import AutoML
+from ..ml_algo.base import MLAlgo
+from ..transformers.base import LAMLTransformer
+from ..transformers.categorical import LabelEncoder
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+GRAPH_NAME = 'automl.joblib'
+MODELS_DIR = 'models'
+ENCODERS_DIR = 'encoders'
+# joblib model files larger than this size (bytes) are memory-mapped
+MMAP_MIN_SIZE = 2 ** 26
+
+
+@record_history(enabled=False)
+def _save_model(model: Any, path: str) -> Tuple[str, str]:
+    """Save single fold model in native format if possible.
+
+    Args:
+        model: fitted model.
+        path: file path without extension.
+
+    Returns:
+        Tuple (file path, format name).
+
+    """
+    if isinstance(model, lgb.Booster):
+        path += '.txt'
+        model.save_model(path)
+        return path, 'lightgbm'
+
+    if isinstance(model, cb.CatBoost):
+        path += '.cbm'
+        model.save_model(path)
+        return path, 'catboost'
+
+    path += '.joblib'
+    joblib.dump(model, path)
+    return path, 'joblib'
+
+
+@record_history(enabled=False)
+def _load_model(path: str, fmt: str) -> Any:
+    """Load single fold model.
+
+    Numpy arrays of large joblib models (ex. linear weights of wide data), bigger than ``MMAP_MIN_SIZE``,
+    are memory-mapped instead of read, so they are read-only and shared between processes.
+
+    Args:
+        path: file path.
+        fmt: format name.
+
+    Returns:
+        model.
+
+    """
+    if fmt == 'lightgbm':
+        return lgb.Booster(model_file=path)
+
+    if fmt == 'catboost':
+        return cb.CatBoost().load_model(path)
+
+    mmap_mode = 'r' if os.path.getsize(path) > MMAP_MIN_SIZE else None
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+@record_history(enabled=False)
+class LazyModels:
+    """Sequence of fold models, that are loaded from disk on first access.
+
+    Replaces ``MLAlgo.models`` list in saved AutoML.
+    """
+
+    def __init__(self, files: Sequence[Tuple[str, str]]):
+        """
+
+        Args:
+            files: pairs (path relative to artifact directory, format name).
+
+        """
+        self.files = list(files)
+        self.path = None
+        self._models = [None] * len(self.files)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+
+        if self._models[idx] is None:
+            assert self.path is not None, 'Artifact path is not set. Use load_automl to load models.'
+            with self._lock:
+                if self._models[idx] is None:
+                    file, fmt = self.files[idx]
+                    self._models[idx] = _load_model(os.path.join(self.path, file), fmt)
+
+        return self._models[idx]
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def is_loaded(self) -> bool:
+        """Check if all models are loaded."""
+        return all(x is not None for x in self._models)
+
+    def load(self) -> 'LazyModels':
+        """Load all models at once.
+
+        Returns:
+            self.
+
+        """
+        for _ in self:
+            pass
+
+        return self
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_models'] = [None] * len(self.files)
+        state.pop('_lock')
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+@record_history(enabled=False)
+def _iter_ml_algos(automl: AutoML) -> Iterator[MLAlgo]:
+    """Iterate over all ml_algos that have fold models, including inner algos of nested cv.
+
+    Args:
+        automl: fitted AutoML.
+
+    Returns:
+        Generator of MLAlgo.
+
+    """
+    queue = [ml_algo for level in automl.levels for pipe in level for ml_algo in pipe.ml_algos]
+
+    while len(queue) > 0:
+        ml_algo = queue.pop(0)
+        inner = [x for x in ml_algo.models if isinstance(x, MLAlgo)] if type(ml_algo.models) is list else []
+        if len(inner) > 0:
+            queue.extend(inner)
+        else:
+            yield ml_algo
+
+
+@record_history(enabled=False)
+class EncoderArrays:
+    """Files of categories mappings of label encoder, replaces ``LabelEncoder.dicts`` in saved AutoML."""
+
+    def __init__(self, files: Sequence[Tuple[str, str, str]]):
+        """
+
+        Args:
+            files: triples (feature name, index file, values file), paths are relative to artifact directory.
+
+        """
+        self.files = list(files)
+
+    def load(self, path: str) -> dict:
+        """Read mappings from numpy arrays.
+
+        Args:
+            path: artifact directory.
+
+        Returns:
+            dict of mappings, the same as ``LabelEncoder.dicts``.
+
+        """
+        dicts = {}
+        for feat, index_file, values_file in self.files:
+            # object categories (ex. strings) can not be stored in raw numpy format
+            index = np.load(os.path.join(path, index_file), allow_pickle=True)
+            dicts[feat] = Series(np.load(os.path.join(path, values_file)), index=index)
+
+        return dicts
+
+
+@record_history(enabled=False)
+def _iter_encoders(automl: AutoML) -> Iterator[LabelEncoder]:
+    """Iterate over fitted label encoders (and its subclasses) of features pipelines.
+
+    Features pipelines may be shared between ml pipelines, every encoder is returned once.
+
+    Args:
+        automl: fitted AutoML.
+
+    Returns:
+        Generator of LabelEncoder.
+
+    """
+    queue = [getattr(pipe.features_pipeline, '_pipeline', None) for level in automl.levels for pipe in level]
+    visited = set()
+
+    while len(queue) > 0:
+        trf = queue.pop(0)
+        if not isinstance(trf, LAMLTransformer) or id(trf) in visited:
+            continue
+        visited.add(id(trf))
+
+        if isinstance(trf, LabelEncoder) and hasattr(trf, 'dicts'):
+            yield trf
+        queue.extend(getattr(trf, 'transformer_list', []))
+        queue.append(getattr(trf, 'best_transformer', None))
+
+
+@record_history(enabled=False)
+def save_automl(automl: AutoML, path: str):
+    """Save fitted AutoML as artifact directory.
+
+    Artifact contains:
+
+        - manifest.json - description of components.
+        - automl.joblib - AutoML object graph (reader, features pipelines, blender) without fold models
+          and encoders mappings.
+        - models/ - fold models. LightGBM and CatBoost are saved in native formats, other models with joblib.
+        - encoders/ - categories mappings of label encoders as numpy arrays.
+
+    Args:
+        automl: fitted AutoML.
+        path: directory to save artifact.
+
+    """
+    assert hasattr(automl, 'levels'), 'AutoML should be fitted first.'
+    os.makedirs(os.path.join(path, MODELS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(path, ENCODERS_DIR), exist_ok=True)
+
+    components = []
+    replaced = []
+    replaced_encoders = []
+
+    try:
+        for n, encoder in enumerate(_iter_encoders(automl)):
+            files = []
+            for k, (feat, mapping) in enumerate(encoder.dicts.items()):
+                prefix = os.path.join(ENCODERS_DIR, '{0}_{1}_{2}'.format(n, encoder._fname_prefix, k))
+                np.save(os.path.join(path, prefix + '_index.npy'), mapping.index.values, allow_pickle=True)
+                np.save(os.path.join(path, prefix + '_values.npy'), mapping.values, allow_pickle=False)
+                files.append((feat, prefix + '_index.npy', prefix + '_values.npy'))
+
+            replaced_encoders.append((encoder, encoder.dicts))
+            encoder.dicts = EncoderArrays(files)
+
+        for n, ml_algo in enumerate(_iter_ml_algos(automl)):
+            files = []
+            for k, model in enumerate(ml_algo.models):
+                file, fmt = _save_model(model, os.path.join(path, MODELS_DIR, '{0}_{1}_fold_{2}'.format(n, ml_algo.name, k)))
+                file = os.path.relpath(file, path)
+                files.append((file, fmt))
+                components.append({'algo': ml_algo.name, 'fold': k, 'file': file, 'format': fmt})
+
+            replaced.append((ml_algo, ml_algo.models))
+            ml_algo.models = LazyModels(files)
+
+        joblib.dump(automl, os.path.join(path, GRAPH_NAME))
+    finally:
+        # restore in memory models
+        for ml_algo, models in replaced:
+            ml_algo.models = models
+        for encoder, dicts in replaced_encoders:
+            encoder.dicts = dicts
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'automl_class': type(automl).__name__,
+        'graph': GRAPH_NAME,
+        'components': components,
+        'encoders': sum(len(x[1]) for x in replaced_encoders)
+    }
+
+    with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info('AutoML saved to {0}: {1} models'.format(path, len(components)))
+
+
+@record_history(enabled=False)
+def load_automl(path: str, lazy: bool = True) -> AutoML:
+    """Load AutoML from artifact directory.
+
+    Args:
+        path: artifact directory.
+        lazy: if ``True`` - fold models are loaded on first use, else all models are loaded at once.
+
+    Returns:
+        fitted AutoML.
+
+    """
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+
+    assert manifest['format_version'] == FORMAT_VERSION, \
+        'Artifact format version {0} is not supported'.format(manifest['format_version'])
+
+    # graph is read to memory - its arrays (ex. reader and transformers state) may be updated inplace
+    automl = joblib.load(os.path.join(path, manifest['graph']))
+
+    for encoder in _iter_encoders(automl):
+        if isinstance(encoder.dicts, EncoderArrays):
+            encoder.dicts = encoder.dicts.load(path)
+
+    for ml_algo in _iter_ml_algos(automl):
+        ml_algo.models.path = os.path.abspath(path)
+        if not lazy:
+            ml_algo.models.load()
+
+    return automl
+
+
+@record_history(enabled=False)
+def list_artifact_components(path: str) -> List[dict]:
+    """Get components description from artifact manifest.
+
+    Args:
+        path: artifact directory.
+
+    Returns:
+        list of dicts with algo name, fold number, file and format.
+
+    """
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        return json.load(f)['components']
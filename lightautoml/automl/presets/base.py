@@ -11,7 +11,9 @@ from log_calls import record_history
 from ..base import AutoML
 from ...dataset.base import LAMLDataset
 from ...tasks import Task
+from ...utils.cache import RunCache
 from ...utils.logging import get_logger
+from ...utils.parallel import thread_budget
 from ...utils.timer import PipelineTimer
 
 logger = get_logger(__name__)
@@ -88,6 +90,7 @@ class AutoMLPreset(AutoML):
         self.task = task
 
         self.verbose = verbose
+        self._run_cache = None
 
     def _set_config(self, path):
 
@@ -120,6 +123,17 @@ class AutoMLPreset(AutoML):
         else:
             shutil.copy(os.path.join(base_dir, cls._default_config_path), path)
 
+    def set_run_cache(self, cache: Optional[RunCache]):
+        """Share deterministic fit results (read data, roles, folds, features) with other presets.
+
+        Cache should be used only by presets fitted on the same train data.
+
+        Args:
+            cache: cache or ``None`` to disable sharing.
+
+        """
+        self._run_cache = cache
+
     def create_automl(self, **fit_args):
         """Abstract method - how to build automl.
 
@@ -162,7 +176,9 @@ class AutoMLPreset(AutoML):
         logger.info('- cpus: {} cores'.format(self.cpu_limit))
         logger.info('- memory: {} gb\n'.format(self.memory_limit))
         self.timer.start()
-        result = super().fit_predict(train_data, roles, train_features, cv_iter, valid_data, valid_features)
+        with thread_budget(self.cpu_limit):
+            result = super().fit_predict(train_data, roles, train_features, cv_iter, valid_data, valid_features)
         logger.info('\nAutoml preset training completed in {:.2f} seconds.'.format(self.timer.time_spent))
+        self.timer.report()
 
         return result
@@ -10,10 +10,7 @@ from pandas import DataFrame
 from .base import upd_params
 from .tabular_presets import TabularAutoML, ReadableToDf, NumpyDataset
 from ..blend import WeightedBlender
-from ...ml_algo.boost_cb import BoostCB
-from ...ml_algo.boost_lgbm import BoostLGBM
 from ...ml_algo.linear_sklearn import LinearLBFGS
-from ...ml_algo.tuning.optuna import OptunaTuner
 from ...pipelines.features.base import FeaturesPipeline
 from ...pipelines.features.image_pipeline import ImageSimpleFeatures, ImageAutoFeatures
 from ...pipelines.features.lgb_pipeline import LGBAdvancedPipeline
@@ -43,7 +40,7 @@ class TabularCVAutoML(TabularAutoML):
     """Classic preset - work with tabular and image data.
 
     Supported data roles - numbers, dates, categories, images
-    Limitations - no memory management
+    Limitations - memory usage of neural networks is not planned
     GPU support in catboost/lightgbm(if installed for gpu)
 
     """
@@ -215,22 +212,9 @@ class TabularCVAutoML(TabularAutoML):
         ml_algos = []
         force_calc = []
         for key, force in zip(keys, [True, False, False, False]):
-            tuned = '_tuned' in key
-            algo_key = key.split('_')[0]
-            time_score = self.get_time_score(n_level, key)
-            gbm_timer = self.timer.get_task_timer(algo_key, time_score)
-            if algo_key == 'lgb':
-                gbm_model = BoostLGBM(timer=gbm_timer, **self.lgb_params)
-            elif algo_key == 'cb':
-                gbm_model = BoostCB(timer=gbm_timer, **self.cb_params)
-            else:
-                raise ValueError('Wrong algo key')
-
-            if tuned:
-                gbm_tuner = OptunaTuner(n_trials=self.tuning_params['max_tuning_iter'],
-                                        timeout=self.tuning_params['max_tuning_time'],
-                                        fit_on_holdout=self.tuning_params['fit_on_holdout'])
-                gbm_model = (gbm_model, gbm_tuner)
+            gbm_model = self.get_gbm_model(key, n_level)
+            if '_tuned' in key:
+                gbm_model = (gbm_model, self.get_gbm_tuner())
             ml_algos.append(gbm_model)
             force_calc.append(force)
 
@@ -245,6 +229,7 @@ class TabularCVAutoML(TabularAutoML):
         train_data = fit_args['train_data']
         self.infer_auto_params(train_data)
         reader = PandasToPandasReader(task=self.task, **self.reader_params)
+        reader.cache = self._run_cache
 
         pre_selector = self.get_selector()
 
@@ -3,12 +3,15 @@ Tabular presets
 """
 
 import os
+import threading
+from contextlib import contextmanager
 from copy import copy, deepcopy
-from typing import Optional, Sequence, cast, Iterable
+from queue import Queue, Full, Empty
+from typing import Optional, Sequence, cast, Iterable, Dict, Tuple, List
 
 import numpy as np
 import torch
-from joblib import Parallel, delayed
+from joblib import delayed
 from log_calls import record_history
 from pandas import DataFrame
 
@@ -16,9 +19,12 @@ from .base import AutoMLPreset, upd_params
 from ..blend import WeightedBlender, MeanBlender
 from ...addons.utilization import TimeUtilization
 from ...dataset.np_pd_dataset import NumpyDataset
+from ...ml_algo.base import TabularMLAlgo
 from ...ml_algo.boost_cb import BoostCB
 from ...ml_algo.boost_lgbm import BoostLGBM
 from ...ml_algo.linear_sklearn import LinearLBFGS
+from ...ml_algo.tuning.base import ParamsTuner
+from ...ml_algo.tuning.halving import SuccessiveHalvingTuner
 from ...ml_algo.tuning.optuna import OptunaTuner
 from ...pipelines.features.lgb_pipeline import LGBSimpleFeatures, LGBAdvancedPipeline
 from ...pipelines.features.linear_pipeline import LinearFeatures
@@ -28,8 +34,15 @@ from ...pipelines.selection.importance_based import ImportanceCutoffSelector, Mo
 from ...pipelines.selection.permutation_importance_based import NpPermutationImportanceEstimator, \
     NpIterativeFeatureSelector
 from ...reader.base import PandasToPandasReader
-from ...reader.tabular_batch_generator import read_data, read_batch, ReadableToDf
+from ...reader.tabular_batch_generator import read_data, read_batch, read_data_stream, PredictionsWriter, \
+    ReadableToDf
 from ...tasks import Task
+from ...utils.cache import RunCache
+from ...utils.logging import get_logger
+from ...utils.memory import MemoryPlanner
+from ...utils.parallel import start_thread, thread_budget, split_thread_budget, process_parallel
+
+logger = get_logger(__name__)
 
 _base_dir = os.path.dirname(__file__)
 
@@ -44,7 +57,7 @@ class TabularAutoML(AutoMLPreset):
     Supported data roles - numbers, dates, categories
     Limitations:
 
-        - no memory management
+        - memory usage is estimated roughly before fit, not controlled during execution
         - no text support
 
     GPU support in catboost/lightgbm(if installed for gpu) training
@@ -217,37 +230,63 @@ class TabularAutoML(AutoMLPreset):
             time_score = self.get_time_score(n_level, 'lgb', False)
 
             sel_timer_0 = self.timer.get_task_timer('lgb', time_score)
-            selection_feats = LGBSimpleFeatures()
-
-            selection_gbm = BoostLGBM(timer=sel_timer_0, **lgb_params)
+            if selection_params['importance_model'] == 'shared':
+                # same features and params as main lightgbm, so fitted model is reused as its first fold
+                selection_feats = LGBAdvancedPipeline(output_categories=False, **self.gbm_pipeline_params)
+                selection_gbm = BoostLGBM(timer=sel_timer_0, **self.lgb_params)
+            else:
+                selection_feats = LGBSimpleFeatures()
+                selection_gbm = BoostLGBM(timer=sel_timer_0, **lgb_params)
+            selection_feats.set_cache(self._get_features_cache(n_level))
 
             if selection_params['importance_type'] == 'permutation':
-                importance = NpPermutationImportanceEstimator()
+                importance = self._get_permutation_importance(selection_params)
             else:
                 importance = ModelBasedImportanceEstimator()
 
             pre_selector = ImportanceCutoffSelector(selection_feats, selection_gbm, importance,
                                                     cutoff=selection_params['cutoff'],
-                                                    fit_on_holdout=selection_params['fit_on_holdout'])
+                                                    fit_on_holdout=selection_params['fit_on_holdout'] or
+                                                    selection_params['importance_model'] == 'shared')
             if mode == 2:
                 time_score = self.get_time_score(n_level, 'lgb', False)
 
                 sel_timer_1 = self.timer.get_task_timer('lgb', time_score)
-                selection_feats = LGBSimpleFeatures()
+                selection_feats = LGBSimpleFeatures().set_cache(self._get_features_cache(n_level))
                 selection_gbm = BoostLGBM(timer=sel_timer_1, **lgb_params)
 
                 # TODO: Check about reusing permutation importance
-                importance = NpPermutationImportanceEstimator()
+                importance = self._get_permutation_importance(selection_params)
 
                 extra_selector = NpIterativeFeatureSelector(selection_feats, selection_gbm, importance,
                                                             feature_group_size=selection_params['feature_group_size'],
                                                             max_features_cnt_in_result=selection_params[
-                                                                'max_features_cnt_in_result'])
+                                                                'max_features_cnt_in_result'],
+                                                            warm_start=selection_params['iterative_warm_start'],
+                                                            tol=selection_params['iterative_tol'],
+                                                            patience=selection_params['iterative_patience'])
 
                 pre_selector = ComposedSelector([pre_selector, extra_selector])
 
         return pre_selector
 
+    def _get_features_cache(self, n_level: int) -> Optional[RunCache]:
+        """Run cache for feature pipelines, next levels depend on predictions and are not shared."""
+        return self._run_cache if n_level == 1 else None
+
+    @staticmethod
+    def _get_importance_selector(pre_selector: SelectionPipeline) -> SelectionPipeline:
+        """Get the first selector of composition, it fits selection lightgbm model."""
+        if isinstance(pre_selector, ComposedSelector):
+            return pre_selector.selectors[0]
+        return pre_selector
+
+    @staticmethod
+    def _get_permutation_importance(selection_params: dict) -> NpPermutationImportanceEstimator:
+        return NpPermutationImportanceEstimator(n_jobs=selection_params['permutation_n_jobs'],
+                                                subsample=selection_params['permutation_subsample'],
+                                                n_repeats=selection_params['permutation_n_repeats'])
+
     def get_linear(self, n_level: int = 1, pre_selector: Optional[SelectionPipeline] = None) -> NestedTabularMLPipeline:
 
         # linear model with l2
@@ -255,35 +294,72 @@ class TabularAutoML(AutoMLPreset):
         linear_l2_timer = self.timer.get_task_timer('reg_l2', time_score)
         linear_l2_model = LinearLBFGS(timer=linear_l2_timer, **self.linear_l2_params)
         linear_l2_feats = LinearFeatures(output_categories=True, **self.linear_pipeline_params)
+        linear_l2_feats.set_cache(self._get_features_cache(n_level))
 
         linear_l2_pipe = NestedTabularMLPipeline([linear_l2_model], force_calc=True, pre_selection=pre_selector,
                                                  features_pipeline=linear_l2_feats, **self.nested_cv_params)
         return linear_l2_pipe
 
+    def get_gbm_model(self, key: str, n_level: int = 1) -> TabularMLAlgo:
+        """Create gradient boosting model with general params.
+
+        Args:
+            key: model key, ex. ``'lgb'`` or ``'cb_tuned'``.
+            n_level: level of model.
+
+        Returns:
+            BoostLGBM or BoostCB.
+
+        """
+        algo_key = key.split('_')[0]
+        time_score = self.get_time_score(n_level, key)
+        gbm_timer = self.timer.get_task_timer(algo_key, time_score)
+        if algo_key == 'lgb':
+            gbm_model = BoostLGBM(timer=gbm_timer, **self.lgb_params)
+        elif algo_key == 'cb':
+            gbm_model = BoostCB(timer=gbm_timer, **self.cb_params)
+        else:
+            raise ValueError('Wrong algo key')
+        gbm_model.set_predict_n_jobs(self.general_params['fold_predict_n_jobs'])
+        gbm_model.set_fold_rounds_scale(self.general_params['fold_rounds_scale'])
+
+        return gbm_model
+
+    def get_gbm_tuner(self) -> ParamsTuner:
+        """Create params tuner of gradient boosting models with tuning params.
+
+        Returns:
+            SuccessiveHalvingTuner if multi fidelity tuning is enabled, else OptunaTuner.
+
+        """
+        if self.tuning_params['multi_fidelity']:
+            return SuccessiveHalvingTuner(n_trials=self.tuning_params['max_tuning_iter'],
+                                          timeout=self.tuning_params['max_tuning_time'],
+                                          fit_on_holdout=self.tuning_params['fit_on_holdout'])
+
+        return OptunaTuner(n_trials=self.tuning_params['max_tuning_iter'],
+                           timeout=self.tuning_params['max_tuning_time'],
+                           fit_on_holdout=self.tuning_params['fit_on_holdout'],
+                           n_jobs=self.tuning_params['n_jobs'],
+                           pruner=self.tuning_params['pruner'],
+                           storage_dir=self.tuning_params['storage_dir'])
+
     def get_gbms(self, keys: Sequence[str], n_level: int = 1, pre_selector: Optional[SelectionPipeline] = None,
                  ):
 
         gbm_feats = LGBAdvancedPipeline(output_categories=False, **self.gbm_pipeline_params)
+        gbm_feats.set_cache(self._get_features_cache(n_level))
 
         ml_algos = []
         force_calc = []
         for key, force in zip(keys, [True, False, False, False]):
-            tuned = '_tuned' in key
-            algo_key = key.split('_')[0]
-            time_score = self.get_time_score(n_level, key)
-            gbm_timer = self.timer.get_task_timer(algo_key, time_score)
-            if algo_key == 'lgb':
-                gbm_model = BoostLGBM(timer=gbm_timer, **self.lgb_params)
-            elif algo_key == 'cb':
-                gbm_model = BoostCB(timer=gbm_timer, **self.cb_params)
-            else:
-                raise ValueError('Wrong algo key')
+            gbm_model = self.get_gbm_model(key, n_level)
+            if key == 'lgb' and pre_selector is not None and self.selection_params['importance_model'] == 'shared' \
+                    and not self.general_params['nested_cv']:
+                gbm_model.set_first_fold_source(self._get_importance_selector(pre_selector))
 
-            if tuned:
-                gbm_tuner = OptunaTuner(n_trials=self.tuning_params['max_tuning_iter'],
-                                        timeout=self.tuning_params['max_tuning_time'],
-                                        fit_on_holdout=self.tuning_params['fit_on_holdout'])
-                gbm_model = (gbm_model, gbm_tuner)
+            if '_tuned' in key:
+                gbm_model = (gbm_model, self.get_gbm_tuner())
             ml_algos.append(gbm_model)
             force_calc.append(force)
 
@@ -304,6 +380,7 @@ class TabularAutoML(AutoMLPreset):
 
         self.infer_auto_params(train_data, multilevel_avail)
         reader = PandasToPandasReader(task=self.task, **self.reader_params)
+        reader.cache = self._run_cache
 
         pre_selector = self.get_selector()
 
@@ -386,16 +463,123 @@ class TabularAutoML(AutoMLPreset):
         # roles may be none in case of train data is set {'data': np.ndarray, 'target': np.ndarray ...}
         if roles is None:
             roles = {}
-        read_csv_params = self._get_read_csv_params()
-        train, upd_roles = read_data(train_data, train_features, self.cpu_limit, read_csv_params)
-        if upd_roles:
-            roles = {**roles, **upd_roles}
-        if valid_data is not None:
-            data, _ = read_data(valid_data, valid_features, self.cpu_limit, self.read_csv_params)
+        with thread_budget(self.cpu_limit):
+            read_csv_params = self._get_read_csv_params()
+            memory_limit = self.memory_limit if self.general_params['memory_planning'] else None
+            allow_subsample = self.general_params['memory_subsample'] and cv_iter is None
+            self.memory_planner = MemoryPlanner(memory_limit, safety_ratio=self.general_params['memory_safety_ratio'],
+                                                allow_subsample=allow_subsample)
+            read_n_jobs = self.memory_planner.plan_read(train_data, self.cpu_limit)
+            own_data = isinstance(train_data, str)
+            if self._run_cache is not None and not isinstance(train_data, DataFrame):
+                # data is shared by runs, so it is not casted inplace
+                own_data = False
+                key = ('read_data', self._run_cache.fingerprint(train_data), repr(train_features),
+                       repr(sorted(read_csv_params.items())))
+                train, upd_roles = self._run_cache.get_or_compute(
+                    key, lambda: read_data(train_data, train_features, read_n_jobs, read_csv_params))
+            else:
+                train, upd_roles = read_data(train_data, train_features, read_n_jobs, read_csv_params)
+            if upd_roles:
+                roles = {**roles, **upd_roles}
+            if valid_data is not None:
+                data, _ = read_data(valid_data, valid_features, self.cpu_limit, self.read_csv_params)
+
+            n_rows = train.shape[0]
+            train, params_overrides = self._plan_memory(train, roles, own_data=own_data)
+            with self._override_params(params_overrides):
+                oof_pred = super().fit_predict(train, roles=roles, cv_iter=cv_iter, valid_data=valid_data)
+            if self.memory_planner.subsample_idx is not None:
+                # predictions are returned for every train row, rows out of subsample get NaN
+                data = np.full((n_rows, oof_pred.shape[1]), np.nan, dtype=np.float32)
+                data[self.memory_planner.subsample_idx] = oof_pred.data
+                oof_pred = NumpyDataset(data, features=oof_pred.features, roles=oof_pred.roles)
+            self._collapse_folds(train)
+            if self.general_params['compile_lgb']:
+                for ml_algo in (x for lvl in self.levels for pipe in lvl for x in pipe.ml_algos
+                                if isinstance(x, BoostLGBM)):
+                    ml_algo.compile_models()
+            self.memory_planner.report()
+
+            return cast(NumpyDataset, oof_pred)
+
+    def _plan_memory(self, train: DataFrame, roles: dict, own_data: bool = False) -> Tuple[DataFrame, dict]:
+        """Fit float32 casting, parallelism degree, reader sample and train subsample into memory limit.
+
+        Args:
+            train: train data.
+            roles: roles dict.
+            own_data: train data was read by automl, so it may be casted inplace.
+
+        Returns:
+            train data, maybe casted or subsampled, and overrides of params dicts for current fit,
+            ex. ``{'reader_params': {'n_jobs': 2}}``.
+
+        """
+        n_jobs = {'tuning': self.tuning_params['n_jobs'], 'reader': self.reader_params['n_jobs']}
+        if self.general_params['nested_cv']:
+            n_jobs = {'nested': self.nested_cv_params['n_jobs'], **n_jobs}
+
+        # columns with manually defined roles are kept as is
+        exclude = set()
+        for cols in roles.values():
+            exclude.update([cols] if isinstance(cols, str) else cols)
+
+        train, n_jobs, samples = self.memory_planner.plan_fit(train, n_jobs, self.reader_params['samples'],
+                                                              own_data=own_data, exclude=exclude)
+        overrides = {'tuning_params': {'n_jobs': n_jobs['tuning']},
+                     'reader_params': {'n_jobs': n_jobs['reader'], 'samples': samples}}
+        if 'nested' in n_jobs:
+            overrides['nested_cv_params'] = {'n_jobs': n_jobs['nested']}
+
+        return train, overrides
+
+    @contextmanager
+    def _override_params(self, overrides: Dict[str, dict]):
+        """Temporarily update values of params dicts, ex. ``self.reader_params``.
+
+        Args:
+            overrides: dict of params dict name and its updated values.
 
-        oof_pred = super().fit_predict(train, roles=roles, cv_iter=cv_iter, valid_data=valid_data)
+        """
+        saved = {name: {k: self.__dict__[name][k] for k in params if k in self.__dict__[name]}
+                 for (name, params) in overrides.items()}
+        for name, params in overrides.items():
+            self.__dict__[name].update(params)
+        try:
+            yield
+        finally:
+            for name, params in overrides.items():
+                for k in params:
+                    self.__dict__[name].pop(k, None)
+                self.__dict__[name].update(saved[name])
+
+    def _collapse_folds(self, train: DataFrame, n_samples: int = 10000):
+        """Merge fold boosters into single models and report deviation of automl predictions.
+
+        Args:
+            train: train data to check fidelity.
+            n_samples: number of rows to check fidelity.
+
+        """
+        mode = self.general_params['collapse_folds']
+        if not mode:
+            return
+
+        ml_algos = [x for lvl in self.levels for pipe in lvl for x in pipe.ml_algos
+                    if isinstance(x, (BoostLGBM, BoostCB)) and (mode == 'approx' or x.is_merge_exact())]
+        if len(ml_algos) == 0:
+            return
+
+        sample = train.sample(n=min(n_samples, train.shape[0]), random_state=42)
+        ref_pred = super().predict(sample).data
+
+        for ml_algo in ml_algos:
+            ml_algo.collapse_folds(approximate=True)
 
-        return cast(NumpyDataset, oof_pred)
+        diff = np.nanmax(np.abs(super().predict(sample).data - ref_pred))
+        logger.info('Fold models of {0} algos merged. Max deviation of predictions on train sample: {1}'
+                    .format(len(ml_algos), diff))
 
     def predict(self, data: ReadableToDf, features_names: Optional[Sequence[str]] = None,
                 batch_size: Optional[int] = None, n_jobs: Optional[int] = 1) -> NumpyDataset:
@@ -417,7 +601,8 @@ class TabularAutoML(AutoMLPreset):
                 - pd.DataFrame
 
             parallel inference - you can pass n_jobs to speedup prediction (requires more RAM)
-            batch_inference - you can pass batch_size to decrease RAM usage (may be longer)
+            batch_inference - you can pass batch_size to decrease RAM usage (may be longer).
+            If batch_size is None and memory planning is on, it is chosen to fit into memory_limit
 
         Returns:
             Dataset with predictions.
@@ -426,9 +611,14 @@ class TabularAutoML(AutoMLPreset):
 
         read_csv_params = self._get_read_csv_params()
 
+        memory_planner = getattr(self, 'memory_planner', None)
+        if batch_size is None and memory_planner is not None:
+            batch_size = memory_planner.plan_predict(data, n_jobs)
+
         if batch_size is None and n_jobs == 1:
-            data, _ = read_data(data, features_names, self.cpu_limit, read_csv_params)
-            pred = super().predict(data, features_names)
+            with thread_budget(self.cpu_limit):
+                data, _ = read_data(data, features_names, self.cpu_limit, read_csv_params)
+                pred = super().predict(data, features_names)
             return cast(NumpyDataset, pred)
 
         data_generator = read_batch(data, features_names, n_jobs=n_jobs, batch_size=batch_size,
@@ -437,14 +627,172 @@ class TabularAutoML(AutoMLPreset):
         if n_jobs == 1:
             res = [self.predict(df, features_names) for df in data_generator]
         else:
-            # TODO: Check here for pre_dispatch param
-            with Parallel(n_jobs, pre_dispatch=len(data_generator) + 1) as p:
-                res = p(delayed(self.predict)(df, features_names) for df in data_generator)
+            # every process gets its share of cpu_limit and a contiguous group of batches,
+            # so automl is sent to each process once and predictions keep the order of data
+            with thread_budget(self.cpu_limit):
+                n_jobs, n_threads = split_thread_budget(n_jobs)
+                groups = [[data_generator[n] for n in idx]
+                          for idx in np.array_split(np.arange(len(data_generator)), n_jobs) if len(idx) > 0]
+                with process_parallel(len(groups)) as p:
+                    res = p(delayed(self._predict_batches)(group, features_names, n_threads) for group in groups)
+                res = [x for group in res for x in group]
 
         res = NumpyDataset(np.concatenate([x.data for x in res], axis=0), features=res[0].features, roles=res[0].roles)
 
         return res
 
+    def _predict_batches(self, batches: Iterable, features_names: Optional[Sequence[str]],
+                         n_threads: int) -> List[NumpyDataset]:
+        """Predict batches one by one with limited number of threads, ex. in worker process.
+
+        Args:
+            batches: batches of data generator.
+            features_names: optional features names.
+            n_threads: threads budget.
+
+        Returns:
+            predictions for every batch.
+
+        """
+        with thread_budget(n_threads):
+            return [self.predict(batch, features_names) for batch in batches]
+
+    def _predict_with_budget(self, data: ReadableToDf, features_names: Optional[Sequence[str]],
+                             n_threads: int) -> NumpyDataset:
+        """Predict with limited number of threads, ex. in inference thread.
+
+        Args:
+            data: dataset to perform inference.
+            features_names: optional features names.
+            n_threads: threads budget.
+
+        Returns:
+            Dataset with predictions.
+
+        """
+        with thread_budget(n_threads):
+            return self.predict(data, features_names)
+
+    def predict_to_file(self, data: ReadableToDf, path: str, features_names: Optional[Sequence[str]] = None,
+                        batch_size: int = 100000, n_jobs: int = 1, queue_size: int = 2,
+                        keep_columns: Optional[Sequence[str]] = None, write_params: Optional[dict] = None):
+        """Streaming inference - predict on dataset by batches and write results to file.
+
+        Reading, inference and writing are run as pipelined stages connected by bounded queues,
+        so memory consumption depends on batch_size, n_jobs and queue_size, but not on the input size.
+        Batches are written in the order of input data.
+
+        Args:
+            data: dataset to perform inference.
+            path: output path. Parquet format is used for .parquet extension, csv otherwise.
+            features_names: optional features names, if cannot be inferred from data.
+            batch_size: number of rows read and predicted at once.
+            n_jobs: number of inference threads.
+            queue_size: max number of batches waiting between stages.
+            keep_columns: columns of input data to copy into output, ex. ids.
+            write_params: params of output file writer. Look for pd.DataFrame.to_csv or
+                pyarrow.parquet.ParquetWriter params.
+
+        Note:
+
+            Supported input formats are same as for .predict, but only .csv and .parquet files
+            are read partially. Other formats are expected to be already loaded in memory.
+
+        """
+        if keep_columns is None:
+            keep_columns = []
+        keep_columns = list(keep_columns)
+
+        read_csv_params = self._get_read_csv_params()
+        if read_csv_params['usecols'] is not None:
+            read_csv_params['usecols'] = read_csv_params['usecols'] + [x for x in keep_columns
+                                                                       if x not in read_csv_params['usecols']]
+
+        with thread_budget(self.cpu_limit):
+            # cpu_limit is split between inference threads
+            n_jobs, n_threads = split_thread_budget(n_jobs)
+
+        stop = threading.Event()
+        # limits number of batches that are read but not written yet
+        in_flight = threading.Semaphore(queue_size + 2 * n_jobs)
+        read_queue = Queue(queue_size)
+        pred_queue = Queue()
+
+        def put(queue, item):
+            while not stop.is_set():
+                try:
+                    queue.put(item, timeout=1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def get(queue):
+            while not stop.is_set():
+                try:
+                    return queue.get(timeout=1)
+                except Empty:
+                    continue
+            return None
+
+        def read_stage():
+            try:
+                for n, df in enumerate(read_data_stream(data, features_names, batch_size, read_csv_params)):
+                    while not in_flight.acquire(timeout=1):
+                        if stop.is_set():
+                            return
+                    if not put(read_queue, (n, df)):
+                        return
+            except Exception as e:
+                pred_queue.put((None, e))
+            finally:
+                for _ in range(n_jobs):
+                    put(read_queue, None)
+
+        def predict_stage():
+            while True:
+                item = get(read_queue)
+                if item is None:
+                    pred_queue.put(None)
+                    return
+                n, df = item
+                try:
+                    pred = self._predict_with_budget(df, features_names, n_threads)
+                    res = DataFrame(pred.data, columns=pred.features)
+                    for k, col in enumerate(keep_columns):
+                        res.insert(k, col, df[col].values)
+                except Exception as e:
+                    res = e
+                pred_queue.put((n, res))
+
+        workers = [start_thread(read_stage)] + [start_thread(predict_stage) for _ in range(n_jobs)]
+
+        # write stage - restore order of batches
+        pending = {}
+        next_n, n_finished = 0, 0
+        with PredictionsWriter(path, write_params) as writer:
+            try:
+                while n_finished < n_jobs:
+                    item = pred_queue.get()
+                    if item is None:
+                        n_finished += 1
+                        continue
+                    n, res = item
+                    if isinstance(res, Exception):
+                        raise res
+                    pending[n] = res
+                    while next_n in pending:
+                        writer.write(pending.pop(next_n))
+                        in_flight.release()
+                        next_n += 1
+            finally:
+                stop.set()
+
+        for worker in workers:
+            worker.join()
+
+        logger.info('{0} rows predicted and written to {1}'.format(writer.n_rows, path))
+
 
 @record_history(enabled=False)
 class TabularUtilizedAutoML(TimeUtilization):
@@ -462,6 +810,8 @@ class TabularUtilizedAutoML(TimeUtilization):
                  drop_last: bool = True,
                  max_runs_per_config: int = 5,
                  random_state: int = 42,
+                 n_jobs: int = 1,
+                 share_cache: bool = True,
                  **kwargs
                  ):
         """Simplifies using TimeUtilization module for TabularAutoMLPreset.
@@ -479,6 +829,8 @@ class TabularUtilizedAutoML(TimeUtilization):
                 if we should drop it from ensemble.
             max_runs_per_config: maximum number of multistart loops.
             random_state: initial random_state value that will be set in case of search in config.
+            n_jobs: number of automl's trained concurrently in separate processes.
+            share_cache: share read data, roles, folds and features between runs.
 
         """
         if configs_list is None:
@@ -486,8 +838,8 @@ class TabularUtilizedAutoML(TimeUtilization):
                             ['conf_0_sel_type_0.yml', 'conf_1_sel_type_1.yml', 'conf_2_select_mode_1_no_typ.yml',
                              'conf_3_sel_type_1_no_inter_lgbm.yml', 'conf_4_sel_type_0_no_int.yml',
                              'conf_5_sel_type_1_tuning_full.yml', 'conf_6_sel_type_1_tuning_full_no_int_lgbm.yml']]
-            inner_blend = MeanBlender()
-            outer_blend = WeightedBlender()
-            super().__init__(TabularAutoML, task, timeout, memory_limit, cpu_limit, gpu_ids, verbose, timing_params,
-                             configs_list, inner_blend, outer_blend, drop_last, max_runs_per_config, None, random_state,
-                             **kwargs)
+        inner_blend = MeanBlender()
+        outer_blend = WeightedBlender()
+        super().__init__(TabularAutoML, task, timeout, memory_limit, cpu_limit, gpu_ids, verbose, timing_params,
+                         configs_list, inner_blend, outer_blend, drop_last, max_runs_per_config, None, random_state,
+                         n_jobs, share_cache, **kwargs)
@@ -10,7 +10,7 @@ import torch.nn as nn
 from albumentations import Compose, Normalize, Resize
 from albumentations.pytorch import ToTensorV2
 from efficientnet_pytorch import EfficientNet
-from joblib import Parallel, delayed
+from joblib import delayed
 from log_calls import record_history
 from sklearn.base import TransformerMixin
 from torch.utils.data import DataLoader
@@ -18,6 +18,7 @@ from tqdm import tqdm
 
 from .utils import pil_loader
 from ..text.utils import seed_everything, parse_devices
+from ..utils.parallel import process_parallel
 
 numeric = Union[int, float]
 
@@ -133,7 +134,8 @@ class CreateImageFeatures:
             array of histograms.
 
         """
-        res = Parallel(self.n_jobs)(delayed(self.process)(im_path_i) for im_path_i in samples)
+        with process_parallel(self.n_jobs) as p:
+            res = p(delayed(self.process)(im_path_i) for im_path_i in samples)
         return np.vstack(res)
 
 
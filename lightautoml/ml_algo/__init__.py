@@ -1,3 +1,3 @@
 """Modules with machine learning algorithms and hyperparameters tuning tools."""
 
-__all__ = ['tuning', 'base', 'boost_lgbm', 'boost_cb', 'linear_sklearn', 'dl_model', 'whitebox', 'utils']
+__all__ = ['tuning', 'base', 'boost_lgbm', 'boost_cb', 'linear_sklearn', 'dl_model', 'whitebox', 'utils', 'compiled_trees']
@@ -1,5 +1,6 @@
 """Base classes for machine learning algorithms."""
 
+import threading
 from abc import ABC, abstractmethod
 from copy import copy
 from typing import Optional, Tuple, Any, List, cast, Dict, Sequence, Union
@@ -12,6 +13,7 @@ from ..dataset.base import LAMLDataset
 from ..dataset.np_pd_dataset import NumpyDataset, CSRSparseDataset, PandasDataset
 from ..dataset.roles import NumericRole
 from ..utils.logging import get_logger
+from ..utils.parallel import split_thread_budget, thread_map
 from ..utils.timer import TaskTimer, PipelineTimer
 
 logger = get_logger(__name__)
@@ -158,11 +160,136 @@ class MLAlgo(ABC):
 
         return self
 
+    def clone(self) -> 'MLAlgo':
+        """Create unfitted copy of algo with the same parameters.
+
+        Unlike deepcopy, fitted models and cached data are not copied, so it's cheap to call per tuning trial.
+        Timer is replaced with new unlimited timer, as deepcopy of ``TaskTimer`` does.
+
+        Returns:
+            new algo.
+
+        """
+        new_algo = copy(self)
+        new_algo.default_params = copy(self.default_params)
+        new_algo._params = None if self._params is None else copy(self._params)
+        new_algo.models = []
+        new_algo._features = None
+        new_algo._nan_rate = None
+        new_algo.timer = PipelineTimer().start().get_task_timer(getattr(self.timer, 'key', None))
+
+        return new_algo
+
 
 @record_history(enabled=False)
 class TabularMLAlgo(MLAlgo):
     """Machine learning algorithms that accepts numpy arrays as input."""
     _name: str = 'TabularAlgo'
+    # name of param that limits number of threads used by single model
+    _threads_param: Optional[str] = None
+    # name of param that limits number of iterations of single model, used to predict fit time
+    _iters_param: Optional[str] = None
+    # number of fold models that predict concurrently
+    predict_n_jobs: int = 1
+    # if set, only the first fold uses early stopping, other folds train for scaled best iteration of the first one
+    fold_rounds_scale: Optional[float] = None
+    # number of rounds for the folds after the first one
+    _fold_rounds: Optional[int] = None
+
+    def clone(self) -> 'TabularMLAlgo':
+        """Create unfitted copy of algo with the same parameters.
+
+        Number of rounds, shared by the first fold, is not copied.
+
+        Returns:
+            new algo.
+
+        """
+        new_algo = super().clone()
+        new_algo._fold_rounds = None
+
+        return new_algo
+
+    def set_predict_n_jobs(self, n_jobs: int) -> 'TabularMLAlgo':
+        """Set number of fold models that predict concurrently.
+
+        Models are run in threads, so it makes sense for the algos that release GIL
+        on inference (ex. LightGBM, CatBoost).
+
+        Args:
+            n_jobs: number of concurrent models.
+
+        Returns:
+            self.
+
+        """
+        self.predict_n_jobs = n_jobs
+
+        return self
+
+    def set_fold_rounds_scale(self, scale: Optional[float]) -> 'TabularMLAlgo':
+        """Share best iteration of the first fold with other folds.
+
+        Early stopping runs only on the first fold, other folds are trained for fixed number
+        of rounds ``best_iteration * scale`` without validation. Used by boosting algos.
+
+        Args:
+            scale: multiplier of best iteration, ``None`` - early stopping on every fold.
+
+        Returns:
+            self.
+
+        """
+        self.fold_rounds_scale = scale
+
+        return self
+
+    def _get_fixed_rounds(self) -> Optional[int]:
+        """Number of rounds for current fold.
+
+        Returns:
+            number of rounds or ``None`` if current fold should use early stopping.
+
+        """
+        if self.fold_rounds_scale is None or len(self.models) == 0:
+            return None
+
+        return self._fold_rounds
+
+    def _set_fold_rounds(self, best_iteration: int):
+        """Save best iteration of the first fold.
+
+        Args:
+            best_iteration: number of rounds of the best model.
+
+        """
+        if self.fold_rounds_scale is not None and len(self.models) == 0:
+            self._fold_rounds = max(1, int(round(best_iteration * self.fold_rounds_scale)))
+            logger.info('{0} folds after the first one are trained for {1} rounds'.format(self._name, self._fold_rounds))
+
+    def set_timer_run_params(self, train_valid_iterator: TrainValidIterator, train: Optional[TabularDataset] = None):
+        """Pass fold shape and params to timer, so fit time of fold can be predicted by runtime cost model.
+
+        Args:
+            train_valid_iterator: classic cv iterator.
+            train: train part of fold. If ``None``, fold size is inferred from number of folds.
+
+        """
+        if train is None:
+            train = train_valid_iterator.train
+            n_folds = len(train_valid_iterator)
+            n_rows = train.shape[0] * (n_folds - 1) // n_folds if n_folds > 1 else train.shape[0]
+        else:
+            n_rows = train.shape[0]
+
+        # params getter is not used, so params are still inferred from input on fit
+        params = self.default_params if self._params is None else self._params
+        n_iters = self._get_fixed_rounds()
+        if n_iters is None and self._iters_param is not None:
+            n_iters = params.get(self._iters_param)
+        n_threads = None if self._threads_param is None else params.get(self._threads_param)
+
+        self.timer.set_run_params(n_rows, train.shape[1], n_iters, n_threads)
 
     def _set_prediction(self, dataset: NumpyDataset, preds_arr: np.ndarray) -> NumpyDataset:
         """Insert predictions to dataset with. Inplace transformation.
@@ -211,6 +338,43 @@ class TabularMLAlgo(MLAlgo):
         logger.info('Start fitting {} ...'.format(self._name))
         self.timer.start()
 
+        preds_ds, preds_arr, counter_arr = self._init_fit(train_valid_iterator)
+
+        # TODO: Make parallel version later
+        for n, (idx, train, valid) in enumerate(train_valid_iterator):
+
+            self.timer.set_control_point()
+            self.set_timer_run_params(train_valid_iterator, train)
+
+            model, pred = self.fit_predict_single_fold(train, valid)
+            self._add_fold_prediction(model, idx, pred, preds_arr, counter_arr)
+
+            self.timer.write_run_info()
+
+            if (n + 1) != len(train_valid_iterator):
+                # split into separate cases because timeout checking affects parent pipeline timer
+                if self.timer.time_limit_exceeded():
+                    logger.warning('Time limit exceeded after calculating fold {0}'.format(n))
+                    break
+                if self.timer.time_limit_expected():
+                    logger.warning('Next fold is not expected to finish in time limit, remaining {0} folds are skipped'
+                                   .format(len(train_valid_iterator) - n - 1))
+                    break
+
+        logger.debug('Time history {0}. Time left {1}'.format(self.timer.get_run_results(), self.timer.time_left))
+
+        return self._finish_fit(preds_ds, preds_arr, counter_arr)
+
+    def _init_fit(self, train_valid_iterator: TrainValidIterator) -> Tuple[NumpyDataset, np.ndarray, np.ndarray]:
+        """Init params, features and task before fit and create arrays to accumulate out-of-fold predictions.
+
+        Args:
+            train_valid_iterator: classic cv iterator.
+
+        Returns:
+            empty dataset for predictions, array of predictions sum and array of predictions count.
+
+        """
         assert self.is_fitted is False, 'Algo is already fitted'
         # init params on input if no params was set before
         if self._params is None:
@@ -234,26 +398,36 @@ class TabularMLAlgo(MLAlgo):
         preds_arr = np.zeros((preds_ds.shape[0], outp_dim), dtype=np.float32)
         counter_arr = np.zeros((preds_ds.shape[0], 1), dtype=np.float32)
 
-        # TODO: Make parallel version later
-        for n, (idx, train, valid) in enumerate(train_valid_iterator):
+        return preds_ds, preds_arr, counter_arr
 
-            self.timer.set_control_point()
+    def _add_fold_prediction(self, model: Any, idx: np.ndarray, pred: np.ndarray,
+                             preds_arr: np.ndarray, counter_arr: np.ndarray):
+        """Store fold model and add its out-of-fold prediction.
 
-            model, pred = self.fit_predict_single_fold(train, valid)
-            self.models.append(model)
-            preds_arr[idx] += pred.reshape((pred.shape[0], -1))
-            counter_arr[idx] += 1
+        Args:
+            model: fitted fold model.
+            idx: indices of validation rows of fold.
+            pred: predictions for validation rows.
+            preds_arr: array of predictions sum.
+            counter_arr: array of predictions count.
 
-            self.timer.write_run_info()
+        """
+        self.models.append(model)
+        preds_arr[idx] += pred.reshape((pred.shape[0], -1))
+        counter_arr[idx] += 1
 
-            if (n + 1) != len(train_valid_iterator):
-                # split into separate cases because timeout checking affects parent pipeline timer
-                if self.timer.time_limit_exceeded():
-                    logger.warning('Time limit exceeded after calculating fold {0}'.format(n))
-                    break
+    def _finish_fit(self, preds_ds: NumpyDataset, preds_arr: np.ndarray, counter_arr: np.ndarray) -> NumpyDataset:
+        """Average out-of-fold predictions, rows without predictions are ``np.nan``.
 
-        logger.debug('Time history {0}. Time left {1}'.format(self.timer.get_run_results(), self.timer.time_left))
+        Args:
+            preds_ds: empty dataset for predictions.
+            preds_arr: array of predictions sum.
+            counter_arr: array of predictions count.
 
+        Returns:
+            dataset with predicted values.
+
+        """
         preds_arr /= np.where(counter_arr == 0, 1, counter_arr)
         preds_arr = np.where(counter_arr == 0, np.nan, preds_arr)
 
@@ -261,12 +435,15 @@ class TabularMLAlgo(MLAlgo):
         logger.info('{} fitting and predicting completed'.format(self._name))
         return preds_ds
 
-    def predict_single_fold(self, model: Any, dataset: TabularDataset) -> np.ndarray:
+    def predict_single_fold(self, model: Any, dataset: TabularDataset, n_threads: Optional[int] = None) -> np.ndarray:
         """Implements prediction on single fold.
 
         Args:
             model: model uses to predict.
             dataset: ``NumpyDataset`` used for prediction.
+            n_threads: number of threads of model, if differs from params
+              (ex. threads budget is split between concurrent fold models).
+              Used only by models with ``_threads_param``.
 
         Returns:
             predictions for input dataset.
@@ -274,6 +451,66 @@ class TabularMLAlgo(MLAlgo):
         """
         raise NotImplementedError
 
+    def _merge_models(self, models: Sequence[Any]) -> Any:
+        """Merge fold models into single model, that predicts mean of raw fold predictions.
+
+        Args:
+            models: fold models.
+
+        Returns:
+            merged model.
+
+        """
+        raise NotImplementedError
+
+    def is_merge_exact(self) -> bool:
+        """Check if merged model predicts exactly the mean of fold models predictions.
+
+        It's true if prediction is linear function of model's raw output.
+
+        Returns:
+            bool.
+
+        """
+        return False
+
+    def collapse_folds(self, dataset: Optional[TabularDataset] = None, approximate: bool = False) -> Optional[float]:
+        """Merge fold models into single model to speedup inference.
+
+        Merge is exact for the losses with linear link (ex. regression).
+        For others (ex. probabilities of classification) it's an approximation -
+        link function of mean raw output is used instead of mean of link function outputs.
+
+        Args:
+            dataset: dataset to check fidelity of merged model.
+            approximate: allow approximate merge.
+
+        Returns:
+            max absolute difference between predictions of merged model and fold models on dataset
+            or ``None`` if dataset is not passed.
+
+        """
+        assert self.models != [], 'Should be fitted first.'
+        exact = self.is_merge_exact()
+        assert exact or approximate, 'Merge of {0} fold models is not exact for the task. ' \
+                                     'Set approximate=True to merge anyway.'.format(self._name)
+
+        if len(self.models) == 1:
+            return None if dataset is None else 0.
+
+        ref_pred = None if dataset is None else self.predict(dataset).data
+        n_models = len(self.models)
+        self.models = [self._merge_models(self.models)]
+
+        diff = None
+        if ref_pred is not None:
+            diff = float(np.nanmax(np.abs(self.predict(dataset).data - ref_pred)))
+
+        logger.info('{0} fold models of {1} merged into single model. Exact: {2}, max deviation: {3}'
+                    .format(n_models, self._name, exact, diff))
+
+        return diff
+
     def predict(self, dataset: TabularDataset) -> NumpyDataset:
         """Mean prediction for all fitted models.
 
@@ -286,16 +523,24 @@ class TabularMLAlgo(MLAlgo):
         """
         assert self.models != [], 'Should be fitted first.'
         preds_ds = dataset.empty().to_numpy()
-        preds_arr = None
+        preds_arr = np.zeros((dataset.shape[0], self.n_classes), dtype=np.float32)
+
+        n_jobs = min(self.predict_n_jobs, len(self.models))
+        lock = threading.Lock()
+
+        kwargs = {}
+        if self._threads_param is not None:
+            # split threads of single model between concurrent models within threads budget
+            n_jobs, kwargs['n_threads'] = split_thread_budget(n_jobs, self.params[self._threads_param])
+
+        def predict_fold(model: Any):
+            pred = self.predict_single_fold(model, dataset, **kwargs)
+            with lock:
+                preds_arr[:] += pred.reshape((pred.shape[0], -1))
 
-        for model in self.models:
-            if preds_arr is None:
-                preds_arr = self.predict_single_fold(model, dataset)
-            else:
-                preds_arr += self.predict_single_fold(model, dataset)
+        thread_map(predict_fold, self.models, n_jobs)
 
         preds_arr /= len(self.models)
-        preds_arr = preds_arr.reshape((preds_arr.shape[0], -1))
         preds_ds = self._set_prediction(preds_ds, preds_arr)
 
         return preds_ds
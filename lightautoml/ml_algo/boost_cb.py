@@ -2,11 +2,12 @@
 
 import logging
 from copy import copy
-from typing import Tuple, Dict, Union, Callable
+from typing import Optional, Tuple, Dict, Union, Callable, Sequence
 
 import catboost as cb
 import numpy as np
 from log_calls import record_history
+from optuna.exceptions import TrialPruned
 from optuna.trial import Trial
 from pandas import Series
 
@@ -15,13 +16,42 @@ from .tuning.optuna import OptunaTunableMixin
 from ..dataset.np_pd_dataset import NumpyDataset, CSRSparseDataset, PandasDataset
 from ..pipelines.selection.base import ImportanceEstimator
 from ..pipelines.utils import get_columns_by_role
+from ..tasks.losses.base import Loss
 from ..utils.logging import get_logger
+from ..utils.parallel import limit_threads
 from ..validation.base import TrainValidIterator
 
 logger = get_logger(__name__)
 TabularDataset = Union[NumpyDataset, CSRSparseDataset, PandasDataset]
 
 
+@record_history(enabled=False)
+class _PruningCallback:
+    """CatBoost callback, that reports validation score to tuning trial."""
+
+    def __init__(self, ml_algo: OptunaTunableMixin, metric: Union[str, Callable], higher_is_better: bool):
+        """
+
+        Args:
+            ml_algo: algo that is fitted during trial.
+            metric: eval metric, name or custom metric object.
+            higher_is_better: direction of eval metric.
+
+        """
+        self.ml_algo = ml_algo
+        self.metric = metric if isinstance(metric, str) else type(metric).__name__
+        self.higher_is_better = higher_is_better
+        self.pruned = False
+
+    def after_iteration(self, info) -> bool:
+        metrics = info.metrics['validation']
+        value = metrics[self.metric] if self.metric in metrics else list(metrics.values())[-1]
+        self.pruned = self.ml_algo.report_intermediate(info.iteration, value[-1], self.higher_is_better)
+
+        # False stops training
+        return not self.pruned
+
+
 @record_history(enabled=False)
 class BoostCB(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
     """Gradient boosting on decision trees from catboost library.
@@ -40,6 +70,8 @@ class BoostCB(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
 
     """
     _name: str = 'CatBoost'
+    _threads_param: str = 'thread_count'
+    _iters_param: str = 'num_trees'
 
     _default_params = {
         "task_type": "CPU",
@@ -77,6 +109,7 @@ class BoostCB(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         params = copy(self.params)
         early_stopping_rounds = params.pop('od_wait')
         num_trees = params.pop('num_trees')
+        params['thread_count'] = limit_threads(params['thread_count'])
 
         root_logger = logging.getLogger()
         level = root_logger.getEffectiveLevel()
@@ -310,23 +343,44 @@ class BoostCB(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         cb_train = self._get_pool(train)
         cb_valid = self._get_pool(valid)
 
-        model = cb.CatBoost({**params, **{'num_trees': num_trees,
-                                          'objective': fobj,
-                                          'eval_metric': feval,
-                                          "od_wait": early_stopping_rounds}})
-
-        model.fit(cb_train, eval_set=cb_valid)
+        fixed_rounds = self._get_fixed_rounds()
+        if fixed_rounds is not None:
+            # no validation during boosting, number of rounds is taken from the first fold
+            model = cb.CatBoost({**params, **{'num_trees': fixed_rounds,
+                                              'objective': fobj,
+                                              'eval_metric': feval}})
+            model.fit(cb_train)
+        else:
+            model = cb.CatBoost({**params, **{'num_trees': num_trees,
+                                              'objective': fobj,
+                                              'eval_metric': feval,
+                                              "od_wait": early_stopping_rounds}})
+
+            callbacks = None
+            if self._trial is not None:
+                # eval metric is set from task metric, so it has the same direction
+                callbacks = [_PruningCallback(self, feval, self.task.greater_is_better)]
+
+            model.fit(cb_train, eval_set=cb_valid, callbacks=callbacks)
+            if callbacks is not None and callbacks[0].pruned:
+                raise TrialPruned('Trial was pruned at iteration {0}'.format(model.tree_count_))
+            # next fold reports to the following steps
+            self._pruning_step += num_trees
+            # model is shrinked to the best iteration
+            self._set_fold_rounds(model.tree_count_)
 
         val_pred = self._predict(model, cb_valid, params)
 
         return model, val_pred
 
-    def predict_single_fold(self, model: cb.CatBoost, dataset: TabularDataset) -> np.ndarray:
+    def predict_single_fold(self, model: cb.CatBoost, dataset: TabularDataset,
+                            n_threads: Optional[int] = None) -> np.ndarray:
         """Predict of target values for dataset.
 
         Args:
             model: CatBoost object.
             dataset: test dataset.
+            n_threads: number of threads, if differs from params.
 
         Return:
             predicted target values.
@@ -334,12 +388,35 @@ class BoostCB(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         """
 
         params = self._infer_params()[0]
+        if n_threads is not None:
+            params['thread_count'] = n_threads
         cb_test = self._get_pool(dataset)
 
         pred = self._predict(model, cb_test, params)
 
         return pred
 
+    def _merge_models(self, models: Sequence[cb.CatBoost]) -> cb.CatBoost:
+        """Merge fold models into single model by summing trees with scaled leaf values.
+
+        Args:
+            models: fold models.
+
+        Returns:
+            merged model.
+
+        """
+        return cb.sum_models(models, weights=[1 / len(models)] * len(models))
+
+    def is_merge_exact(self) -> bool:
+        """Merge is exact for regression without target transformation.
+
+        Returns:
+            bool.
+
+        """
+        return self.task.name == 'reg' and self.task.losses['cb'].bw_func is Loss._bw_func
+
     def get_features_score(self) -> Series:
         """Computes feature importance.
 
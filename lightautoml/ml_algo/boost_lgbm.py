@@ -2,22 +2,114 @@
 
 import logging
 from copy import copy
-from typing import Optional, Callable, Tuple, Dict
+from typing import Optional, Callable, Tuple, Dict, Sequence
 
 import lightgbm as lgb
 import numpy as np
 from log_calls import record_history
+from optuna.exceptions import TrialPruned
 from optuna.trial import Trial
 from pandas import Series
 
 from .base import TabularMLAlgo, TabularDataset
+from .compiled_trees import CompiledTreeEnsemble
 from .tuning.optuna import OptunaTunableMixin
-from ..pipelines.selection.base import ImportanceEstimator
+from ..dataset.np_pd_dataset import NumpyDataset
+from ..pipelines.selection.base import ImportanceEstimator, SelectionPipeline
+from ..tasks.losses.base import Loss
 from ..utils.logging import get_logger
+from ..utils.parallel import limit_threads
 from ..validation.base import TrainValidIterator
 
 logger = get_logger(__name__)
 
+# objectives with identity link function
+_linear_objectives = {'regression', 'regression_l2', 'l2', 'mse', 'mean_squared_error', 'rmse', 'root_mean_squared_error',
+                      'regression_l1', 'l1', 'mae', 'mean_absolute_error', 'huber', 'fair', 'quantile',
+                      'mape', 'mean_absolute_percentage_error'}
+
+
+@record_history(enabled=False)
+def merge_boosters(models: Sequence[lgb.Booster], weights: Sequence[float]) -> lgb.Booster:
+    """Merge LightGBM boosters into one by concatenating trees with scaled leaf values.
+
+    Raw output of merged booster is weighted sum of raw outputs of input boosters.
+
+    Args:
+        models: boosters trained on the same features.
+        weights: weights of boosters.
+
+    Returns:
+        merged booster.
+
+    """
+    header, footer, trees = None, None, []
+    for model, w in zip(models, weights):
+        # only best iteration trees are saved
+        model_str = model.model_to_string()
+        start, end = model_str.index('\nTree='), model_str.index('\nend of trees')
+        if header is None:
+            header, footer = model_str[:start], model_str[end:]
+
+        for tree in model_str[start:end].split('\nTree=')[1:]:
+            # first line is tree number
+            lines = tree.strip('\n').split('\n')[1:]
+            for n, line in enumerate(lines):
+                key, _, val = line.partition('=')
+                if key in ('leaf_value', 'internal_value') and val:
+                    lines[n] = key + '=' + ' '.join(repr(float(x) * w) for x in val.split(' '))
+            trees.append(lines)
+
+    # tree sizes are optional, lightgbm parses trees sequentially without them
+    header = '\n'.join(x for x in header.split('\n') if not x.startswith('tree_sizes='))
+    body = ''.join('\nTree={0}\n{1}\n'.format(n, '\n'.join(lines)) for (n, lines) in enumerate(trees))
+
+    return lgb.Booster(model_str=header + body + footer)
+
+
+@record_history(enabled=False)
+def select_booster_features(model: lgb.Booster, features_idx: Sequence[int]) -> lgb.Booster:
+    """Rebuild LightGBM booster for another set of input features.
+
+    All features used in splits should be in new set, so predictions are the same.
+    New input may contain features unknown to the model, so boosting can be continued with them.
+
+    Args:
+        model: fitted booster.
+        features_idx: index of every new input feature in model input, -1 for new features.
+
+    Returns:
+        booster that takes new input.
+
+    """
+    mapping = {old: new for (new, old) in enumerate(features_idx) if old >= 0}
+    model_str = model.model_to_string()
+    start, end = model_str.index('\nTree='), model_str.index('\nend of trees')
+
+    header = []
+    for line in model_str[:start].split('\n'):
+        key, _, val = line.partition('=')
+        if key == 'max_feature_idx':
+            line = 'max_feature_idx={0}'.format(len(features_idx) - 1)
+        elif key == 'feature_names':
+            line = key + '=' + ' '.join('Column_{0}'.format(n) for n in range(len(features_idx)))
+        elif key == 'feature_infos':
+            val = val.split(' ')
+            line = key + '=' + ' '.join(val[x] if x >= 0 else 'none' for x in features_idx)
+        elif key == 'tree_sizes':
+            # tree sizes are optional, lightgbm parses trees sequentially without them
+            continue
+        header.append(line)
+
+    trees = model_str[start:end].split('\n')
+    for n, line in enumerate(trees):
+        key, _, val = line.partition('=')
+        if key == 'split_feature' and val:
+            trees[n] = key + '=' + ' '.join(str(mapping[int(x)]) for x in val.split(' '))
+
+    # footer contains feature importances by names and params, it's not used for prediction
+    return lgb.Booster(model_str='\n'.join(header) + '\n'.join(trees) + '\nend of trees\n')
+
 
 @record_history(enabled=False)
 class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
@@ -36,6 +128,11 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
 
     """
     _name: str = 'LightGBM'
+    _threads_param: str = 'num_threads'
+    _iters_param: str = 'num_trees'
+    _compiled: Optional[CompiledTreeEnsemble] = None
+    _first_fold_source: Optional[SelectionPipeline] = None
+    _init_model: Optional[Tuple[lgb.Booster, Sequence[str]]] = None
 
     _default_params = {
         'task': 'train',
@@ -58,6 +155,23 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         'random_state': 42
     }
 
+    def clone(self) -> 'BoostLGBM':
+        """Create unfitted copy of algo with the same parameters.
+
+        Compiled ensemble, init model and source of the first fold model are not copied,
+        since they belong to fitted models of this algo.
+
+        Returns:
+            new algo.
+
+        """
+        new_algo = super().clone()
+        new_algo._compiled = None
+        new_algo._init_model = None
+        new_algo._first_fold_source = None
+
+        return new_algo
+
     def _infer_params(self) -> Tuple[dict, int, int, int, Optional[Callable], Optional[Callable]]:
         """Infer all parameters in lightgbm format.
 
@@ -70,6 +184,7 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         params = copy(self.params)
         early_stopping_rounds = params.pop('early_stopping_rounds')
         num_trees = params.pop('num_trees')
+        params['num_threads'] = limit_threads(params['num_threads'])
 
         root_logger = logging.getLogger()
         level = root_logger.getEffectiveLevel()
@@ -231,6 +346,77 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
 
         return trial_values
 
+    def set_first_fold_source(self, selector: Optional[SelectionPipeline]):
+        """Reuse fitted model of selector as the first fold model.
+
+        Selector should fit ``BoostLGBM`` with the same params on holdout made from the first fold,
+        so selection doesn't need separate training stage. Model is reused only if all its split features
+        are selected and params are the same, otherwise first fold is trained as usual.
+
+        Args:
+            selector: selection pipeline with ``ml_algo`` or ``None``.
+
+        """
+        self._first_fold_source = selector
+
+    def _get_first_fold_model(self) -> Optional[lgb.Booster]:
+        """Get selector model restricted to current features, if it can be reused for the first fold.
+
+        Returns:
+            booster or ``None``.
+
+        """
+        if self._first_fold_source is None or len(self.models) > 0:
+            return None
+
+        source = self._first_fold_source.ml_algo
+        # reference is not needed after the first fold
+        self._first_fold_source = None
+        if not isinstance(source, BoostLGBM) or len(source.models) != 1 or source.params != self.params:
+            return None
+
+        source_idx = {x: n for (n, x) in enumerate(source.features)}
+        model = source.models[0]
+        used = np.array(source.features)[model.feature_importance(importance_type='split') > 0]
+        if any(x not in source_idx for x in self.features) or not set(used).issubset(self.features):
+            return None
+
+        return select_booster_features(model, [source_idx[x] for x in self.features])
+
+    def set_init_model(self, model: Optional[lgb.Booster], features: Optional[Sequence[str]] = None):
+        """Continue boosting of the first fold from fitted model.
+
+        Model may be fitted on subset of features, new features are added to the following trees.
+        Model should be fitted on the same train rows, so it's intended for holdout validation.
+
+        Args:
+            model: fitted booster or ``None``.
+            features: names of model input features.
+
+        """
+        self._init_model = None if model is None else (model, list(features))
+
+    def _get_init_model(self) -> Optional[lgb.Booster]:
+        """Get init model mapped to current features.
+
+        Returns:
+            booster or ``None``.
+
+        """
+        if self._init_model is None or len(self.models) > 0:
+            return None
+
+        model, features = self._init_model
+        # reference is not needed after the first fold
+        self._init_model = None
+        idx = {x: n for (n, x) in enumerate(features)}
+        used = np.array(features)[model.feature_importance(importance_type='split') > 0]
+        if not set(used).issubset(self.features):
+            logger.warning('Init model uses features that are not in train data, boosting starts from scratch')
+            return None
+
+        return select_booster_features(model, [idx.get(x, -1) for x in self.features])
+
     def fit_predict_single_fold(self, train: TabularDataset, valid: TabularDataset) -> Tuple[lgb.Booster, np.ndarray]:
         """Implements training and prediction on single fold.
 
@@ -242,6 +428,13 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
             Tuple (model, predicted_values)
 
         """
+        model = self._get_first_fold_model()
+        if model is not None:
+            logger.info('Model of the first fold is reused from selector')
+            self._set_fold_rounds(model.current_iteration())
+            val_pred = self.task.losses['lgb'].bw_func(model.predict(valid.data))
+
+            return model, val_pred
 
         params, num_trees, early_stopping_rounds, verbose_eval, fobj, feval = self._infer_params()
 
@@ -251,29 +444,140 @@ class BoostLGBM(OptunaTunableMixin, TabularMLAlgo, ImportanceEstimator):
         lgb_train = lgb.Dataset(train.data, label=train_target, weight=train_weight)
         lgb_valid = lgb.Dataset(valid.data, label=valid_target, weight=valid_weight)
 
-        model = lgb.train(params, lgb_train, num_boost_round=num_trees, valid_sets=[lgb_valid], valid_names=['valid'],
-                          fobj=fobj, feval=feval, early_stopping_rounds=early_stopping_rounds, verbose_eval=verbose_eval
-                          )
+        fixed_rounds = self._get_fixed_rounds()
+        if fixed_rounds is not None:
+            # no validation during boosting, number of rounds is taken from the first fold
+            model = lgb.train(params, lgb_train, num_boost_round=fixed_rounds, fobj=fobj)
+        else:
+            callbacks = []
+            if self._trial is not None:
+                callbacks.append(self._pruning_callback)
+
+            model = lgb.train(params, lgb_train, num_boost_round=num_trees, valid_sets=[lgb_valid],
+                              valid_names=['valid'], fobj=fobj, feval=feval, early_stopping_rounds=early_stopping_rounds,
+                              verbose_eval=verbose_eval, callbacks=callbacks, init_model=self._get_init_model()
+                              )
+            # next fold reports to the following steps
+            self._pruning_step += num_trees
+            self._set_fold_rounds(model.best_iteration or model.current_iteration())
+
         val_pred = model.predict(valid.data)
         val_pred = self.task.losses['lgb'].bw_func(val_pred)
 
         return model, val_pred
 
-    def predict_single_fold(self, model: lgb.Booster, dataset: TabularDataset) -> np.ndarray:
+    def _pruning_callback(self, env: lgb.callback.CallbackEnv):
+        """Report validation score to tuning trial and stop training if trial is pruned.
+
+        Args:
+            env: lightgbm callback environment.
+
+        """
+        _, _, value, higher_is_better = env.evaluation_result_list[0][:4]
+        if self.report_intermediate(env.iteration, value, higher_is_better):
+            raise TrialPruned('Trial was pruned at iteration {0}'.format(env.iteration))
+
+    def predict_single_fold(self, model: lgb.Booster, dataset: TabularDataset,
+                            n_threads: Optional[int] = None) -> np.ndarray:
         """Predict target values for dataset.
 
         Args:
             model: Lightgbm object.
             dataset: test dataset.
+            n_threads: number of threads, if differs from params.
 
         Return:
             predicted target values.
 
         """
-        pred = self.task.losses['lgb'].bw_func(model.predict(dataset.data))
+        kwargs = {} if n_threads is None else {'num_threads': n_threads}
+        pred = self.task.losses['lgb'].bw_func(model.predict(dataset.data, **kwargs))
 
         return pred
 
+    def compile_models(self) -> CompiledTreeEnsemble:
+        """Export fold models to vectorized numpy evaluator, that is used for prediction after that.
+
+        Returns:
+            compiled ensemble of all fold models.
+
+        """
+        assert self.models != [], 'Should be fitted first.'
+        self._compiled = CompiledTreeEnsemble.from_boosters(self.models)
+
+        return self._compiled
+
+    def predict(self, dataset: TabularDataset) -> NumpyDataset:
+        """Mean prediction for all fitted models. Compiled ensemble is used if models are compiled.
+
+        Args:
+            dataset: ``NumpyDataset`` used for prediction.
+
+        Returns:
+            dataset with predicted values.
+
+        """
+        if self._compiled is None or not isinstance(dataset.data, np.ndarray):
+            return super().predict(dataset)
+
+        preds_ds = dataset.empty().to_numpy()
+        bw_func = self.task.losses['lgb'].bw_func
+        # n_models x n_rows x n_outputs, single output is flattened like lgb.Booster.predict does
+        pred = self._compiled.predict_per_model(dataset.data).transpose((1, 0, 2))
+        if self._compiled.n_outputs == 1:
+            pred = pred[..., 0]
+
+        preds_arr = np.zeros((dataset.shape[0], self.n_classes), dtype=np.float32)
+        for model_pred in pred:
+            model_pred = bw_func(model_pred)
+            preds_arr += model_pred.reshape((model_pred.shape[0], -1))
+
+        preds_arr /= pred.shape[0]
+
+        return self._set_prediction(preds_ds, preds_arr)
+
+    def collapse_folds(self, dataset: Optional[TabularDataset] = None, approximate: bool = False) -> Optional[float]:
+        """Merge fold models into single model, compiled ensemble is rebuilt if exists.
+
+        Args:
+            dataset: dataset to check fidelity of merged model.
+            approximate: allow approximate merge.
+
+        Returns:
+            max absolute difference between predictions of merged model and fold models on dataset
+            or ``None`` if dataset is not passed.
+
+        """
+        compiled = self._compiled is not None
+        self._compiled = None
+        diff = super().collapse_folds(dataset, approximate)
+        if compiled:
+            self.compile_models()
+
+        return diff
+
+    def _merge_models(self, models: Sequence[lgb.Booster]) -> lgb.Booster:
+        """Merge fold boosters into single booster.
+
+        Args:
+            models: fold boosters.
+
+        Returns:
+            merged booster.
+
+        """
+        return merge_boosters(models, [1 / len(models)] * len(models))
+
+    def is_merge_exact(self) -> bool:
+        """Merge is exact for regression objectives without target transformation.
+
+        Returns:
+            bool.
+
+        """
+        loss = self.task.losses['lgb']
+        return self.task.name == 'reg' and loss.fobj_name in _linear_objectives and loss.bw_func is Loss._bw_func
+
     def get_features_score(self) -> Series:
         """Computes feature importance as mean values of feature importance provided by lightgbm per all models.
 
@@ -0,0 +1,302 @@
+"""Vectorized numpy evaluator of LightGBM tree ensembles."""
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+from log_calls import record_history
+
+# lightgbm treats values with smaller absolute value as zero
+_ZERO_THRESHOLD = 1e-35
+
+
+@record_history(enabled=False)
+def _parse_floats(val: str) -> np.ndarray:
+    return np.array(val.split(' '), dtype=np.float64) if val else np.zeros(0, dtype=np.float64)
+
+
+@record_history(enabled=False)
+def _parse_ints(val: str) -> np.ndarray:
+    return np.array(val.split(' '), dtype=np.int64) if val else np.zeros(0, dtype=np.int64)
+
+
+@record_history(enabled=False)
+def _parse_model_str(model_str: str) -> Tuple[dict, list]:
+    """Parse LightGBM text model format.
+
+    Args:
+        model_str: model dump (lgb.Booster.model_to_string).
+
+    Returns:
+        Tuple (header key-values, list of tree key-values).
+
+    """
+    start, end = model_str.index('\nTree='), model_str.index('\nend of trees')
+    header = dict(x.split('=', 1) for x in model_str[:start].split('\n') if '=' in x)
+    trees = []
+    for tree in model_str[start:end].split('\nTree=')[1:]:
+        trees.append(dict(x.split('=', 1) for x in tree.strip('\n').split('\n')[1:] if '=' in x))
+
+    return header, trees
+
+
+@record_history(enabled=False)
+class CompiledTreeEnsemble:
+    """Tree ensemble exported from LightGBM models to flat numpy arrays.
+
+    All trees of all models are stored as single set of node arrays and evaluated
+    for the whole batch level by level, so there is no per model call overhead and no input conversion.
+    Works without LightGBM installed, arrays can be saved with .save and loaded with .load.
+
+    Limitations:
+
+        - only numerical splits (BoostLGBM doesn't use lightgbm categorical features).
+        - no linear trees.
+
+    """
+
+    _arrays = ('feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value', 'roots', 'columns')
+
+    @property
+    def n_models(self) -> int:
+        """Number of models in ensemble."""
+        return len(self.objectives)
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 default_left: np.ndarray, missing_type: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 columns: np.ndarray, n_outputs: int, objectives: Sequence[str]):
+        """
+
+        Args:
+            feature: feature index of node, -1 for leaves.
+            threshold: split threshold of node.
+            left: index of left child. Leaves point to itself.
+            right: index of right child. Leaves point to itself.
+            default_left: direction of missing values.
+            missing_type: lightgbm missing type - 0 for None, 1 for Zero, 2 for NaN.
+            value: leaf values.
+            roots: index of root node of every tree.
+            columns: output column of every tree - model index * n_outputs + class index.
+            n_outputs: number of outputs of single model.
+            objectives: objective string of every model.
+
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.value = value
+        self.roots = roots
+        self.columns = columns
+        self.n_outputs = n_outputs
+        self.objectives = list(objectives)
+
+    @classmethod
+    def from_model_strings(cls, model_strs: Sequence[str]) -> 'CompiledTreeEnsemble':
+        """Create ensemble from LightGBM text models.
+
+        Args:
+            model_strs: model dumps.
+
+        Returns:
+            ensemble.
+
+        """
+        nodes = {x: [] for x in ('feature', 'threshold', 'left', 'right', 'default_left', 'missing_type', 'value')}
+        roots, columns, objectives = [], [], []
+        n_outputs = None
+        offset = 0
+
+        for n_model, model_str in enumerate(model_strs):
+            header, trees = _parse_model_str(model_str)
+            n_trees_per_iter = int(header['num_tree_per_iteration'])
+            assert n_outputs is None or n_outputs == n_trees_per_iter, 'All models should have same number of outputs'
+            n_outputs = n_trees_per_iter
+            objectives.append(header.get('objective', 'custom'))
+
+            for n_tree, tree in enumerate(trees):
+                assert tree.get('is_linear', '0') == '0', 'Linear trees are not supported'
+                assert int(tree.get('num_cat', '0')) == 0, 'Categorical splits are not supported'
+
+                n_leaves = int(tree['num_leaves'])
+                n_inner = n_leaves - 1
+                leaf_ids = offset + n_inner + np.arange(n_leaves)
+
+                # negative child means leaf with index ~child
+                left, right = _parse_ints(tree['left_child']), _parse_ints(tree['right_child'])
+                left = np.where(left >= 0, offset + left, offset + n_inner + ~left)
+                right = np.where(right >= 0, offset + right, offset + n_inner + ~right)
+                decision_type = _parse_ints(tree['decision_type'])
+
+                nodes['feature'].extend([_parse_ints(tree['split_feature']), np.full(n_leaves, -1)])
+                nodes['threshold'].extend([_parse_floats(tree['threshold']), np.zeros(n_leaves)])
+                nodes['left'].extend([left, leaf_ids])
+                nodes['right'].extend([right, leaf_ids])
+                nodes['default_left'].extend([(decision_type >> 1) & 1, np.zeros(n_leaves, dtype=np.int64)])
+                nodes['missing_type'].extend([(decision_type >> 2) & 3, np.zeros(n_leaves, dtype=np.int64)])
+                nodes['value'].extend([np.zeros(n_inner), _parse_floats(tree['leaf_value'])])
+
+                roots.append(offset)
+                columns.append(n_model * n_outputs + n_tree % n_outputs)
+                offset += n_inner + n_leaves
+
+        return cls(feature=np.concatenate(nodes['feature']).astype(np.int32),
+                   threshold=np.concatenate(nodes['threshold']),
+                   left=np.concatenate(nodes['left']).astype(np.int32),
+                   right=np.concatenate(nodes['right']).astype(np.int32),
+                   default_left=np.concatenate(nodes['default_left']).astype(bool),
+                   missing_type=np.concatenate(nodes['missing_type']).astype(np.int8),
+                   value=np.concatenate(nodes['value']),
+                   roots=np.array(roots, dtype=np.int32),
+                   columns=np.array(columns, dtype=np.int32),
+                   n_outputs=n_outputs, objectives=objectives)
+
+    @classmethod
+    def from_boosters(cls, models: Sequence[Any]) -> 'CompiledTreeEnsemble':
+        """Create ensemble from fitted LightGBM boosters. Only best iteration trees are used.
+
+        Args:
+            models: lgb.Booster objects.
+
+        Returns:
+            ensemble.
+
+        """
+        return cls.from_model_strings([x.model_to_string() for x in models])
+
+    def _leaves(self, data: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        """Find leaf of every row in every tree.
+
+        Args:
+            data: 2d features array.
+            roots: root nodes of trees.
+
+        Returns:
+            array (n_rows, n_trees) of leaf nodes.
+
+        """
+        rows = np.arange(data.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(roots, (data.shape[0], roots.shape[0])).copy()
+        active = self.feature[nodes] >= 0
+
+        while active.any():
+            r, c = np.nonzero(active)
+            curr = nodes[r, c]
+            val = data[rows[r, 0], self.feature[curr]]
+            missing_type = self.missing_type[curr]
+            nan = np.isnan(val)
+            # nan is treated as zero if missing type is not nan
+            val = np.where(nan & (missing_type != 2), 0, val)
+            is_missing = ((missing_type == 1) & (np.abs(val) <= _ZERO_THRESHOLD)) | ((missing_type == 2) & nan)
+            go_left = np.where(is_missing, self.default_left[curr], val <= self.threshold[curr])
+
+            curr = np.where(go_left, self.left[curr], self.right[curr])
+            nodes[r, c] = curr
+            active[r, c] = self.feature[curr] >= 0
+
+        return nodes
+
+    def predict_raw(self, data: np.ndarray, batch_size: int = 10000, trees_block: int = 512) -> np.ndarray:
+        """Raw scores of every model.
+
+        Args:
+            data: 2d features array.
+            batch_size: number of rows processed at once.
+            trees_block: number of trees processed at once.
+
+        Returns:
+            array (n_rows, n_models, n_outputs).
+
+        """
+        data = np.asarray(data)
+        n_cols = self.n_models * self.n_outputs
+        res = np.zeros((data.shape[0], n_cols), dtype=np.float64)
+
+        for start in range(0, data.shape[0], batch_size):
+            batch = data[start: start + batch_size]
+            for t in range(0, self.roots.shape[0], trees_block):
+                roots = self.roots[t: t + trees_block]
+                # sum leaves values of every tree to its output column
+                mapping = np.zeros((roots.shape[0], n_cols), dtype=np.float64)
+                mapping[np.arange(roots.shape[0]), self.columns[t: t + trees_block]] = 1
+                res[start: start + batch_size] += self.value[self._leaves(batch, roots)].dot(mapping)
+
+        return res.reshape((data.shape[0], self.n_models, self.n_outputs))
+
+    @staticmethod
+    def _transform(raw: np.ndarray, objective: str) -> np.ndarray:
+        """Apply objective link function like lightgbm does in predict.
+
+        Args:
+            raw: raw scores (n_rows, n_outputs).
+            objective: objective string from model dump.
+
+        Returns:
+            transformed scores.
+
+        """
+        name, *params = objective.split(' ')
+        params = dict(x.split(':', 1) for x in params if ':' in x)
+
+        if name in ('binary', 'multiclassova', 'multiclass_ova', 'ova', 'ovr'):
+            return 1 / (1 + np.exp(-float(params.get('sigmoid', 1)) * raw))
+
+        if name in ('cross_entropy', 'xentropy'):
+            return 1 / (1 + np.exp(-raw))
+
+        if name in ('multiclass', 'softmax'):
+            exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+
+        if name in ('poisson', 'gamma', 'tweedie'):
+            return np.exp(raw)
+
+        return raw
+
+    def predict_per_model(self, data: np.ndarray, raw_score: bool = False) -> np.ndarray:
+        """Predictions of every model, same as lgb.Booster.predict output.
+
+        Args:
+            data: 2d features array.
+            raw_score: return raw scores without link function.
+
+        Returns:
+            array (n_rows, n_models, n_outputs).
+
+        """
+        res = self.predict_raw(data)
+        if raw_score:
+            return res
+
+        for n, objective in enumerate(self.objectives):
+            res[:, n] = self._transform(res[:, n], objective)
+
+        return res
+
+    def save(self, path: str):
+        """Save ensemble arrays to .npz file.
+
+        Args:
+            path: file path.
+
+        """
+        np.savez(path, n_outputs=self.n_outputs, objectives=np.array(self.objectives),
+                 **{x: getattr(self, x) for x in self._arrays})
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> 'CompiledTreeEnsemble':
+        """Load ensemble from .npz file.
+
+        Args:
+            path: file path.
+            mmap_mode: np.load mmap_mode.
+
+        Returns:
+            ensemble.
+
+        """
+        arrs = np.load(path, mmap_mode=mmap_mode)
+
+        return cls(n_outputs=int(arrs['n_outputs']), objectives=[str(x) for x in arrs['objectives']],
+                   **{x: arrs[x] for x in cls._arrays})
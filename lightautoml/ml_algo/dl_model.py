@@ -1,9 +1,13 @@
 """Neural net for tabular datasets."""
 
 import gc
+import inspect
 import os
 import uuid
 from copy import copy
+from functools import partial
+
+from typing import Optional
 
 import numpy as np
 import torch
@@ -11,13 +15,17 @@ from log_calls import record_history
 from torch.optim import lr_scheduler
 from transformers import AutoTokenizer
 
+from ..dataset.np_pd_dataset import NumpyDataset
 from ..ml_algo.base import TabularMLAlgo, TabularDataset
 from ..pipelines.features.text_pipeline import _model_name_by_lang
 from ..pipelines.utils import get_columns_by_role
-from ..text.nn_model import TorchUniversalModel, ContEmbedder, CatEmbedder, TextBert, UniversalDataset
+from ..text.nn_model import TorchUniversalModel, ContEmbedder, CatEmbedder, TextBert, UniversalDataset, \
+    TokenizedTextCache, LengthBucketBatchSampler
 from ..text.trainer import Trainer
 from ..text.utils import seed_everything, parse_devices, collate_dict, is_shuffle, inv_softmax, inv_sigmoid
 from ..utils.logging import get_logger
+from ..utils.parallel import get_thread_budget
+from ..validation.base import TrainValidIterator
 
 logger = get_logger(__name__)
 
@@ -31,6 +39,12 @@ class TorchModel(TabularMLAlgo):
         - bs: batch size.
         - num_workers: number of threads for multiprocessing.
         - max_length: max sequence length.
+        - pretokenize: encode every text once and reuse tokens across folds and epochs of fit
+          and across fold models of single predict call.
+        - dynamic_padding: pad pretokenized texts to the longest sequence in batch instead of ``max_length``.
+        - bucket_batches: group train texts of similar length to batches. Changes batches composition.
+        - bucket_size: number of batches in one length bucket.
+        - persistent_workers: keep dataloader workers alive between epochs.
         - opt_params: dict with optim params.
         - scheduler_params: dict with scheduler params.
         - is_snap: use snapshots.
@@ -69,6 +83,11 @@ class TorchModel(TabularMLAlgo):
         'bs': 16,
         'num_workers': 4,
         'max_length': 256,
+        'pretokenize': False,
+        'dynamic_padding': False,
+        'bucket_batches': False,
+        'bucket_size': 50,
+        'persistent_workers': False,
         'opt_params': {'lr': 1e-4, },
         'scheduler_params': {'patience': 5, 'factor': 0.5, 'verbose': True},
         'is_snap': False,
@@ -95,6 +114,20 @@ class TorchModel(TabularMLAlgo):
         'verbose': 1,
     }
 
+    _text_cache: Optional[TokenizedTextCache] = None
+
+    def _get_tokenizer(self, bert_name: str):
+        """Get tokenizer, it's loaded once and reused with tokens cache."""
+        cache = self._text_cache
+        if cache is not None and getattr(cache.tokenizer, 'name_or_path', None) == bert_name:
+            return cache.tokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(bert_name, use_fast=False)
+        if self.params['pretokenize']:
+            self._text_cache = TokenizedTextCache(tokenizer, self.params['max_length'])
+
+        return tokenizer
+
     def _infer_params(self):
         if self.params['path_to_save'] is not None:
             self.path_to_save = os.path.relpath(self.params['path_to_save'])
@@ -149,7 +182,7 @@ class TorchModel(TabularMLAlgo):
 
         self.train_params = {
             'dataset': UniversalDataset, 'bs': params['bs'], 'num_workers': params['num_workers'],
-            'tokenizer': AutoTokenizer.from_pretrained(params['bert_name'], use_fast=False) if is_text else None,
+            'tokenizer': self._get_tokenizer(params['bert_name']) if is_text else None,
             'max_length': params['max_length']
         }
 
@@ -207,6 +240,7 @@ class TorchModel(TabularMLAlgo):
         logger.debug(f'n cont: {self.params["cont_dim"]} ')
 
         datasets = {}
+        use_cache = (self._text_cache is not None) and (self.train_params['tokenizer'] is self._text_cache.tokenizer)
         for stage, value in data_dict.items():
             data = {
                 name: value.data[cols].values for name, cols in
@@ -227,17 +261,69 @@ class TorchModel(TabularMLAlgo):
                     len(value.data)),
                 tokenizer=self.train_params['tokenizer'],
                 max_length=self.train_params['max_length'],
-                stage=stage
+                stage=stage,
+                tokens=self._text_cache.pack(data['text'][:, 0]) if use_cache and 'text' in data else None,
+                pad_token_id=self._text_cache.pad_token_id if use_cache else 0,
+                dynamic_padding=self.params['dynamic_padding']
             )
 
-        dataloaders = {stage: torch.utils.data.DataLoader(datasets[stage],
-                                                          batch_size=self.train_params['bs'],
-                                                          shuffle=is_shuffle(stage),
-                                                          num_workers=self.train_params['num_workers'],
-                                                          collate_fn=collate_dict,
-                                                          pin_memory=False) for stage, value in data_dict.items()}
+        # loader processes share threads budget with training
+        num_workers = min(self.train_params['num_workers'], get_thread_budget())
+        loader_params = {'num_workers': num_workers, 'pin_memory': False,
+                         'collate_fn': partial(collate_dict, pad_token_id=self._text_cache.pad_token_id)
+                         if use_cache else collate_dict}
+        # persistent_workers is available since torch 1.7
+        if self.params['persistent_workers'] and num_workers > 0 and \
+                'persistent_workers' in inspect.signature(torch.utils.data.DataLoader.__init__).parameters:
+            loader_params['persistent_workers'] = True
+
+        dataloaders = {}
+        for stage, dataset in datasets.items():
+            if self.params['bucket_batches'] and is_shuffle(stage) and dataset.lengths is not None:
+                sampler = LengthBucketBatchSampler(dataset.lengths, self.train_params['bs'], shuffle=True,
+                                                   bucket_size=self.params['bucket_size'],
+                                                   random_state=self.params['random_state'])
+                dataloaders[stage] = torch.utils.data.DataLoader(dataset, batch_sampler=sampler, **loader_params)
+            else:
+                dataloaders[stage] = torch.utils.data.DataLoader(dataset, batch_size=self.train_params['bs'],
+                                                                 shuffle=is_shuffle(stage), **loader_params)
+
         return dataloaders
 
+    def fit_predict(self, train_valid_iterator: TrainValidIterator) -> NumpyDataset:
+        """Fit and then predict according the strategy that uses train_valid_iterator.
+
+        If ``pretokenize``, texts are tokenized once for all folds, tokens cache is dropped after fit.
+
+        Args:
+            train_valid_iterator: Classic cv-iterator.
+
+        Returns:
+            Dataset with predicted values.
+
+        """
+        try:
+            return super().fit_predict(train_valid_iterator)
+        finally:
+            self._text_cache = None
+
+    def predict(self, dataset: TabularDataset) -> NumpyDataset:
+        """Mean prediction for all fitted models.
+
+        If ``pretokenize``, texts are tokenized once for all fold models, tokens cache is dropped after predict.
+
+        Args:
+            dataset: Dataset used for prediction.
+
+        Returns:
+            Dataset with predicted values.
+
+        """
+        try:
+            return super().predict(dataset)
+        finally:
+            self._text_cache = None
+
     def fit_predict_single_fold(self, train, valid):
         """Implements training and prediction on single fold.
 
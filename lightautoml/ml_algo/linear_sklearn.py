@@ -1,16 +1,18 @@
 """Linear models for tabular datasets."""
 
-from copy import copy, deepcopy
+from copy import copy
 from typing import Tuple, Union, Sequence
 
 import numpy as np
 from log_calls import record_history
+from scipy import sparse
+from sklearn.base import clone
 from sklearn.linear_model import LogisticRegression, ElasticNet, Lasso
 
 from .base import TabularMLAlgo, TabularDataset
 from .torch_based.linear_model import TorchBasedLinearEstimator, TorchBasedLinearRegression, \
-    TorchBasedLogisticRegression
-from ..dataset.np_pd_dataset import PandasDataset
+    TorchBasedLogisticRegression, PreparedDataCache
+from ..dataset.np_pd_dataset import NumpyDataset, PandasDataset
 from ..utils.logging import get_logger
 from ..validation.base import TrainValidIterator
 
@@ -29,6 +31,8 @@ class LinearLBFGS(TabularMLAlgo):
         - max_iter: maximum iterations of L-BFGS.
         - tol: the tolerance for the stopping criteria.
         - early_stopping: maximum rounds without improving.
+        - batch_size: if defined, model is trained on mini-batches of rows (Adam) instead of full-batch L-BFGS.
+          Only current batch is converted to tensor, so it's useful for wide sparse or large data.
 
     freeze_defaults:
         - ``True`` :  params may be rewrited depending on dataset.
@@ -45,7 +49,8 @@ class LinearLBFGS(TabularMLAlgo):
         'max_iter': 100,
         'cs': [1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 1e-1, 5e-1, 1, 5, 10,
                50, 100, 500, 1000, 5000, 10000, 50000, 100000],
-        'early_stopping': 2
+        'early_stopping': 2,
+        'batch_size': None
 
     }
 
@@ -94,13 +99,38 @@ class LinearLBFGS(TabularMLAlgo):
             valid = valid.to_numpy()
 
         model = self._infer_params()
+        # valid data is converted once for validation during fit and for prediction
+        model.cache = PreparedDataCache()
 
         model.fit(train.data, train.target, train.weights, valid.data, valid.target, valid.weights)
 
         val_pred = model.predict(valid.data)
+        model.cache = None
 
         return model, val_pred
 
+    def predict(self, dataset: TabularDataset) -> NumpyDataset:
+        """Mean prediction for all fitted models. Input data is converted to tensors once for all fold models.
+
+        Args:
+            dataset: ``NumpyDataset`` used for prediction.
+
+        Returns:
+            dataset with predicted values.
+
+        """
+        if type(dataset) is PandasDataset:
+            dataset = dataset.to_numpy()
+
+        cache = PreparedDataCache()
+        for model in self.models:
+            model.cache = cache
+        try:
+            return super().predict(dataset)
+        finally:
+            for model in self.models:
+                model.cache = None
+
     def predict_single_fold(self, model: TorchBasedLinearEstimator, dataset: TabularDataset) -> np.ndarray:
         """Implements prediction on single fold.
 
@@ -180,6 +210,39 @@ class LinearL1CD(TabularMLAlgo):
 
         return suggested_params
 
+    def _prepare_data(self, data: Union[np.ndarray, sparse.spmatrix]) -> Union[np.ndarray, sparse.spmatrix]:
+        """Convert data to the layout of solver - column-major for coordinate descent, row-major for saga.
+
+        Args:
+            data: features array.
+
+        Returns:
+            converted array.
+
+        """
+        if self.task.name == 'reg':
+            if sparse.issparse(data):
+                return data.tocsc().astype(np.float64, copy=False)
+            return np.asfortranarray(data, dtype=np.float64)
+
+        if sparse.issparse(data):
+            return data.tocsr().astype(np.float64, copy=False)
+        return np.ascontiguousarray(data, dtype=np.float64)
+
+    @staticmethod
+    def _set_c(model: LinearEstimator, c: float):
+        """Set regularization strength.
+
+        Args:
+            model: linear estimator.
+            c: inverse regularization for classification, alpha for regression.
+
+        """
+        try:
+            model.set_params(**{'C': c})
+        except ValueError:
+            model.set_params(**{'alpha': c})
+
     def _predict_w_model_type(self, model, data):
 
         if self.task.name == 'binary':
@@ -216,36 +279,36 @@ class LinearL1CD(TabularMLAlgo):
         train_target, train_weight = self.task.losses['sklearn'].fw_func(train.target, train.weights)
         valid_target, valid_weight = self.task.losses['sklearn'].fw_func(valid.target, valid.weights)
 
-        model = deepcopy(_model)
+        # convert once to solver layout, so fits along the path do not copy the data
+        train_data = self._prepare_data(train.data)
+        valid_data = self._prepare_data(valid.data)
 
         best_score = -np.inf
-        best_pred = None
         best_model = None
+        best_path_point = None
+        # fallback if no path point is scored, ex. metric is NaN everywhere
+        last_model = None
+        last_path_point = None
 
         metric = self.task.losses['sklearn'].metric_func
 
         for l1_ratio in sorted(l1_ratios, reverse=True):
 
+            # every path starts from scratch and then each C is warm started from the previous solution
+            model = clone(_model)
             try:
                 model.set_params(**{'l1_ratio': l1_ratio})
             except ValueError:
                 pass
 
-            model = deepcopy(_model)
-
             c_best_score = -np.inf
-            c_best_pred = None
-            c_best_model = None
+            c_best_path_point = None
             es = 0
 
             for n, c in enumerate(cs):
 
-                try:
-                    model.set_params(**{'C': c})
-                except ValueError:
-                    model.set_params(**{'alpha': c})
-
-                model.fit(train.data, train_target, train_weight)
+                self._set_c(model, c)
+                model.fit(train_data, train_target, train_weight)
 
                 if np.allclose(model.coef_, 0):
                     if n == (len(cs) - 1):
@@ -254,17 +317,18 @@ class LinearL1CD(TabularMLAlgo):
                         logger.debug('C = {0} all model coefs are 0'.format(c))
                         continue
 
-                pred = self._predict_w_model_type(model, valid.data)
+                pred = self._predict_w_model_type(model, valid_data)
                 score = metric(valid_target, pred, valid_weight)
+                last_model, last_path_point = model, (c, copy(model.coef_), copy(model.intercept_), pred)
 
                 logger.debug('C = {0}, l1_ratio = {1}, score = {2}'.format(c, 1, score))
 
                 # TODO: check about greater and equal
                 if score >= c_best_score:
                     c_best_score = score
-                    c_best_pred = deepcopy(pred)
+                    # only coefficients are saved, model continues the path from current solution
+                    c_best_path_point = (c, copy(model.coef_), copy(model.intercept_), pred)
                     es = 0
-                    c_best_model = deepcopy(model)
                 else:
                     es += 1
 
@@ -281,15 +345,24 @@ class LinearL1CD(TabularMLAlgo):
                     logger.debug('All coefs are nonzero')
                     break
 
-            if c_best_score >= best_score:
+            if c_best_path_point is not None and c_best_score >= best_score:
                 best_score = c_best_score
-                best_pred = deepcopy(c_best_pred)
-                best_model = deepcopy(c_best_model)
+                best_model = model
+                best_path_point = c_best_path_point
 
             if self.timer.time_limit_exceeded():
                 logger.info('Time limit exceeded')
                 break
 
+        if best_path_point is None:
+            assert last_path_point is not None, 'No model of {0} is fitted on the regularization path'.format(self._name)
+            logger.warning('Score of {0} is NaN for every point of the regularization path, '
+                           'the last fitted model is used'.format(self._name))
+            best_model, best_path_point = last_model, last_path_point
+
+        c, best_model.coef_, best_model.intercept_, best_pred = best_path_point
+        self._set_c(best_model, c)
+
         val_pred = self.task.losses['sklearn'].bw_func(best_pred)
 
         return best_model, val_pred
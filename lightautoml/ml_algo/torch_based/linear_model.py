@@ -1,7 +1,8 @@
 """Linear models based on Torch library."""
 
-from copy import deepcopy
-from typing import Sequence, Callable, Optional, Union
+import weakref
+from collections import OrderedDict
+from typing import Sequence, Callable, Optional, Union, Any, Tuple
 
 import numpy as np
 import torch
@@ -37,6 +38,50 @@ def convert_scipy_sparse_to_torch_float(matrix: sparse.spmatrix) -> torch.Tensor
     return sparse_tensor
 
 
+@record_history(enabled=False)
+class PreparedDataCache:
+    """Cache of input arrays converted to model tensors.
+
+    Keyed by identity of source array, so the same data passed to several fold models
+    or to fit and predict of one model is converted once.
+    """
+
+    def __init__(self, max_size: int = 4):
+        """
+
+        Args:
+            max_size: maximum number of cached arrays.
+
+        """
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, data: Any, func: Callable[[Any], Any]) -> Any:
+        """Get converted data from cache or convert it.
+
+        Args:
+            data: source array.
+            func: conversion function.
+
+        Returns:
+            converted data.
+
+        """
+        key = id(data)
+        item = self._items.get(key)
+        # id may be reused by new object after source is deleted, so weak reference is checked
+        if item is not None and item[0]() is data:
+            self._items.move_to_end(key)
+            return item[1]
+
+        res = func(data)
+        self._items[key] = (weakref.ref(data), res)
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+        return res
+
+
 @record_history(enabled=False)
 class CatLinear(nn.Module):
     """Simple linear model to handle numeric and categorical features."""
@@ -74,7 +119,10 @@ class CatLinear(nn.Module):
         x = self.bias
 
         if self.linear is not None:
-            x = x + self.linear(numbers)
+            if numbers.is_sparse:
+                x = x + torch.sparse.mm(numbers, self.linear.weight.t())
+            else:
+                x = x + self.linear(numbers)
 
         if self.cat_params is not None:
             x = x + self.cat_params[categories + self.embed_idx].sum(dim=1)
@@ -139,7 +187,8 @@ class TorchBasedLinearEstimator:
     def __init__(self, data_size: int, categorical_idx: Sequence[int] = (), embed_sizes: Sequence[int] = (), output_size: int = 1,
                  cs: Sequence[float] = (.00001, .00005, .0001, .0005, .001, .005, .01, .05, .1, .5, 1., 2., 5., 7., 10., 20.),
                  max_iter: int = 1000, tol: float = 1e-5, early_stopping: int = 2,
-                 loss=Optional[Callable], metric=Optional[Callable]):
+                 loss=Optional[Callable], metric=Optional[Callable], batch_size: Optional[int] = None,
+                 n_epochs: int = 10, lr: float = 1e-2):
         """
         Args:
             data_size: not used.
@@ -152,6 +201,10 @@ class TorchBasedLinearEstimator:
             early_stopping: maximum rounds without improving.
             loss: loss function. Format: loss(preds, true) -> loss_arr, assume reduction='none'.
             metric: metric function. Format: metric(y_true, y_preds, sample_weight = None) -> float (greater_is_better).
+            batch_size: if defined, model is trained by Adam on mini-batches of rows, that are converted
+              to tensors one by one, instead of full-batch L-BFGS. Use for data, that doesn't fit as single tensor.
+            n_epochs: maximum number of epochs of mini-batch training.
+            lr: learning rate of mini-batch training.
 
         """
         self.data_size = data_size
@@ -167,17 +220,34 @@ class TorchBasedLinearEstimator:
         self.early_stopping = early_stopping
         self.loss = loss  # loss(preds, true) -> loss_arr, assume reduction='none'
         self.metric = metric  # metric(y_true, y_preds, sample_weight = None) -> float (greater_is_better)
-
-    def _prepare_data(self, data: ArrayOrSparseMatrix):
+        self.batch_size = batch_size
+        self.n_epochs = n_epochs
+        self.lr = lr
+        # indices of numeric features, computed on first use
+        self._numeric_idx = None
+        # conversion cache, set by owner algo and never saved with the model
+        self.cache: Optional[PreparedDataCache] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+
+    def _prepare_data(self, data: ArrayOrSparseMatrix, use_cache: bool = True
+                      ) -> Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
         """Prepare data based on input type.
 
         Args:
             data: data to prepare.
+            use_cache: get converted data from cache if it's set.
 
         Returns:
             Tuple (numeric_features, cat_features).
 
         """
+        if use_cache and self.cache is not None:
+            return self.cache.get(data, lambda x: self._prepare_data(x, use_cache=False))
+
         if sparse.issparse(data):
             return self._prepare_data_sparse(data)
 
@@ -212,12 +282,15 @@ class TorchBasedLinearEstimator:
 
         """
         if 0 < len(self.categorical_idx) < data.shape[1]:
+            if self._numeric_idx is None:
+                self._numeric_idx = np.setdiff1d(np.arange(data.shape[1]), self.categorical_idx)
             data_cat = torch.from_numpy(data[:, self.categorical_idx].astype(np.int64))
-            data = torch.from_numpy(data[:, np.setdiff1d(np.arange(data.shape[1]), self.categorical_idx)])
+            # column selection is already a contiguous copy, so only dtype is converted if needed
+            data = torch.from_numpy(data[:, self._numeric_idx].astype(np.float32, copy=False))
             return data, data_cat
 
         elif len(self.categorical_idx) == 0:
-            data = torch.from_numpy(data)
+            data = torch.from_numpy(np.ascontiguousarray(data, dtype=np.float32))
             return data, None
 
         else:
@@ -261,7 +334,45 @@ class TorchBasedLinearEstimator:
 
         opt.step(closure)
 
-    def _loss_fn(self, y_true: torch.Tensor, y_pred: torch.Tensor, weights: Optional[torch.Tensor], c: float) -> torch.Tensor:
+    def _optimize_batches(self, data: ArrayOrSparseMatrix, y: torch.Tensor, weights: Optional[torch.Tensor] = None,
+                          c: float = 1):
+        """Optimize single model by mini-batches. Only current batch is converted to tensor.
+
+        Args:
+            data: numeric data to train.
+            y: target values.
+            weights: item weights.
+            c: regularization coefficient.
+
+        """
+        self.model.train()
+        opt = optim.Adam(self.model.parameters(), lr=self.lr)
+        n = y.shape[0] if weights is None else weights.sum()
+        rng = np.random.RandomState(42)
+        prev_loss = None
+
+        for epoch in range(self.n_epochs):
+            perm = rng.permutation(y.shape[0])
+            epoch_loss = 0
+
+            for start in range(0, y.shape[0], self.batch_size):
+                idx = np.sort(perm[start: start + self.batch_size])
+                data_batch, data_cat_batch = self._prepare_data(data[idx], use_cache=False)
+                t_idx = torch.from_numpy(idx)
+                weights_batch = None if weights is None else weights[t_idx]
+
+                opt.zero_grad()
+                loss = self._loss_fn(y[t_idx], self.model(data_batch, data_cat_batch), weights_batch, c, n)
+                loss.backward()
+                opt.step()
+                epoch_loss += loss.item() * idx.shape[0] / y.shape[0]
+
+            if prev_loss is not None and abs(prev_loss - epoch_loss) <= self.tol * max(abs(prev_loss), 1):
+                break
+            prev_loss = epoch_loss
+
+    def _loss_fn(self, y_true: torch.Tensor, y_pred: torch.Tensor, weights: Optional[torch.Tensor], c: float,
+                 n: Optional[float] = None) -> torch.Tensor:
         """Weighted loss_fn wrapper.
 
         Args:
@@ -269,6 +380,7 @@ class TorchBasedLinearEstimator:
             y_pred: predicted target values.
             weights: item weights.
             c: regulariation coefficients.
+            n: total weight of train data. If ``None`` - inferred from batch.
 
         Returns:
             loss+regularization value.
@@ -276,9 +388,10 @@ class TorchBasedLinearEstimator:
         # weighted loss
         loss = self.loss(y_true, y_pred, sample_weight=weights)
 
-        n = y_true.shape[0]
-        if weights is not None:
-            n = weights.sum()
+        if n is None:
+            n = y_true.shape[0]
+            if weights is not None:
+                n = weights.sum()
 
         all_params = torch.cat([y.view(-1) for (x, y) in self.model.named_parameters() if x != 'bias'])
 
@@ -303,34 +416,56 @@ class TorchBasedLinearEstimator:
 
         """
         assert self.model is not None, 'Model should be defined'
-        data, data_cat = self._prepare_data(data)
+        mini_batch = self.batch_size is not None and data.shape[0] > self.batch_size
+        data_cat = None
+        if not mini_batch:
+            data, data_cat = self._prepare_data(data)
+        elif sparse.issparse(data):
+            # rows slicing
+            data = data.tocsr()
         if len(y.shape) == 1:
             y = y[:, np.newaxis]
         y = torch.from_numpy(y.astype(np.float32))
         if weights is not None:
             weights = torch.from_numpy(weights.astype(np.float32))
 
+        def optimize(c: float):
+            if mini_batch:
+                self._optimize_batches(data, y, weights, c)
+            else:
+                self._optimize(data, data_cat, y, weights, c)
+
         if data_val is None and y_val is None:
             logger.warning('Validation data should be defined. No validation will be performed and C = 1 will be used')
-            self._optimize(data, data_cat, y, weights, 1.)
+            optimize(1.)
 
             return self
 
-        data_val, data_val_cat = self._prepare_data(data_val)
+        data_val_cat = None
+        val_in_batches = self.batch_size is not None and data_val.shape[0] > self.batch_size
+        if not val_in_batches:
+            data_val, data_val_cat = self._prepare_data(data_val)
+
+        def predict_val() -> np.ndarray:
+            if val_in_batches:
+                return self._predict_raw(data_val)
+            return self._score(data_val, data_val_cat)
 
         best_score = -np.inf
-        best_model = None
+        best_state = None
         es = 0
 
+        # model is warm started from the solution for previous C
         for c in self.cs:
-            self._optimize(data, data_cat, y, weights, c)
+            optimize(c)
 
-            val_pred = self._score(data_val, data_val_cat)
+            val_pred = predict_val()
             score = self.metric(y_val, val_pred, weights_val)
             logger.info('Linear model: C = {0} score = {1}'.format(c, score))
             if score > best_score:
                 best_score = score
-                best_model = deepcopy(self.model)
+                # only parameters are copied, not the whole module
+                best_state = {k: v.clone() for (k, v) in self.model.state_dict().items()}
                 es = 0
             else:
                 es += 1
@@ -338,7 +473,8 @@ class TorchBasedLinearEstimator:
             if es >= self.early_stopping:
                 break
 
-        self.model = best_model
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
 
         return self
 
@@ -359,6 +495,25 @@ class TorchBasedLinearEstimator:
 
         return preds
 
+    def _predict_raw(self, data: ArrayOrSparseMatrix) -> np.ndarray:
+        """Get model output, by batches if batch_size is defined.
+
+        Args:
+            data: data to predict.
+
+        Returns:
+            model output.
+
+        """
+        if self.batch_size is None or data.shape[0] <= self.batch_size:
+            return self._score(*self._prepare_data(data))
+
+        if sparse.issparse(data):
+            data = data.tocsr()
+
+        return np.concatenate([self._score(*self._prepare_data(data[start: start + self.batch_size], use_cache=False))
+                               for start in range(0, data.shape[0], self.batch_size)], axis=0)
+
     def predict(self, data: np.ndarray) -> np.ndarray:
         """Inference phase.
 
@@ -369,9 +524,7 @@ class TorchBasedLinearEstimator:
             predicted target values.
 
         """
-        data, data_cat = self._prepare_data(data)
-
-        return self._score(data, data_cat)
+        return self._predict_raw(data)
 
 
 @record_history(enabled=False)
@@ -381,7 +534,8 @@ class TorchBasedLogisticRegression(TorchBasedLinearEstimator):
     def __init__(self, data_size: int, categorical_idx: Sequence[int] = (), embed_sizes: Sequence[int] = (), output_size: int = 1,
                  cs: Sequence[float] = (.00001, .00005, .0001, .0005, .001, .005, .01, .05, .1, .5, 1., 2., 5., 7., 10., 20.),
                  max_iter: int = 1000, tol: float = 1e-4, early_stopping: int = 2,
-                 loss=Optional[Callable], metric=Optional[Callable]):
+                 loss=Optional[Callable], metric=Optional[Callable], batch_size: Optional[int] = None,
+                 n_epochs: int = 10, lr: float = 1e-2):
         """
         Args:
             data_size: not used.
@@ -394,6 +548,10 @@ class TorchBasedLogisticRegression(TorchBasedLinearEstimator):
             early_stopping: maximum rounds without improving.
             loss: loss function. Format: loss(preds, true) -> loss_arr, assume reduction='none'.
             metric: metric function. Format: metric(y_true, y_preds, sample_weight = None) -> float (greater_is_better).
+            batch_size: if defined, model is trained by Adam on mini-batches of rows, that are converted
+              to tensors one by one, instead of full-batch L-BFGS. Use for data, that doesn't fit as single tensor.
+            n_epochs: maximum number of epochs of mini-batch training.
+            lr: learning rate of mini-batch training.
 
         """
         if output_size == 1:
@@ -408,7 +566,8 @@ class TorchBasedLogisticRegression(TorchBasedLinearEstimator):
         if loss is None:
             loss = TorchLossWrapper(_loss)
 
-        super().__init__(data_size, categorical_idx, embed_sizes, output_size, cs, max_iter, tol, early_stopping, loss, metric)
+        super().__init__(data_size, categorical_idx, embed_sizes, output_size, cs, max_iter, tol, early_stopping, loss, metric,
+                         batch_size, n_epochs, lr)
         self.model = _model(self.data_size - len(self.categorical_idx), self.embed_sizes, self.output_size)
 
     def predict(self, data: np.ndarray) -> np.ndarray:
@@ -434,7 +593,8 @@ class TorchBasedLinearRegression(TorchBasedLinearEstimator):
     def __init__(self, data_size: int, categorical_idx: Sequence[int] = (), embed_sizes: Sequence[int] = (), output_size: int = 1,
                  cs: Sequence[float] = (.00001, .00005, .0001, .0005, .001, .005, .01, .05, .1, .5, 1., 2., 5., 7., 10., 20.),
                  max_iter: int = 1000, tol: float = 1e-4, early_stopping: int = 2,
-                 loss=Optional[Callable], metric=Optional[Callable]):
+                 loss=Optional[Callable], metric=Optional[Callable], batch_size: Optional[int] = None,
+                 n_epochs: int = 10, lr: float = 1e-2):
         """
         Args:
             data_size: used only for super function.
@@ -447,11 +607,16 @@ class TorchBasedLinearRegression(TorchBasedLinearEstimator):
             early_stopping: maximum rounds without improving.
             loss: loss function. Format: loss(preds, true) -> loss_arr, assume reduction='none'.
             metric: metric function. Format: metric(y_true, y_preds, sample_weight = None) -> float (greater_is_better).
+            batch_size: if defined, model is trained by Adam on mini-batches of rows, that are converted
+              to tensors one by one, instead of full-batch L-BFGS. Use for data, that doesn't fit as single tensor.
+            n_epochs: maximum number of epochs of mini-batch training.
+            lr: learning rate of mini-batch training.
 
         """
         if loss is None:
             loss = TorchLossWrapper(nn.MSELoss)
-        super().__init__(data_size, categorical_idx, embed_sizes, output_size, cs, max_iter, tol, early_stopping, loss, metric)
+        super().__init__(data_size, categorical_idx, embed_sizes, output_size, cs, max_iter, tol, early_stopping, loss, metric,
+                         batch_size, n_epochs, lr)
         self.model = CatRegression(self.data_size - len(self.categorical_idx), self.embed_sizes, self.output_size)
 
     def predict(self, data: np.ndarray) -> np.ndarray:
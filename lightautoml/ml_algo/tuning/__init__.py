@@ -1,3 +1,3 @@
 """Bunch of classes for hyperparameters tuning."""
 
-__all__ = ['base', 'optuna']
+__all__ = ['base', 'optuna', 'halving']
@@ -0,0 +1,207 @@
+"""Multi-fidelity hyperparameter tuning with successive halving on row subsamples."""
+
+from copy import deepcopy
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+import optuna
+from log_calls import record_history
+
+from lightautoml.dataset.base import LAMLDataset
+from lightautoml.ml_algo.tuning.optuna import OptunaTuner, TunableAlgo
+from lightautoml.utils.logging import get_logger
+from lightautoml.validation.base import TrainValidIterator, HoldoutIterator
+
+logger = get_logger(__name__)
+
+
+@record_history(enabled=False)
+def stratified_subsample(dataset: LAMLDataset, size: int, random_state: int = 42) -> LAMLDataset:
+    """Get random subsample of dataset rows, stratified by target for classification tasks.
+
+    Args:
+        dataset: dataset to sample.
+        size: number of rows.
+        random_state: random seed.
+
+    Returns:
+        subsample of dataset.
+
+    """
+    n_rows = dataset.shape[0]
+    if size >= n_rows:
+        return dataset
+
+    rng = np.random.RandomState(random_state)
+    if dataset.task.name in ('binary', 'multiclass'):
+        target = np.asarray(dataset.target)
+        idx = []
+        for cl in np.unique(target):
+            cl_idx = np.nonzero(target == cl)[0]
+            # at least one row of every class
+            n = max(1, int(round(size * cl_idx.shape[0] / n_rows)))
+            idx.append(rng.choice(cl_idx, n, replace=False))
+        idx = np.sort(np.concatenate(idx))
+    else:
+        idx = np.sort(rng.choice(n_rows, size, replace=False))
+
+    return dataset[idx]
+
+
+@record_history(enabled=False)
+class SuccessiveHalvingTuner(OptunaTuner):
+    """Multi-fidelity tuner.
+
+    Candidates are sampled by optuna sampler and evaluated on small subsample of train rows first.
+    Only the best ``1 / eta`` part of candidates is promoted to the next rung with ``eta`` times more rows,
+    the last rung uses full data. Time budget is divided equally between rungs.
+
+    """
+
+    _name: str = 'SuccessiveHalvingTuner'
+
+    def __init__(
+            self, timeout: Optional[int] = 1000, n_trials: Optional[int] = 100, direction: Optional[str] = 'maximize',
+            fit_on_holdout: bool = True, random_state: int = 42, eta: int = 3, min_rows: int = 10000
+    ):
+        """
+
+        Args:
+            timeout: maximum learning time.
+            n_trials: maximum number of candidates on the first rung.
+            direction: direction of optimization. Set ``minimize`` for minimization and ``maximize`` for maximization.
+            fit_on_holdout: will be used holdout cv iterator.
+            random_state: seed for optuna sampler and subsampling.
+            eta: reduction factor of candidates between rungs.
+            min_rows: minimal number of train rows on the first rung.
+
+        """
+        super().__init__(timeout=timeout, n_trials=n_trials, direction=direction, fit_on_holdout=fit_on_holdout,
+                         random_state=random_state)
+        self.eta = eta
+        self.min_rows = min_rows
+
+    def _get_rungs_sizes(self, n_rows: int) -> List[int]:
+        """Number of train rows on every rung.
+
+        Args:
+            n_rows: size of full train data.
+
+        Returns:
+            list of sizes, the last one is full data.
+
+        """
+        sizes = [n_rows]
+        n_candidates = self.eta
+        while sizes[0] // self.eta >= self.min_rows and n_candidates < self.n_trials:
+            sizes.insert(0, sizes[0] // self.eta)
+            n_candidates *= self.eta
+
+        return sizes
+
+    def _evaluate(self, ml_algo: TunableAlgo, params: dict, train_valid: TrainValidIterator) -> float:
+        """Fit algo with params and score it.
+
+        Args:
+            ml_algo: algo to copy.
+            params: hyperparameters.
+            train_valid: holdout iterator.
+
+        Returns:
+            score.
+
+        """
+        _ml_algo = ml_algo.clone()
+        _ml_algo.params = params
+        preds = _ml_algo.fit_predict(train_valid)
+
+        return _ml_algo.score(preds)
+
+    def fit(self, ml_algo: TunableAlgo, train_valid_iterator: Optional[TrainValidIterator] = None) -> \
+            Tuple[Optional[TunableAlgo], Optional[LAMLDataset]]:
+        """Tune model.
+
+        Args:
+            ml_algo: MLAlgo that is tuned.
+            train_valid_iterator: classic cv iterator.
+
+        Returns:
+            Tuple (None, None) if an optuna exception raised or ``fit_on_holdout=True`` and ``train_valid_iterator`` is \
+            not HoldoutIterator.
+
+            Tuple (MlALgo, preds_ds) otherwise.
+
+        """
+        assert not ml_algo.is_fitted, 'Fitted algo cannot be tuned.'
+        optuna.logging.set_verbosity(logger.getEffectiveLevel())
+        estimated_tuning_time = max(ml_algo.timer.estimate_tuner_time(len(train_valid_iterator)), 1)
+        self._upd_timeout(estimated_tuning_time)
+        ml_algo = deepcopy(ml_algo)
+
+        full_iterator = train_valid_iterator
+        flg_new_iterator = False
+        if type(train_valid_iterator) != HoldoutIterator:
+            # rungs are always evaluated on holdout
+            train_valid_iterator = train_valid_iterator.convert_to_holdout_iterator()
+            flg_new_iterator = self._fit_on_holdout
+
+        train, valid = train_valid_iterator.train, train_valid_iterator.valid
+        sizes = self._get_rungs_sizes(train.shape[0])
+        rung_timeout = self.timeout / len(sizes)
+        logger.info('Successive halving may run {0} secs, rungs train sizes: {1}'.format(self.timeout, sizes))
+
+        try:
+            sampler = optuna.samplers.TPESampler(seed=self.random_state)
+            self.study = optuna.create_study(direction=self.direction, sampler=sampler)
+            sign = 1 if self.direction == 'maximize' else -1
+
+            candidates, scores = [], []
+            start = perf_counter()
+            for n_rung, size in enumerate(sizes):
+                rung_start = perf_counter()
+                ratio = size / train.shape[0]
+                rung_iterator = HoldoutIterator(
+                    stratified_subsample(train, size, self.random_state),
+                    stratified_subsample(valid, max(int(valid.shape[0] * ratio), self.min_rows), self.random_state)
+                )
+
+                if n_rung == 0:
+                    # sample candidates sequentially, so sampler learns from the first rung scores
+                    while len(candidates) < self.n_trials and perf_counter() - rung_start < rung_timeout:
+                        trial = self.study.ask()
+                        params = ml_algo.trial_params_values(estimated_n_trials=self.n_trials, trial=trial,
+                                                             train_valid_iterator=train_valid_iterator)
+                        score = self._evaluate(ml_algo, params, rung_iterator)
+                        self.study.tell(trial, score)
+                        candidates.append(params)
+                        scores.append(score)
+                else:
+                    n_promoted = max(1, int(np.ceil(len(candidates) / self.eta)))
+                    order = np.argsort(-sign * np.array(scores), kind='stable')[:n_promoted]
+                    promoted = [candidates[i] for i in order]
+                    candidates, scores = [], []
+                    for params in promoted:
+                        if len(candidates) > 0 and perf_counter() - start > self.timeout:
+                            break
+                        candidates.append(params)
+                        scores.append(self._evaluate(ml_algo, params, rung_iterator))
+
+                logger.info('Rung {0}: {1} candidates on {2} rows, best score {3}'.format(
+                    n_rung, len(candidates), size, scores[int(np.argmax(sign * np.array(scores)))]))
+
+                if len(candidates) == 1 or perf_counter() - start > self.timeout:
+                    break
+
+            self._best_params = candidates[int(np.argmax(sign * np.array(scores)))]
+            ml_algo.params = self._best_params
+
+            if flg_new_iterator:
+                # if tuner was fitted on holdout set we dont need to save train results
+                return None, None
+
+            preds_ds = ml_algo.fit_predict(full_iterator)
+
+            return ml_algo, preds_ds
+        except optuna.exceptions.OptunaError:
+            return None, None
@@ -1,15 +1,21 @@
 """"Classes to implement hyperparameter tuning using Optuna."""
 
+import hashlib
+import json
+import os
+import threading
 from abc import ABC, abstractmethod
 from copy import deepcopy
 from typing import Optional, Tuple, Callable, Union, TypeVar
 
+import numpy as np
 import optuna
 from log_calls import record_history
 
 from lightautoml.dataset.base import LAMLDataset
 from lightautoml.ml_algo.base import MLAlgo
 from lightautoml.ml_algo.tuning.base import ParamsTuner
+from lightautoml.utils.parallel import call_in_module_frame, split_thread_budget
 from lightautoml.utils.logging import get_logger
 from lightautoml.validation.base import TrainValidIterator, HoldoutIterator
 
@@ -20,10 +26,32 @@ optuna.logging.set_verbosity(optuna.logging.ERROR)
 
 TunableAlgo = TypeVar("TunableAlgo", bound=MLAlgo)
 
+# file name of tuning history storage in storage_dir
+STORAGE_NAME = 'lightautoml_tuning.db'
+
 
 @record_history(enabled=False)
 class OptunaTunableMixin(ABC):
     mean_trial_time: float = None
+    # trial, that intermediate scores are reported to during fit
+    _trial: Optional[optuna.trial.Trial] = None
+    # step of the first boosting round of current fold for intermediate scores
+    _pruning_step: int = 0
+    # report intermediate score every n rounds
+    _report_every: int = 10
+
+    def clone(self: TunableAlgo) -> TunableAlgo:
+        """Create unfitted copy of algo with the same parameters, that is not bound to tuning trial.
+
+        Returns:
+            new algo.
+
+        """
+        new_algo = super().clone()
+        new_algo._trial = None
+        new_algo._pruning_step = 0
+
+        return new_algo
 
     @abstractmethod
     def sample_params_values(self, trial: optuna.trial.Trial, suggested_params: dict, estimated_n_trials: int) -> dict:
@@ -58,13 +86,37 @@ class OptunaTunableMixin(ABC):
             suggested_params=self.init_params_on_input(train_valid_iterator)
         )
 
-    def get_objective(self: TunableAlgo, estimated_n_trials: int, train_valid_iterator: TrainValidIterator) -> \
-            Callable[[optuna.trial.Trial], Union[float, int]]:
+    def report_intermediate(self, iteration: int, value: float, higher_is_better: bool) -> bool:
+        """Report intermediate validation score of the trial.
+
+        Args:
+            iteration: boosting round of current fold.
+            value: validation metric value.
+            higher_is_better: direction of the metric.
+
+        Returns:
+            ``True`` if trial should be pruned.
+
+        """
+        if self._trial is None or iteration % self._report_every != 0:
+            return False
+
+        # metric of the model may have opposite direction to the study
+        maximize = self._trial.study.direction == optuna.study.StudyDirection.MAXIMIZE
+        self._trial.report(value if higher_is_better == maximize else -value, self._pruning_step + iteration)
+
+        return self._trial.should_prune()
+
+    def get_objective(self: TunableAlgo, estimated_n_trials: int, train_valid_iterator: TrainValidIterator,
+                      n_threads: Optional[int] = None, report_intermediate: bool = False
+                      ) -> Callable[[optuna.trial.Trial], Union[float, int]]:
         """Get objective.
 
         Args:
             estimated_n_trials: maximum number of hyperparameter estimations.
             train_valid_iterator: used for getting parameters depending on dataset.
+            n_threads: number of threads of single trial model, if ``None`` - model threads param is not changed.
+            report_intermediate: report intermediate scores during fit to prune unpromising trials.
 
         Returns:
             callable objective.
@@ -73,14 +125,19 @@ class OptunaTunableMixin(ABC):
         assert isinstance(self, MLAlgo)
 
         def objective(trial: optuna.trial.Trial) -> float:
-            _ml_algo = deepcopy(self)
+            _ml_algo = self.clone()
             _ml_algo.params = _ml_algo.trial_params_values(
                 estimated_n_trials=estimated_n_trials,
                 train_valid_iterator=train_valid_iterator,
                 trial=trial,
             )
+            if n_threads is not None:
+                _ml_algo.params = {self._threads_param: n_threads}
+            if report_intermediate:
+                _ml_algo._trial = trial
 
             output_dataset = _ml_algo.fit_predict(train_valid_iterator=train_valid_iterator)
+            _ml_algo._trial = None
 
             return _ml_algo.score(output_dataset)
 
@@ -99,7 +156,8 @@ class OptunaTuner(ParamsTuner):
     def __init__(
             # TODO: For now, metric is designed to be greater is better. Change maximize param after metric refactor if needed
             self, timeout: Optional[int] = 1000, n_trials: Optional[int] = 100, direction: Optional[str] = 'maximize',
-            fit_on_holdout: bool = True, random_state: int = 42
+            fit_on_holdout: bool = True, random_state: int = 42, n_jobs: int = 1, pruner: Optional[str] = None,
+            storage_dir: Optional[str] = None, warm_start_trials: int = 5
     ):
         """
 
@@ -109,6 +167,14 @@ class OptunaTuner(ParamsTuner):
             direction: direction of optimization. Set ``minimize`` for minimization and ``maximize`` for maximization.
             fit_on_holdout: will be used holdout cv iterator.
             random_state: seed for optuna sampler.
+            n_jobs: number of concurrent trials. Threads of the model are split between trials.
+              Used only for algos with threads param, that release GIL (ex. boosters).
+            pruner: stop unpromising trials using intermediate scores of boosting rounds.
+              ``None`` - no pruning, ``'median'`` - median pruner, ``'halving'`` - successive halving pruner.
+            storage_dir: directory of persistent tuning history (sqlite). Studies are keyed by algo, task
+              and dataset signature, new runs continue the history and re-evaluate previous best params first.
+              ``None`` - history is not stored.
+            warm_start_trials: number of previous best trials to re-evaluate first.
 
         """
 
@@ -118,6 +184,63 @@ class OptunaTuner(ParamsTuner):
         self.direction = direction
         self._fit_on_holdout = fit_on_holdout
         self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.pruner = pruner
+        self.storage_dir = storage_dir
+        self.warm_start_trials = warm_start_trials
+
+    def _get_pruner(self) -> Optional[optuna.pruners.BasePruner]:
+        """Create optuna pruner.
+
+        Returns:
+            pruner or ``None`` if pruning is disabled.
+
+        """
+        if self.pruner is None:
+            return None
+
+        if self.pruner == 'median':
+            # first rounds scores are noisy, so they are not used for pruning
+            return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=100)
+
+        if self.pruner == 'halving':
+            return optuna.pruners.SuccessiveHalvingPruner()
+
+        raise ValueError('Unknown pruner {0}'.format(self.pruner))
+
+    @staticmethod
+    def _get_study_name(ml_algo: TunableAlgo, train_valid_iterator: TrainValidIterator) -> str:
+        """Key of the study in persistent storage.
+
+        Args:
+            ml_algo: MLAlgo that is tuned.
+            train_valid_iterator: holdout or cv iterator.
+
+        Returns:
+            study name - algo name, task and dataset signature (features and order of number of rows).
+
+        """
+        train = train_valid_iterator.train
+        signature = json.dumps({'features': list(train.features), 'rows': int(np.log10(max(train.shape[0], 1)))})
+
+        return '{0}_{1}_{2}'.format(ml_algo.name, train.task.name, hashlib.md5(signature.encode()).hexdigest()[:12])
+
+    def _enqueue_previous(self):
+        """Add best completed trials of previous runs to the queue."""
+        trials = [x for x in self.study.trials if x.state == optuna.trial.TrialState.COMPLETE]
+        sign = -1 if self.direction == 'maximize' else 1
+        trials = sorted(trials, key=lambda x: sign * x.value)
+
+        enqueued = []
+        for trial in trials:
+            if len(enqueued) == self.warm_start_trials:
+                break
+            if trial.params not in enqueued:
+                self.study.enqueue_trial(trial.params)
+                enqueued.append(trial.params)
+
+        if len(enqueued) > 0:
+            logger.info('{0} best trials of previous runs are enqueued'.format(len(enqueued)))
 
     def _upd_timeout(self, timeout):
         self.timeout = min(self.timeout, timeout)
@@ -147,6 +270,8 @@ class OptunaTuner(ParamsTuner):
         logger.info('Optuna may run {0} secs'.format(estimated_tuning_time))
 
         self._upd_timeout(estimated_tuning_time)
+        # trial time is predicted by runtime cost model, copy of algo gets new timer without its history
+        trial_time = ml_algo.timer.estimate_folds_time(1)
         ml_algo = deepcopy(ml_algo)
 
         flg_new_iterator = False
@@ -154,7 +279,22 @@ class OptunaTuner(ParamsTuner):
             train_valid_iterator = train_valid_iterator.convert_to_holdout_iterator()
             flg_new_iterator = True
 
-        # TODO: Check if time estimation will be ok with multiprocessing
+        # small trials scale with threads poorly, so threads budget is split between concurrent trials
+        n_jobs, n_threads = 1, None
+        threads_param = getattr(ml_algo, '_threads_param', None)
+        if self.n_jobs > 1 and threads_param is not None:
+            n_jobs, n_threads = split_thread_budget(self.n_jobs, ml_algo.params[threads_param])
+            logger.info('Optuna runs {0} trials concurrently with {1} threads each'.format(n_jobs, n_threads))
+
+        # search space depends on number of trials, so it is planned before the first trial finishes
+        if trial_time is not None and trial_time > 0:
+            self.estimated_n_trials = int(min(self.n_trials, max(1, self.timeout // trial_time * n_jobs)))
+            logger.info('Optuna is expected to run {0} trials'.format(self.estimated_n_trials))
+
+        # running sum and count of trials durations
+        trials_time = [0., 0]
+        lock = threading.Lock()
+
         @record_history(enabled=False)
         def update_trial_time(study: optuna.study.Study, trial: optuna.trial.FrozenTrial):
             """Callback for number of iteration with time cut-off.
@@ -163,29 +303,67 @@ class OptunaTuner(ParamsTuner):
                 study: optuna study object.
                 trial: optuna trial object.
             """
-            ml_algo.mean_trial_time = study.trials_dataframe()['duration'].mean().total_seconds()
-            self.estimated_n_trials = min(self.n_trials, self.timeout // ml_algo.mean_trial_time)
+            with lock:
+                trials_time[0] += trial.duration.total_seconds()
+                trials_time[1] += 1
+                ml_algo.mean_trial_time = trials_time[0] / trials_time[1]
+            # concurrent trials finish n_jobs times more often than single trial duration
+            self.estimated_n_trials = min(self.n_trials, self.timeout // ml_algo.mean_trial_time * n_jobs)
 
         try:
 
             sampler = optuna.samplers.TPESampler(seed=self.random_state)
+            pruner = self._get_pruner()
+
+            storage, study_name = None, None
+            if self.storage_dir is not None:
+                os.makedirs(self.storage_dir, exist_ok=True)
+                storage = 'sqlite:///' + os.path.join(os.path.abspath(self.storage_dir), STORAGE_NAME)
+                study_name = self._get_study_name(ml_algo, train_valid_iterator)
+
             self.study = optuna.create_study(
                 direction=self.direction,
-                sampler=sampler
+                sampler=sampler,
+                pruner=pruner,
+                storage=storage,
+                study_name=study_name,
+                load_if_exists=True
             )
+            # trials of previous runs are the history for sampler, but are not candidates for best params
+            n_prev_trials = len(self.study.trials)
+            if n_prev_trials > 0:
+                self._enqueue_previous()
 
+            objective = ml_algo.get_objective(
+                estimated_n_trials=self.estimated_n_trials,
+                train_valid_iterator=train_valid_iterator,
+                n_threads=n_threads,
+                report_intermediate=pruner is not None
+            )
+
+            # optuna runs concurrent trials in thread pool
             self.study.optimize(
-                func=ml_algo.get_objective(
-                    estimated_n_trials=self.estimated_n_trials,
-                    train_valid_iterator=train_valid_iterator
-                ),
+                func=lambda trial: call_in_module_frame(objective, trial),
                 n_trials=self.n_trials,
                 timeout=self.timeout,
-                callbacks=[update_trial_time],
+                n_jobs=n_jobs,
+                callbacks=[lambda study, trial: call_in_module_frame(update_trial_time, study, trial)],
             )
 
             # need to update best params here
-            self._best_params = self.study.best_params
+            completed = [x.state == optuna.trial.TrialState.COMPLETE for x in self.study.trials]
+            if any(completed[n_prev_trials:]):
+                trials = [x for x, flg in zip(self.study.trials[n_prev_trials:], completed[n_prev_trials:]) if flg]
+                sign = 1 if self.direction == 'maximize' else -1
+                self._best_params = max(trials, key=lambda x: sign * x.value).params
+            elif any(completed):
+                # no trial of current run is completed in time - best params of stored history
+                logger.warning('No Optuna trial is completed, best params of previous runs are used')
+                self._best_params = self.study.best_params
+            else:
+                logger.warning('No Optuna trial is completed, default params are used')
+                self._best_params = ml_algo.init_params_on_input(train_valid_iterator)
+                return None, None
             ml_algo.params = self._best_params
 
             if flg_new_iterator:
@@ -4,7 +4,7 @@ from typing import Tuple, Optional
 
 from log_calls import record_history
 
-from .base import MLAlgo
+from .base import MLAlgo, TabularMLAlgo
 from .tuning.base import ParamsTuner
 from ..dataset.base import LAMLDataset
 from ..validation.base import TrainValidIterator
@@ -29,6 +29,9 @@ def tune_and_fit_predict(ml_algo: MLAlgo, params_tuner: ParamsTuner,
 
     timer = ml_algo.timer
     timer.start()
+    if isinstance(ml_algo, TabularMLAlgo):
+        # fold time is predicted by runtime cost model before the first fold is computed
+        ml_algo.set_timer_run_params(train_valid)
     single_fold_time = timer.estimate_folds_time(1)
 
     # if force_calc is False we check if it make sense to continue
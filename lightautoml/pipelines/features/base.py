@@ -19,6 +19,7 @@ from ...transformers.categorical import MultiClassTargetEncoder, TargetEncoder,
     OrdinalEncoder
 from ...transformers.datetime import BaseDiff, DateSeasons
 from ...transformers.numeric import QuantileBinning
+from ...utils.cache import RunCache, get_fingerprint
 
 NumpyOrPandas = Union[PandasDataset, NumpyDataset]
 
@@ -39,6 +40,7 @@ class FeaturesPipeline:
         super().__init__(**kwargs)
         self.pipes: List[Callable[[LAMLDataset], LAMLTransformer]] = [self.create_pipeline]
         self.sequential = False
+        self._cache = None
 
     # TODO: visualize pipeline ?
     @property
@@ -90,9 +92,56 @@ class FeaturesPipeline:
         """
         # TODO: Think about input/output features attributes
         self._input_features = train.features
-        self._pipeline = self._merge_seq(train) if self.sequential else self._merge(train)
+        if getattr(self, '_cache', None) is None:
+            self._pipeline = self._merge_seq(train) if self.sequential else self._merge(train)
+            return self._pipeline.fit_transform(train)
 
-        return self._pipeline.fit_transform(train)
+        def fit():
+            pipeline = self._merge_seq(train) if self.sequential else self._merge(train)
+            return pipeline, pipeline.fit_transform(train)
+
+        key = ('features', self._get_cache_key(), get_fingerprint(train))
+        self._pipeline, output = self._cache.get_or_compute(key, fit)
+
+        # output is shared with other runs, so its attributes should not be changed inplace
+        return copy(output)
+
+    def set_cache(self, cache: Optional[RunCache]) -> 'FeaturesPipeline':
+        """Share fitted pipeline and its output with other pipelines with the same params and train data.
+
+        Should be used only for deterministic pipelines. Params of pipeline are its attributes,
+        fitted importance estimator is identified by features scores.
+
+        Args:
+            cache: cache or ``None`` to disable sharing.
+
+        Returns:
+            self.
+
+        """
+        self._cache = cache
+        return self
+
+    def _get_cache_key(self) -> str:
+        """Fingerprint of pipeline params.
+
+        Returns:
+            hex digest.
+
+        """
+        params = []
+        for pipe in self.pipes:
+            owner = getattr(pipe, '__self__', pipe)
+            owner_params = {}
+            for k, v in getattr(owner, '__dict__', {}).items():
+                if k.startswith('_') or k == 'pipes':
+                    continue
+                if k == 'feats_imp' and v is not None:
+                    v = v.get_features_score()
+                owner_params[k] = v
+            params.append((type(owner).__name__, getattr(pipe, '__name__', ''), owner_params))
+
+        return get_fingerprint((self.sequential, params))
 
     def transform(self, test: LAMLDataset) -> LAMLDataset:
         """Apply created pipeline to new data.
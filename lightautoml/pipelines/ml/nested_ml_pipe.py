@@ -1,7 +1,8 @@
 """Nested MLPipeline."""
 
+import hashlib
 from copy import copy, deepcopy
-from typing import Optional, Tuple, Any, Union, Sequence
+from typing import Optional, Tuple, Any, Union, Sequence, Dict
 
 import numpy as np
 import optuna
@@ -20,6 +21,7 @@ from ...ml_algo.tuning.optuna import OptunaTunableMixin
 from ...ml_algo.utils import tune_and_fit_predict
 from ...reader.utils import set_sklearn_folds
 from ...utils.logging import get_logger
+from ...utils.parallel import split_thread_budget, thread_map
 from ...utils.timer import PipelineTimer
 from ...validation.base import TrainValidIterator
 from ...validation.utils import create_validation_iterator
@@ -32,8 +34,13 @@ class NestedTabularMLAlgo(TabularMLAlgo, OptunaTunableMixin, ImportanceEstimator
     """
     Wrapper for MLAlgo to make it trainable over nested folds.
     Limitations - only for ``TabularMLAlgo``.
+
+    Outer folds may be fitted concurrently in threads, threads of inner model are split between them.
     """
 
+    # threads limit of inner model, set during parallel fit
+    _inner_threads: Optional[int] = None
+
     @property
     def params(self) -> dict:
         """Parameters of ml_algo."""
@@ -57,7 +64,20 @@ class NestedTabularMLAlgo(TabularMLAlgo, OptunaTunableMixin, ImportanceEstimator
         return self._ml_algo.init_params_on_input(train_valid_iterator)
 
     def __init__(self, ml_algo: TabularMLAlgo, tuner: Optional[ParamsTuner] = None, refit_tuner: bool = False,
-                 cv: int = 5, n_folds: Optional[int] = None):
+                 cv: int = 5, n_folds: Optional[int] = None, n_jobs: int = 1,
+                 folds_cache: Optional[Dict[str, np.ndarray]] = None):
+        """
+
+        Args:
+            ml_algo: inner algo.
+            tuner: tuner of inner algo.
+            refit_tuner: refit tuner on every outer fold. If ``False``, params tuned on the first fold are reused.
+            cv: number of inner folds.
+            n_folds: limit of inner folds iterations.
+            n_jobs: number of outer folds fitted concurrently.
+            folds_cache: dict to store inner folds, may be shared between algos with the same outer folds.
+
+        """
         self._name = ml_algo.name
         self._default_params = ml_algo.default_params
 
@@ -76,14 +96,119 @@ class NestedTabularMLAlgo(TabularMLAlgo, OptunaTunableMixin, ImportanceEstimator
 
         self.nested_cv = cv
         self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self._folds_cache = {} if folds_cache is None else folds_cache
+
+    def clone(self) -> 'NestedTabularMLAlgo':
+        """Create unfitted copy of algo, inner algo is cloned too, since params are stored in it.
+
+        Returns:
+            new algo.
+
+        """
+        new_algo = super().clone()
+        new_algo._ml_algo = self._ml_algo.clone()
+
+        return new_algo
 
     def fit_predict(self, train_valid_iterator: TrainValidIterator) -> NumpyDataset:
 
         self.timer.start()
         div = len(train_valid_iterator) if self.n_folds is None else self.n_folds
+        n_jobs = min(self.n_jobs, len(train_valid_iterator))
         self._per_task_timer = self.timer.time_left / div
 
-        return super().fit_predict(train_valid_iterator)
+        if n_jobs == 1:
+            return super().fit_predict(train_valid_iterator)
+
+        # concurrent folds share time
+        self._per_task_timer = self.timer.time_left / int(np.ceil(div / n_jobs))
+
+        return self._fit_predict_parallel(train_valid_iterator, n_jobs)
+
+    def _fit_predict_parallel(self, train_valid_iterator: TrainValidIterator, n_jobs: int) -> NumpyDataset:
+        """Fit outer folds concurrently.
+
+        Folds are fitted by batches of ``n_jobs`` folds, time limit is checked after each batch.
+        If tuner is shared between folds (``refit_tuner=False``), the first fold is fitted alone to tune params.
+
+        Args:
+            train_valid_iterator: classic cv iterator.
+            n_jobs: number of concurrent folds.
+
+        Returns:
+            dataset with predicted values.
+
+        """
+        logger.info('Start fitting {0} with {1} concurrent outer folds ...'.format(self._name, n_jobs))
+        preds_ds, preds_arr, counter_arr = self._init_fit(train_valid_iterator)
+
+        folds = list(train_valid_iterator)
+        batches = []
+        if self._params_tuner is not None and not self._refit_tuner and self._params_tuner.best_params is None:
+            batches.append(folds[:1])
+        batches.extend([folds[i:i + n_jobs] for i in range(len(batches), len(folds), n_jobs)])
+
+        threads_param = self._ml_algo._threads_param
+        for n, batch in enumerate(batches):
+
+            # concurrent folds of batch are timed as single fold
+            self.timer.set_control_point()
+            self.set_timer_run_params(train_valid_iterator, batch[0][1])
+
+            if threads_param is not None:
+                _, self._inner_threads = split_thread_budget(len(batch), self.params[threads_param])
+            try:
+                results = thread_map(self._fit_predict_fold, batch, len(batch))
+            finally:
+                self._inner_threads = None
+
+            for (idx, _, _), (model, pred) in zip(batch, results):
+                self._add_fold_prediction(model, idx, pred, preds_arr, counter_arr)
+
+            self.timer.write_run_info()
+
+            if (n + 1) != len(batches):
+                if self.timer.time_limit_exceeded():
+                    logger.warning('Time limit exceeded after calculating {0} folds'.format(len(self.models)))
+                    break
+                if self.timer.time_limit_expected():
+                    logger.warning('Next folds are not expected to finish in time limit, remaining {0} folds are skipped'
+                                   .format(len(folds) - len(self.models)))
+                    break
+
+        logger.debug('Time history {0}. Time left {1}'.format(self.timer.get_run_results(), self.timer.time_left))
+
+        return self._finish_fit(preds_ds, preds_arr, counter_arr)
+
+    def _fit_predict_fold(self, fold: Tuple[np.ndarray, TabularDataset, TabularDataset]) -> Tuple[Any, np.ndarray]:
+        _, train, valid = fold
+
+        return self.fit_predict_single_fold(train, valid)
+
+    def _get_inner_folds(self, train: TabularDataset) -> np.ndarray:
+        """Get inner folds. They depend only on target and group, so cached folds are reused by other algos.
+
+        Args:
+            train: outer fold train.
+
+        Returns:
+            folds array.
+
+        """
+        key = hashlib.md5()
+        key.update(str((train.task.name, self.nested_cv, train.shape[0])).encode())
+        for arr in (train.target, train.group):
+            if arr is not None:
+                key.update(np.ascontiguousarray(arr).tobytes())
+        key = key.hexdigest()
+
+        folds = self._folds_cache.get(key)
+        if folds is None:
+            folds = set_sklearn_folds(train.task, train.target, self.nested_cv, random_state=42, group=train.group)
+            self._folds_cache[key] = folds
+
+        return folds
 
     def fit_predict_single_fold(self, train: TabularDataset, valid: TabularDataset) -> Tuple[Any, np.ndarray]:
         """Implements training and prediction on single fold.
@@ -99,15 +224,16 @@ class NestedTabularMLAlgo(TabularMLAlgo, OptunaTunableMixin, ImportanceEstimator
         logger.info('Start fit_predict for nested model on a single fold ...')
         # TODO: rewrite
         if isinstance(train, PandasDataset):
-            train.folds = pd.Series(
-                set_sklearn_folds(train.task, train.target, self.nested_cv, random_state=42, group=train.group))
+            train.folds = pd.Series(self._get_inner_folds(train))
         else:
-            train.folds = set_sklearn_folds(train.task, train.target, self.nested_cv, random_state=42, group=train.group)
+            train.folds = self._get_inner_folds(train)
 
         train_valid = create_validation_iterator(train, n_folds=self.n_folds)
 
         model = deepcopy(self._ml_algo)
         model.set_timer(PipelineTimer(timeout=self._per_task_timer, overhead=0).start().get_task_timer())
+        if self._inner_threads is not None:
+            model.params = {model._threads_param: self._inner_threads}
         logger.debug(self._ml_algo.params)
         tuner = self._params_tuner
         if self._refit_tuner:
@@ -116,6 +242,11 @@ class NestedTabularMLAlgo(TabularMLAlgo, OptunaTunableMixin, ImportanceEstimator
         if tuner is None:
             logger.debug('Run without tuner')
             model.fit_predict(train_valid)
+        elif self._inner_threads is not None and tuner.best_params is not None:
+            logger.debug('Run with params of tuner')
+            # params tuned on the first fold are reused with threads limit of concurrent folds
+            model.params = {**tuner.best_params, model._threads_param: self._inner_threads}
+            model.fit_predict(train_valid)
         else:
             logger.debug('Run with tuner')
             model, _, = tune_and_fit_predict(model, tuner, train_valid, True)
@@ -165,7 +296,7 @@ class NestedTabularMLPipeline(MLPipeline):
                  features_pipeline: Optional[FeaturesPipeline] = None,
                  post_selection: Optional[SelectionPipeline] = None,
                  cv: int = 1, n_folds: Optional[int] = None,
-                 inner_tune: bool = False, refit_tuner: bool = False):
+                 inner_tune: bool = False, refit_tuner: bool = False, n_jobs: int = 1):
         """
 
         Args:
@@ -178,10 +309,13 @@ class NestedTabularMLPipeline(MLPipeline):
             n_folds: limit of valid iterations from cv.
             inner_tune: should we refit tuner each inner cv run or tune ones on outer cv.
             refit_tuner: should we refit tuner each inner loop with inner_tune==True.
+            n_jobs: number of outer folds fitted concurrently.
 
         """
         if cv > 1:
             new_ml_algos = []
+            # inner folds are the same for all algos
+            folds_cache = {}
 
             for n, mt_pair in enumerate(ml_algos):
 
@@ -191,9 +325,9 @@ class NestedTabularMLPipeline(MLPipeline):
                     mod, tuner = mt_pair, DefaultTuner()
 
                 if inner_tune:
-                    new_ml_algos.append(NestedTabularMLAlgo(mod, tuner, refit_tuner, cv, n_folds))
+                    new_ml_algos.append(NestedTabularMLAlgo(mod, tuner, refit_tuner, cv, n_folds, n_jobs, folds_cache))
                 else:
-                    new_ml_algos.append((NestedTabularMLAlgo(mod, None, True, cv, n_folds), tuner))
+                    new_ml_algos.append((NestedTabularMLAlgo(mod, None, True, cv, n_folds, n_jobs, folds_cache), tuner))
 
             ml_algos = new_ml_algos
 
@@ -1,14 +1,18 @@
 """Selectors for linear models."""
 
-from typing import Union, Optional
+from typing import Union, Optional, Tuple
 
 import numpy as np
 from log_calls import record_history
+from scipy import sparse
 from scipy.sparse import linalg as sp_linalg
 
 from .base import SelectionPipeline
+from ...utils.logging import get_logger
 from ...validation.base import TrainValidIterator
 
+logger = get_logger(__name__)
+
 
 @record_history(enabled=False)
 class HighCorrRemoval(SelectionPipeline):
@@ -20,13 +24,16 @@ class HighCorrRemoval(SelectionPipeline):
     """
 
     def __init__(self, corr_co: float = 0.98, subsample: Union[int, float] = 100000,
-                 random_state: int = 42, **kwargs):
+                 random_state: int = 42, block_size: int = 1000, sketch_size: Optional[int] = None, **kwargs):
         """
 
         Args:
             corr_co: similarity threshold.
             subsample: number (int) of samples, or frac (float) from full dataset.
             random_state: seed for subsample.
+            block_size: number of features in block of correlation matrix computed at once.
+            sketch_size: size of random projection sketch used to find candidate pairs.
+              Only candidates are checked with exact correlation. ``None`` - compute exact correlation of all pairs.
             **kwargs: addtional parameters. Used for initialiation of parent class.
 
         """
@@ -35,6 +42,119 @@ class HighCorrRemoval(SelectionPipeline):
         self.corr_co = corr_co
         self.subsample = subsample
         self.random_state = random_state
+        self.block_size = block_size
+        self.sketch_size = sketch_size
+
+    @staticmethod
+    def _normalize(train: Union[np.ndarray, sparse.spmatrix]) -> Tuple[Union[np.ndarray, sparse.spmatrix], np.ndarray]:
+        """Scale features to unit norm, so dot product of features is correlation (or cosine for sparse).
+
+        Args:
+            train: features matrix.
+
+        Returns:
+            Tuple (normalized matrix, mask of constant features).
+
+        """
+        if type(train) is np.ndarray:
+            data = train.astype(np.float64)
+            data -= data.mean(axis=0)
+            norm = np.sqrt((data ** 2).sum(axis=0))
+        else:
+            data = sparse.csc_matrix(train, dtype=np.float64)
+            norm = sp_linalg.norm(data, axis=0)
+
+        const = ~(norm > 0)
+        scale = np.where(const, 0, 1 / np.where(const, 1, norm))
+        if type(data) is np.ndarray:
+            data *= scale
+        else:
+            data = data @ sparse.diags(scale)
+
+        return data, const
+
+    def _get_pairs(self, data: Union[np.ndarray, sparse.spmatrix], threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Find pairs of features with absolute dot product above threshold.
+
+        Dot products are computed by blocks of features, so memory is limited by ``n_features * block_size``.
+
+        Args:
+            data: normalized features matrix (rows are observations).
+            threshold: dot product threshold.
+
+        Returns:
+            Tuple (first feature indices, second feature indices) with first < second.
+
+        """
+        rows, cols = [], []
+        n_feats = data.shape[1]
+        for start in range(0, n_feats, self.block_size):
+            end = min(start + self.block_size, n_feats)
+            block = data[:, start:end].T @ data[:, start:]
+            if sparse.issparse(block):
+                block = block.toarray()
+            r, c = np.nonzero(np.abs(block) > threshold)
+            r, c = r + start, c + start
+            rows.append(r[c > r])
+            cols.append(c[c > r])
+
+        return np.concatenate(rows), np.concatenate(cols)
+
+    def _exact_corr(self, data: Union[np.ndarray, sparse.spmatrix], rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Correlation for given pairs of features.
+
+        Args:
+            data: normalized features matrix.
+            rows: first feature indices.
+            cols: second feature indices.
+
+        Returns:
+            correlation of every pair.
+
+        """
+        res = np.zeros(rows.shape[0])
+        for start in range(0, rows.shape[0], self.block_size):
+            r, c = rows[start:start + self.block_size], cols[start:start + self.block_size]
+            if type(data) is np.ndarray:
+                res[start:start + self.block_size] = np.einsum('ij,ij->j', data[:, r], data[:, c])
+            else:
+                res[start:start + self.block_size] = np.asarray(data[:, r].multiply(data[:, c]).sum(axis=0)).ravel()
+
+        return res
+
+    def _get_correlated_pairs(self, train: Union[np.ndarray, sparse.spmatrix]) -> \
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find pairs of features with absolute correlation above ``corr_co``.
+
+        If ``sketch_size`` is set, features are projected to random gaussian sketch, that preserves
+        dot products with error ~ ``sqrt(2 / sketch_size)``. Pairs with high sketched similarity are candidates,
+        that are checked with exact correlation.
+
+        Args:
+            train: features matrix.
+
+        Returns:
+            Tuple (first feature indices, second feature indices, mask of constant features).
+            Pairs are ordered by first, then by second index.
+
+        """
+        data, const = self._normalize(train)
+
+        if self.sketch_size is not None and self.sketch_size < data.shape[0]:
+            proj = np.random.RandomState(self.random_state).randn(self.sketch_size, data.shape[0])
+            proj /= np.sqrt(self.sketch_size)
+            sketch = proj @ data if type(data) is np.ndarray else (data.T @ proj.T).T
+            margin = 4 * np.sqrt(2 / self.sketch_size)
+            rows, cols = self._get_pairs(sketch, self.corr_co - margin)
+            logger.debug('HighCorrRemoval: {0} candidate pairs from sketch'.format(rows.shape[0]))
+            sl = np.abs(self._exact_corr(data, rows, cols)) > self.corr_co
+            rows, cols = rows[sl], cols[sl]
+        else:
+            rows, cols = self._get_pairs(data, self.corr_co)
+
+        order = np.lexsort((cols, rows))
+
+        return rows[order], cols[order], const
 
     def perform_selection(self, train_valid: Optional[TrainValidIterator]):
         """Select features to save in dataset during selection.
@@ -63,26 +183,15 @@ class HighCorrRemoval(SelectionPipeline):
             train, target = train[idx], target[idx]
 
         # correlation or cosine
-        if type(train) is np.ndarray:
-            corr = np.corrcoef(train, rowvar=False)
-
-        else:
-            xtx = train.T * train
-            norm = sp_linalg.norm(train, axis=0)
-            corr = np.array(xtx / (norm[:, np.newaxis] * norm[np.newaxis, :]))
-            del xtx
-
-        sl = np.triu(np.abs(corr) > self.corr_co, k=1)
-        grid_x, grid_y = np.meshgrid(np.arange(sl.shape[0]), np.arange(sl.shape[0]))
+        rows, cols, const = self._get_correlated_pairs(train)
 
         removed = set()
 
-        for x, y in zip(grid_x[sl], grid_y[sl]):
+        for x, y in zip(cols, rows):
             if x not in removed:
                 removed.add(y)
 
-        const = np.arange(corr.shape[0])[np.isnan(np.diagonal(corr))]
-        for i in const:
+        for i in np.nonzero(const)[0]:
             removed.add(i)
 
         self._selected_features = [x for (n, x) in enumerate(train_valid.features) if n not in removed]
@@ -1,19 +1,22 @@
 """Iterative feature selector."""
 
 from copy import deepcopy
-from typing import Optional
+from typing import Optional, List, Sequence
 
 import numpy as np
 from log_calls import record_history
-from pandas import Series
+from pandas import Series, DataFrame
+from scipy.stats import norm
 
 from lightautoml.validation.base import TrainValidIterator
 from .base import SelectionPipeline, ImportanceEstimator, PredefinedSelector
 from ..features.base import FeaturesPipeline
 from ...dataset.base import LAMLDataset
+from ...dataset.np_pd_dataset import NumpyDataset
 from ...ml_algo.base import MLAlgo
 from ...ml_algo.utils import tune_and_fit_predict
 from ...utils.logging import get_logger
+from ...utils.parallel import thread_map
 
 logger = get_logger(__name__)
 
@@ -39,16 +42,66 @@ class NpPermutationImportanceEstimator(ImportanceEstimator):
 
     Importance calculate, using random permutation of items in single column for each feature.
 
+    Several permuted columns are evaluated by single ``ml_algo.predict`` call: validation rows are replicated
+    into blocks, one block per column, and the column is shuffled inside its block.
+    Batches of columns can be processed by thread pool. To speed up wide data, importances may be estimated
+    on row subsample with several repeats, then ``importances_ci`` contains confidence intervals.
+
     """
 
-    def __init__(self, random_state: int = 42):
+    # max number of elements in stacked block of permuted data
+    _max_block_size: int = 2 ** 25
+
+    def __init__(self, random_state: int = 42, n_jobs: int = 1, batch_size: Optional[int] = None,
+                 subsample: Optional[int] = None, n_repeats: int = 1, confidence: float = 0.95):
         """
         Args:
             random_state: seed for random generation of features permutation.
+            n_jobs: number of threads to evaluate batches of columns.
+            batch_size: number of columns permuted in one block. ``None`` - defined by block size limit.
+            subsample: number of validation rows to estimate importances. ``None`` - use all rows.
+            n_repeats: number of repeats with different permutations and row subsamples.
+            confidence: confidence level of importances intervals.
 
         """
         super().__init__()
         self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.batch_size = batch_size
+        self.subsample = subsample
+        self.n_repeats = n_repeats
+        self.confidence = confidence
+        self.importances_ci = None
+
+    def _get_batch_size(self, n_rows: int, n_cols: int) -> int:
+        if self.batch_size is not None:
+            return self.batch_size
+
+        return int(np.clip(self._max_block_size // max(n_rows * n_cols, 1), 1, n_cols))
+
+    @staticmethod
+    def _score_batch(ml_algo: MLAlgo, data: NumpyDataset, cols_idx: Sequence[int],
+                     permutation: np.ndarray) -> List[float]:
+        """Score predictions on data with single permuted column for every column in batch.
+
+        Args:
+            ml_algo: fitted MlAlgo.
+            data: validation data.
+            cols_idx: indices of columns to permute.
+            permutation: rows permutation.
+
+        Returns:
+            scores for every column.
+
+        """
+        n_rows = data.shape[0]
+        stacked = data[np.tile(np.arange(n_rows), len(cols_idx))]
+        for n, col in enumerate(cols_idx):
+            stacked.data[n * n_rows: (n + 1) * n_rows, col] = data.data[permutation, col]
+
+        preds = ml_algo.predict(stacked)
+
+        return [ml_algo.score(preds[n * n_rows: (n + 1) * n_rows]) for n in range(len(cols_idx))]
 
     def fit(self, train_valid: Optional[TrainValidIterator] = None,
             ml_algo: Optional[MLAlgo] = None,
@@ -67,36 +120,47 @@ class NpPermutationImportanceEstimator(ImportanceEstimator):
 
         valid_data = train_valid.get_validation_data()
         valid_data = valid_data.to_numpy()
+        features = valid_data.features
+
+        rng = np.random.RandomState(seed=self.random_state)
+        subsample = self.subsample is not None and self.subsample < valid_data.shape[0]
+
+        tasks = []
+        baseline = np.zeros(self.n_repeats)
+        for rep in range(self.n_repeats):
+            if subsample:
+                rows = np.sort(rng.choice(valid_data.shape[0], self.subsample, replace=False))
+                data = valid_data[rows]
+                baseline[rep] = ml_algo.score(preds[rows])
+            else:
+                data = valid_data
+                baseline[rep] = normal_score
+            permutation = rng.permutation(data.shape[0])
 
-        permutation = np.random.RandomState(seed=self.random_state).permutation(valid_data.shape[0])
-        permutation_importance = {}
+            batch_size = self._get_batch_size(data.shape[0], len(features))
+            for cols_idx in _create_chunks_from_list(list(range(len(features))), batch_size):
+                tasks.append((rep, cols_idx, data, permutation))
 
-        for it, col in enumerate(valid_data.features):
-            logger.debug('Start processing ({},{})'.format(it, col))
-            # Save initial column
-            save_col = deepcopy(valid_data[:, col])
+        logger.info('Permutation importance: {0} features, {1} predict calls'.format(len(features), len(tasks)))
 
-            # Get current column and shuffle it
-            shuffled_col = valid_data[permutation, col]
+        def _process(task):
+            rep, cols_idx, data, permutation = task
+            logger.debug('Start processing columns {}'.format([features[x] for x in cols_idx]))
+            return self._score_batch(ml_algo, data, cols_idx, permutation)
 
-            # Set shuffled column
-            logger.info('Shuffled column set')
-            valid_data[col] = shuffled_col
+        results = thread_map(_process, tasks, self.n_jobs)
 
-            # Calculate predict and metric
-            logger.info('Shuffled column set')
-            new_preds = ml_algo.predict(valid_data)
-            shuffled_score = ml_algo.score(new_preds)
-            logger.debug('Shuffled score for col {} = {}, difference with normal = {}'.format(col,
-                                                                                              shuffled_score,
-                                                                                              normal_score - shuffled_score))
-            permutation_importance[col] = normal_score - shuffled_score
+        imp = np.zeros((self.n_repeats, len(features)))
+        for (rep, cols_idx, _, _), scores in zip(tasks, results):
+            imp[rep, cols_idx] = baseline[rep] - np.array(scores)
 
-            # Set normal column back to the dataset
-            logger.debug('Normal column set')
-            valid_data[col] = save_col
+        mean = imp.mean(axis=0)
+        std = imp.std(axis=0, ddof=1) if self.n_repeats > 1 else np.zeros(len(features))
+        half_width = norm.ppf(0.5 + self.confidence / 2) * std / np.sqrt(self.n_repeats)
 
-        self.raw_importances = Series(permutation_importance).sort_values(ascending=False)
+        self.raw_importances = Series(mean, index=features).sort_values(ascending=False)
+        self.importances_ci = DataFrame({'importance': mean, 'std': std, 'lower': mean - half_width,
+                                         'upper': mean + half_width}, index=features).loc[self.raw_importances.index]
 
 
 @record_history(enabled=False)
@@ -112,7 +176,10 @@ class NpIterativeFeatureSelector(SelectionPipeline):
                  imp_estimator: Optional[ImportanceEstimator] = None,
                  fit_on_holdout: bool = True,
                  feature_group_size: Optional[int] = 5,
-                 max_features_cnt_in_result: Optional[int] = None):
+                 max_features_cnt_in_result: Optional[int] = None,
+                 warm_start: bool = False,
+                 tol: float = 0.0,
+                 patience: Optional[int] = None):
         """
 
         Args:
@@ -122,6 +189,10 @@ class NpIterativeFeatureSelector(SelectionPipeline):
             fit_on_holdout: if use the holdout iterator.
             feature_group_size: chunk size.
             max_features_cnt_in_result: lower bound of features after selection, if it is reached, it will stop.
+            warm_start: continue boosting from the model of current best features set,
+              so only trees for the new group are fitted. Used if ml_algo supports ``set_init_model``.
+            tol: minimal score gain to select group.
+            patience: stop after this number of groups in a row without gain. ``None`` - check all groups.
 
         """
         if not fit_on_holdout:
@@ -131,6 +202,9 @@ class NpIterativeFeatureSelector(SelectionPipeline):
 
         self.feature_group_size = feature_group_size
         self.max_features_cnt_in_result = max_features_cnt_in_result
+        self.warm_start = warm_start
+        self.tol = tol
+        self.patience = patience
 
     def perform_selection(self, train_valid: Optional[TrainValidIterator] = None):
         """Select features iteratively by checking model quality for current selected feats and new group.
@@ -150,6 +224,7 @@ class NpIterativeFeatureSelector(SelectionPipeline):
         selected_feats = []
         cnt_without_update = 0
         cur_best_score = None
+        best_algo = None
 
         for it, chunk in enumerate(chunks):
             if self.max_features_cnt_in_result is not None and len(selected_feats) >= self.max_features_cnt_in_result:
@@ -164,14 +239,20 @@ class NpIterativeFeatureSelector(SelectionPipeline):
             logger.info('Features in SCI = {}'.format(selected_cols_iterator.features))
 
             # Create copy of MLAlgo for iterative algo only
-            ml_algo_for_iterative, preds = tune_and_fit_predict(deepcopy(self._empty_algo), self.tuner, selected_cols_iterator)
+            ml_algo_for_iterative = deepcopy(self._empty_algo)
+            if self.warm_start and best_algo is not None and hasattr(ml_algo_for_iterative, 'set_init_model'):
+                # boosting continues from the best model, so new trees use added group
+                ml_algo_for_iterative.set_init_model(best_algo.models[0], best_algo.features)
+            ml_algo_for_iterative, preds = tune_and_fit_predict(ml_algo_for_iterative, self.tuner,
+                                                                selected_cols_iterator)
 
             cur_score = ml_algo_for_iterative.score(preds)
             logger.debug('Current score = {}, current best score = {}'.format(cur_score, cur_best_score))
 
-            if cur_best_score is None or cur_best_score < cur_score:
+            if cur_best_score is None or cur_best_score + self.tol < cur_score:
                 logger.info('Update best score from {} to {}'.format(cur_best_score, cur_score))
                 cur_best_score = cur_score
+                best_algo = ml_algo_for_iterative
                 cnt_without_update = 0
             else:
                 cnt_without_update += 1
@@ -180,6 +261,11 @@ class NpIterativeFeatureSelector(SelectionPipeline):
                 selected_feats = selected_feats[:-len(chunk)]
                 logger.debug('Selected feats after delete = {}'.format(selected_feats))
 
+                if self.patience is not None and cnt_without_update >= self.patience:
+                    logger.info('No score gain for {} groups. Exiting from iterative algo...'
+                                .format(cnt_without_update))
+                    break
+
         logger.debug('Update mapped importance')
         imp = imp[imp.index.isin(selected_feats)]
         self.map_raw_feature_importances(imp)
@@ -16,6 +16,7 @@ from ..dataset.np_pd_dataset import PandasDataset
 from ..dataset.roles import ColumnRole, DropRole, DatetimeRole, CategoryRole, NumericRole
 from ..dataset.utils import roles_parser
 from ..tasks import Task
+from ..utils.cache import RunCache, get_fingerprint
 from ..utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -53,6 +54,7 @@ class Reader:
         self._dropped_features = []
         self._used_array_attrs = {}
         self._used_features = []
+        self.cache: Optional[RunCache] = None
 
     @property
     def roles(self) -> RolesDict:
@@ -134,8 +136,13 @@ class PandasToPandasReader(Reader):
         - create initial PandasDataset.
         - Optional: advanced guessing of role and handling types.
 
+    If ``cache`` is set, roles and folds are shared with other readers fitted on the same data.
+    Roles don't depend on ``random_state``, ``cv`` and ``n_jobs``, so they are reused by runs with other seeds.
+
     """
 
+    _cached_attrs = ('_roles', '_dropped_features', '_used_array_attrs', '_used_features', 'class_mapping')
+
     def __init__(self, task: Task, samples: Optional[int] = 100000, max_nan_rate: float = 0.999, max_constant_rate: float = 0.999,
                  cv: int = 5, random_state: int = 42, roles_params: Optional[dict] = None, n_jobs: int = 4,
                  # params for advanced roles guess
@@ -209,6 +216,34 @@ class PandasToPandasReader(Reader):
             dataset with selected features.
 
         """
+        if self.cache is None or len(kwargs) > 0:
+            return self._fit_read(train_data, features_names, roles, **kwargs)
+
+        key = ('reader', self.cache.fingerprint(train_data), repr(roles), self.task.name, self.samples,
+               self.max_nan_rate, self.max_constant_rate, self.advanced_roles, repr(self.roles_params),
+               repr(self.advanced_roles_params))
+        res = {}
+
+        def fit():
+            res['dataset'] = self._fit_read(train_data, features_names, roles)
+            return deepcopy({x: self.__dict__[x] for x in self._cached_attrs})
+
+        state = self.cache.get_or_compute(key, fit)
+        if 'dataset' in res:
+            return res['dataset']
+
+        logger.info('Train data shape: {}'.format(train_data.shape))
+        logger.info('Features roles are reused from previous run')
+        self.__dict__.update(deepcopy(state))
+        kwargs = {x: train_data[self._used_array_attrs[x]] for x in self._used_array_attrs}
+        kwargs['target'] = self._create_target(kwargs['target'])
+        self._set_folds(kwargs, train_data.index)
+
+        return PandasDataset(train_data[self.used_features], self.roles, task=self.task, **kwargs)
+
+    def _fit_read(self, train_data: DataFrame, features_names: Any = None, roles: UserDefinedRolesDict = None,
+                  **kwargs: Any) -> PandasDataset:
+        """Get dataset with initial feature selection, see :meth:`fit_read`."""
         logger.info('Train data shape: {}'.format(train_data.shape))
 
         if roles is None:
@@ -293,10 +328,7 @@ class PandasToPandasReader(Reader):
         # assert len(self.used_array_attrs) > 0, 'At least target should be defined in train dataset'
         # create folds
 
-        folds = set_sklearn_folds(self.task, kwargs['target'].values, cv=self.cv, random_state=self.random_state,
-                                  group=None if 'group' not in kwargs else kwargs['group'])
-        if folds is not None:
-            kwargs['folds'] = Series(folds, index=train_data.index)
+        self._set_folds(kwargs, train_data.index)
 
         # get dataset
         dataset = PandasDataset(train_data[self.used_features], self.roles, task=self.task, **kwargs)
@@ -309,6 +341,28 @@ class PandasToPandasReader(Reader):
 
         return dataset
 
+    def _set_folds(self, kwargs: Dict[str, Series], index: pd.Index):
+        """Create cv folds and add them to dataset array attributes.
+
+        Args:
+            kwargs: array attributes of dataset, target is required.
+            index: index of train data.
+
+        """
+        def get_folds():
+            return set_sklearn_folds(self.task, kwargs['target'].values, cv=self.cv, random_state=self.random_state,
+                                     group=None if 'group' not in kwargs else kwargs['group'])
+
+        if self.cache is None or not isinstance(self.cv, int):
+            folds = get_folds()
+        else:
+            key = ('folds', get_fingerprint(kwargs['target']), get_fingerprint(kwargs.get('group')),
+                   self.task.name, self.cv, self.random_state)
+            folds = self.cache.get_or_compute(key, get_folds)
+
+        if folds is not None:
+            kwargs['folds'] = Series(folds, index=index)
+
     def _create_target(self, target: Series):
         """Validate target column and create class mapping is needed
 
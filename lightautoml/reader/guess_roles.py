@@ -3,7 +3,7 @@
 from typing import Optional, Union, cast, Dict, Tuple, Any, List
 
 import numpy as np
-from joblib import Parallel, delayed
+from joblib import delayed
 from log_calls import record_history
 from pandas import Series, DataFrame
 
@@ -15,6 +15,7 @@ from lightautoml.transformers.base import SequentialTransformer, LAMLTransformer
 from lightautoml.transformers.categorical import TargetEncoder, MultiClassTargetEncoder, LabelEncoder, FreqEncoder, \
     OrdinalEncoder
 from lightautoml.transformers.numeric import QuantileBinning
+from lightautoml.utils.parallel import process_parallel
 
 NumpyOrPandas = Union[NumpyDataset, PandasDataset]
 RolesDict = Dict[str, ColumnRole]
@@ -190,7 +191,7 @@ def get_score_from_pipe(train: NumpyOrPandas, target: np.ndarray, pipe: Optional
     else:
         empty_slice = [empty_slice[:, x] for x in idx]
 
-    with Parallel(n_jobs=n_jobs, prefer='processes', backend='loky', max_nbytes=None) as p:
+    with process_parallel(n_jobs, max_nbytes=None) as p:
         res = p(
             delayed(_get_score_from_pipe)(train[:, name], target, pipe, sl) for (name, sl) in zip(names, empty_slice))
     return np.concatenate(list(map(np.array, res)))
@@ -3,14 +3,16 @@
 import os
 import warnings
 from copy import copy
-from typing import Optional, List, Tuple, Dict, Sequence, Union, Iterable
+from typing import Optional, List, Tuple, Dict, Sequence, Union, Iterable, Iterator
 
 import numpy as np
 import pandas as pd
-from joblib import Parallel, delayed
+from joblib import delayed
 from log_calls import record_history
 from pandas import DataFrame
 
+from ..utils.parallel import process_parallel
+
 ReadableToDf = Union[str, np.ndarray, DataFrame, Dict[str, np.ndarray], 'Batch']
 
 
@@ -161,7 +163,7 @@ def read_csv(file: str, n_jobs: int = 1, **read_csv_params) -> DataFrame:
     _check_csv_params(read_csv_params)
     offsets, cnts = get_file_offsets(file, n_jobs)
 
-    with Parallel(n_jobs) as p:
+    with process_parallel(n_jobs) as p:
         res = p(delayed(read_csv_batch)(file, offset=offset, cnt=cnt, **read_csv_params)
                 for (offset, cnt) in zip(offsets, cnts))
 
@@ -402,3 +404,126 @@ def read_batch(data: ReadableToDf, features_names: Optional[Sequence[str]] = Non
             return DfBatchGenerator(data, n_jobs=n_jobs, batch_size=batch_size)
 
     raise ValueError('Data type not supported')
+
+
+@record_history(enabled=False)
+def read_data_stream(data: ReadableToDf, features_names: Optional[Sequence[str]] = None, batch_size: int = 100000,
+                     read_csv_params: Optional[dict] = None) -> Iterator[DataFrame]:
+    """Lazily read data for inference by chunks of fixed size.
+
+    Unlike :func:`read_batch`, does not index row offsets of the whole file,
+    so memory consumption depends only on batch_size, not on the file length.
+
+    Args:
+        data: Dataset in formats:
+            - pd.DataFrame,
+            - np.ndarray,
+            - path to csv, feather, parquet.
+        features_names: Optional features names if np.ndarray.
+        batch_size: number of rows in each chunk.
+        read_csv_params: params to read csv file.
+
+    Returns:
+        Generator of pd.DataFrame chunks.
+
+    """
+    if read_csv_params is None:
+        read_csv_params = {}
+
+    if isinstance(data, np.ndarray):
+        data = DataFrame(data, columns=features_names)
+
+    if isinstance(data, DataFrame):
+        for idx in get_batch_ids(np.arange(data.shape[0]), batch_size):
+            yield data.iloc[idx]
+        return
+
+    if isinstance(data, str):
+        usecols = read_csv_params.get('usecols')
+
+        if data.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(data).iter_batches(batch_size=batch_size, columns=usecols):
+                yield batch.to_pandas()
+            return
+
+        if data.endswith('.feather'):
+            # feather format doesn't support partial reading by rows
+            data, _ = read_data(data, features_names, 1, {'usecols': usecols})
+            yield from read_data_stream(data, batch_size=batch_size)
+            return
+
+        read_csv_params = {**read_csv_params, **{'chunksize': batch_size}}
+        for chunk in pd.read_csv(data, **read_csv_params):
+            yield chunk
+        return
+
+    raise ValueError('Data type not supported')
+
+
+@record_history(enabled=False)
+class PredictionsWriter:
+    """Incremental writer of DataFrame batches to .csv or .parquet file.
+
+    Each batch is flushed to disk on write, so nothing except
+    the current batch is kept in memory.
+    """
+
+    def __init__(self, path: str, write_params: Optional[dict] = None):
+        """
+
+        Args:
+            path: output file path. Parquet format is used for .parquet extension, csv otherwise.
+            write_params: params passed to pd.DataFrame.to_csv or pyarrow.parquet.ParquetWriter.
+
+        """
+        if write_params is None:
+            write_params = {}
+
+        self.path = path
+        self.write_params = write_params
+        self.parquet = path.endswith('.parquet')
+        self.n_rows = 0
+        self._file = None
+        self._writer = None
+
+    def write(self, data: DataFrame):
+        """Append batch to output file.
+
+        Args:
+            data: batch to write.
+
+        """
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, table.schema, **self.write_params)
+            else:
+                table = pa.Table.from_pandas(data, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='')
+            data.to_csv(self._file, header=self.n_rows == 0, index=False, **self.write_params)
+
+        self.n_rows += data.shape[0]
+
+    def close(self):
+        """Flush and close output file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'PredictionsWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
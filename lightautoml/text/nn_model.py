@@ -14,12 +14,83 @@ from .dl_transformers import pooling_by_name
 from ..tasks.base import Task
 
 
+@record_history(enabled=False)
+class TokenizedTextCache:
+    """Cache of tokenized texts.
+
+    Every unique text is encoded only once, so folds, epochs and predict calls reuse the same tokens.
+    Texts of dataset are packed into flat integer arrays with offsets, padding is done at batch level.
+
+    """
+
+    def __init__(self, tokenizer, max_length: int = 256):
+        """
+
+        Args:
+            tokenizer: transformers tokenizer.
+            max_length: max sentence length.
+
+        """
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self._tokens = {}
+
+    @property
+    def pad_token_id(self) -> int:
+        """Id of padding token."""
+        pad_token_id = self.tokenizer.pad_token_id
+        return 0 if pad_token_id is None else pad_token_id
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def clear(self):
+        """Drop cached tokens."""
+        self._tokens = {}
+
+    def _encode(self, sent: str) -> Dict[str, np.ndarray]:
+        _split = sent.split('[SEP]')
+        sent = _split if len(_split) == 2 else (sent,)
+        data = self.tokenizer.encode_plus(*sent, add_special_tokens=True, max_length=self.max_length,
+                                          truncation=True, return_attention_mask=False)
+
+        return {key: np.asarray(value, dtype=np.int32) for key, value in data.items()}
+
+    def pack(self, texts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Tokenize texts and pack them.
+
+        Args:
+            texts: array of texts.
+
+        Returns:
+            dict with flat tokens arrays and ``offsets`` - array of len(texts) + 1 bounds of every text.
+
+        """
+        encoded = []
+        for sent in texts:
+            tokens = self._tokens.get(sent)
+            if tokens is None:
+                tokens = self._encode(sent)
+                self._tokens[sent] = tokens
+            encoded.append(tokens)
+
+        keys = list(encoded[0].keys()) if len(encoded) > 0 else ['input_ids']
+        packed = {key: np.concatenate([x[key] for x in encoded]) if len(encoded) > 0 else np.zeros(0, dtype=np.int32)
+                  for key in keys}
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([x['input_ids'].shape[0] for x in encoded], out=offsets[1:])
+        packed['offsets'] = offsets
+
+        return packed
+
+
 @record_history(enabled=False)
 class UniversalDataset:
     """Dataset class for mixed data."""
 
     def __init__(self, data: Dict[str, np.ndarray], y: np.ndarray, w: Optional[np.ndarray] = None, tokenizer: Optional = None,
-                 max_length: int = 256, stage: str = 'test'):
+                 max_length: int = 256, stage: str = 'test', tokens: Optional[Dict[str, np.ndarray]] = None,
+                 pad_token_id: int = 0, dynamic_padding: bool = False):
         """Class for preparing input for DL model with mixed data.
 
         Args:
@@ -29,6 +100,10 @@ class UniversalDataset:
             tokenizer: transformers tokenizer.
             max_length: max sentence length.
             stage: name of current training / inference stage.
+            tokens: pretokenized text, output of ``TokenizedTextCache.pack``. If passed, tokenizer is not used.
+            pad_token_id: id of padding token for pretokenized text.
+            dynamic_padding: don't pad pretokenized text to ``max_length``,
+              batch is padded by ``collate_dict`` to its longest sequence.
 
         """
         self.data = data
@@ -37,14 +112,38 @@ class UniversalDataset:
         self.tokenizer = tokenizer
         self.max_length = max_length
         self.stage = stage
+        self.tokens = tokens
+        self.pad_token_id = pad_token_id
+        self.dynamic_padding = dynamic_padding
+
+    @property
+    def lengths(self) -> Optional[np.ndarray]:
+        """Number of tokens of every text, if pretokenized."""
+        if self.tokens is None:
+            return None
+        return np.diff(self.tokens['offsets'])
 
     def __len__(self) -> int:
         return len(self.y)
 
+    def _get_tokens(self, index: int) -> Dict[str, np.ndarray]:
+        start, end = self.tokens['offsets'][index], self.tokens['offsets'][index + 1]
+        res = {key: value[start: end] for key, value in self.tokens.items() if key != 'offsets'}
+        res['attention_mask'] = np.ones(end - start, dtype=np.int32)
+
+        pad = 0 if self.dynamic_padding else self.max_length - (end - start)
+        if pad > 0:
+            res = {key: np.pad(value, (0, pad), constant_values=self.pad_token_id if key == 'input_ids' else 0)
+                   for key, value in res.items()}
+
+        return res
+
     def __getitem__(self, index: int) -> Dict[str, np.ndarray]:
         res = {'label': self.y[index]}
         res.update({key: value[index] for key, value in self.data.items() if key != 'text'})
-        if (self.tokenizer is not None) and ('text' in self.data):
+        if self.tokens is not None:
+            res.update(self._get_tokens(index))
+        elif (self.tokenizer is not None) and ('text' in self.data):
             sent = self.data['text'][index, 0]  # only one column
             _split = sent.split('[SEP]')
             sent = _split if len(_split) == 2 else (sent,)
@@ -58,6 +157,58 @@ class UniversalDataset:
         return res
 
 
+@record_history(enabled=False)
+class LengthBucketBatchSampler(torch.utils.data.Sampler):
+    """Batch sampler that groups texts of similar length.
+
+    Indices are shuffled and split into buckets of ``bucket_size`` batches, every bucket is sorted by length
+    and cut into batches, then batches order is shuffled. With dynamic padding it reduces number of pad tokens.
+
+    """
+
+    def __init__(self, lengths: np.ndarray, batch_size: int, shuffle: bool = True, bucket_size: int = 50,
+                 random_state: int = 42):
+        """
+
+        Args:
+            lengths: length of every sample.
+            batch_size: batch size.
+            shuffle: shuffle samples and batches. If ``False``, samples keep original order.
+            bucket_size: number of batches in bucket.
+            random_state: random seed.
+
+        """
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_size = bucket_size
+        self.random_state = random_state
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return (self.lengths.shape[0] + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        n = self.lengths.shape[0]
+        if not self.shuffle:
+            for start in range(0, n, self.batch_size):
+                yield list(range(start, min(start + self.batch_size, n)))
+            return
+
+        rng = np.random.RandomState(self.random_state + self._epoch)
+        self._epoch += 1
+        idx = rng.permutation(n)
+        chunk = self.batch_size * self.bucket_size
+        batches = []
+        for start in range(0, n, chunk):
+            bucket = idx[start: start + chunk]
+            bucket = bucket[np.argsort(self.lengths[bucket], kind='stable')]
+            batches.extend(bucket[i: i + self.batch_size] for i in range(0, bucket.shape[0], self.batch_size))
+
+        for n_batch in rng.permutation(len(batches)):
+            yield batches[n_batch].tolist()
+
+
 @record_history(enabled=False)
 class Clump(nn.Module):
     """Clipping input tensor."""
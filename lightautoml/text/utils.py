@@ -19,6 +19,8 @@ _dtypes_mapping = {'label': 'float',
                    'text': 'float',  # embeddings
                    'length': 'long'}
 
+_padded_keys = {'input_ids', 'attention_mask', 'token_type_ids'}
+
 
 @record_history(enabled=False)
 def inv_sigmoid(x: np.ndarray) -> np.ndarray:
@@ -152,10 +154,30 @@ def custom_collate(batch: List[np.ndarray]) -> torch.Tensor:
 
 
 @record_history(enabled=False)
-def collate_dict(batch: List[Dict[str, np.ndarray]]) -> Dict[str, torch.Tensor]:
-    """custom_collate for dicts."""
+def pad_sequences(batch: List[np.ndarray], pad_value: int = 0) -> np.ndarray:
+    """Pad 1d arrays of different length to the longest one."""
+    max_len = max(x.shape[0] for x in batch)
+    res = np.full((len(batch), max_len), pad_value, dtype=batch[0].dtype)
+    for n, x in enumerate(batch):
+        res[n, :x.shape[0]] = x
+
+    return res
+
+
+@record_history(enabled=False)
+def collate_dict(batch: List[Dict[str, np.ndarray]], pad_token_id: int = 0) -> Dict[str, torch.Tensor]:
+    """custom_collate for dicts.
+
+    Token sequences of different length (dynamic padding) are padded to the longest sequence in batch.
+
+    """
     keys = list(batch[0].keys())
     transposed_data = list(map(list, zip(*[tuple([i[name] for name in i.keys()]) for i in batch])))
+    for n, key in enumerate(keys):
+        if key in _padded_keys and len(set(x.shape[0] for x in transposed_data[n])) > 1:
+            pad_value = pad_token_id if key == 'input_ids' else 0
+            transposed_data[n] = pad_sequences(transposed_data[n], pad_value)
+
     return {key: custom_collate(transposed_data[n]) for n, key in enumerate(keys)}
 
 
@@ -2,4 +2,4 @@
 
 from .profiler import Profiler
 
-__all__ = ['Profiler', 'timer']
+__all__ = ['Profiler', 'timer', 'parallel', 'memory', 'cache']
@@ -0,0 +1,170 @@
+"""Cache of deterministic fit results shared by several automl runs on the same data."""
+
+import hashlib
+import os
+import threading
+import weakref
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import pandas as pd
+from log_calls import record_history
+from scipy import sparse
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@record_history(enabled=False)
+def get_fingerprint(data: Any) -> str:
+    """Content hash of data.
+
+    Args:
+        data: pd.DataFrame, pd.Series, np.ndarray, sparse matrix, dict of them, path to file or LAMLDataset.
+            Files are identified by path, size and modification time, other objects by their values.
+
+    Returns:
+        hex digest.
+
+    """
+    md5 = hashlib.md5()
+
+    def update(x: Any):
+        if x is None:
+            md5.update(b'none')
+        elif isinstance(x, (pd.DataFrame, pd.Series)):
+            if isinstance(x, pd.DataFrame):
+                md5.update(repr((x.shape, list(x.columns), list(x.dtypes))).encode())
+            else:
+                md5.update(repr((x.shape, x.name, x.dtype)).encode())
+            md5.update(pd.util.hash_pandas_object(x, index=True).values.tobytes())
+        elif isinstance(x, np.ndarray):
+            md5.update(repr((x.shape, x.dtype)).encode())
+            if x.dtype == object:
+                md5.update(pd.util.hash_pandas_object(pd.Series(x.ravel()), index=False).values.tobytes())
+            else:
+                md5.update(np.ascontiguousarray(x).tobytes())
+        elif sparse.issparse(x):
+            x = x.tocsr()
+            md5.update(repr((x.shape, x.dtype)).encode())
+            for arr in (x.data, x.indices, x.indptr):
+                md5.update(np.ascontiguousarray(arr).tobytes())
+        elif isinstance(x, str) and os.path.isfile(x):
+            stat = os.stat(x)
+            md5.update(repr((os.path.abspath(x), stat.st_size, stat.st_mtime_ns)).encode())
+        elif isinstance(x, dict):
+            for k in sorted(x, key=str):
+                md5.update(repr(k).encode())
+                update(x[k])
+        elif isinstance(x, (list, tuple)):
+            for val in x:
+                update(val)
+        elif hasattr(x, '_array_like_attrs') and hasattr(x, 'data'):
+            # LAMLDataset - values, features, roles and target/folds/etc
+            md5.update(repr((type(x).__name__, x.features, [x.roles[f] for f in x.features])).encode())
+            update(x.data)
+            update({k: x.__dict__[k] for k in x._array_like_attrs})
+        else:
+            md5.update(repr(x).encode())
+
+    update(data)
+
+    return md5.hexdigest()
+
+
+@record_history(enabled=False)
+class RunCache:
+    """Thread-safe storage of results shared by automl runs on the same train data.
+
+    Results are stored by key, that should contain fingerprints of all inputs of computation.
+    Concurrent requests of the same key are computed once - other threads wait for the result.
+    Cache is not pickled - unpickled instance is empty.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys_locks = {}
+        self._store = {}
+        self._fingerprints = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._store
+
+    def __getstate__(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+        self.__dict__.update(state)
+
+    def fingerprint(self, data: Any) -> str:
+        """Content hash of data, memoized for the same object while it is alive.
+
+        Args:
+            data: data to hash, see :func:`get_fingerprint`.
+
+        Returns:
+            hex digest.
+
+        """
+        if isinstance(data, (str, int, float)):
+            return get_fingerprint(data)
+
+        with self._lock:
+            memo = self._fingerprints.get(id(data))
+        if memo is not None and memo[0]() is data:
+            return memo[1]
+
+        fp = get_fingerprint(data)
+        try:
+            ref = weakref.ref(data)
+        except TypeError:
+            # objects without weak references (ex. dict) are kept in memo, so their id cannot be reused
+            ref = (lambda obj: lambda: obj)(data)
+        with self._lock:
+            self._fingerprints[id(data)] = (ref, fp)
+
+        return fp
+
+    def get_or_compute(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Get stored result or compute and store it.
+
+        Args:
+            key: key of result.
+            func: function without arguments that computes result.
+
+        Returns:
+            result.
+
+        """
+        with self._lock:
+            key_lock = self._keys_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key in self._store:
+                with self._lock:
+                    self.hits += 1
+                return self._store[key]
+
+            res = func()
+            with self._lock:
+                self._store[key] = res
+                self.misses += 1
+
+        return res
+
+    def clear(self):
+        """Drop stored results and fingerprints."""
+        with self._lock:
+            if len(self._store) > 0:
+                logger.info('Run cache: {0} results computed, {1} reused'.format(self.misses, self.hits))
+            self._store = {}
+            self._keys_locks = {}
+            self._fingerprints = {}
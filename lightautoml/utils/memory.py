@@ -0,0 +1,339 @@
+"""Memory footprint estimation and planning of resources params under memory limit."""
+
+import os
+import sys
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from log_calls import record_history
+from pandas import DataFrame
+
+from .logging import get_logger
+
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+logger = get_logger(__name__)
+
+_GB = 2 ** 30
+
+
+@record_history(enabled=False)
+def get_peak_memory() -> Optional[int]:
+    """Peak resident memory of current process and its finished child processes.
+
+    Returns:
+        bytes or None if it cannot be measured on this platform.
+
+    """
+    if resource is None:
+        return None
+
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes on linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@record_history(enabled=False)
+def get_memory_usage() -> int:
+    """Current resident memory of process.
+
+    Returns:
+        bytes. Peak memory is used if current cannot be measured, 0 if nothing can be measured.
+
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        peak = get_peak_memory()
+        return 0 if peak is None else peak
+
+
+@record_history(enabled=False)
+def get_data_size(data: Any) -> Tuple[Optional[int], Optional[int], int]:
+    """Estimate in-memory size of input data without reading it.
+
+    Args:
+        data: pd.DataFrame, np.ndarray, dict of np.ndarray or path to .csv, .parquet, .feather file.
+
+    Returns:
+        Tuple (number of rows, number of columns, bytes). Rows and columns are None for files.
+
+    """
+    if isinstance(data, DataFrame):
+        # deep memory usage is slow for large object columns, so it is extrapolated from sample
+        n_sample = min(data.shape[0], 1000)
+        size = data.iloc[:n_sample].memory_usage(deep=True, index=False).sum()
+        size = int(size * data.shape[0] / max(n_sample, 1))
+        return data.shape[0], data.shape[1], size
+
+    if isinstance(data, np.ndarray):
+        return data.shape[0], int(np.prod(data.shape[1:])), data.nbytes
+
+    if isinstance(data, dict):
+        arr = data['data']
+        size = sum(x.nbytes for x in data.values() if hasattr(x, 'nbytes'))
+        return arr.shape[0], int(np.prod(arr.shape[1:])) + len(data) - 1, size
+
+    if isinstance(data, str) and os.path.exists(data):
+        size = os.path.getsize(data)
+        # compressed columnar formats are expanded when loaded, text values take about the same space
+        if data.endswith('.parquet') or data.endswith('.feather'):
+            size *= 3
+        return None, None, size
+
+    return None, None, 0
+
+
+@record_history(enabled=False)
+class MemoryPlanner:
+    """Estimate memory footprint of automl stages and fit resources params into memory limit.
+
+    Footprint is estimated before execution from the number of rows, features and their dtype size:
+
+        - reading - input data, doubled if file is read by several processes (chunks + concatenation).
+        - dataset - input data, reader output casted to float32 and feature pipelines output.
+        - fold - train/valid copies of features and binned dataset of boosting
+          for every concurrently fitted fold (nested cv jobs x parallel tuning trials).
+        - roles guess - sample of data replicated to every reader process.
+
+    If estimated peak doesn't fit into ``memory_limit * safety_ratio``, planner casts own input data to float32,
+    reduces parallelism degree and reader sample, and subsamples train rows as the last resort (if allowed).
+    Inference batch size is chosen the same way. After fit estimated and actual peak memory are reported.
+
+    """
+
+    # feature pipelines output size relative to number of input columns (ohe, encodings of several pipelines)
+    _features_mult = 2
+    # bytes per value of binned dataset of lightgbm/catboost
+    _binned_itemsize = 1
+    # bytes per value of reader output
+    _itemsize = 4
+
+    @property
+    def budget(self) -> float:
+        """Available bytes."""
+        if self.memory_limit is None:
+            return np.inf
+
+        return self.memory_limit * _GB * self.safety_ratio
+
+    @property
+    def estimated_peak(self) -> int:
+        """Estimated peak memory of all planned stages in bytes."""
+        return self.start_usage + max(self.estimates.values(), default=0)
+
+    def __init__(self, memory_limit: Optional[float] = 16, safety_ratio: float = 0.8, allow_subsample: bool = False,
+                 min_rows: int = 10000):
+        """
+
+        Args:
+            memory_limit: memory limit in gb. None - only estimate and report memory usage.
+            safety_ratio: part of memory limit available for planned stages,
+                the rest is reserved for models and python objects.
+            allow_subsample: allow to subsample train rows if smallest plan doesn't fit.
+            min_rows: minimal number of train rows after subsampling.
+
+        """
+        self.memory_limit = memory_limit
+        self.safety_ratio = safety_ratio
+        self.allow_subsample = allow_subsample
+        self.min_rows = min_rows
+
+        self.start_usage = get_memory_usage()
+        self.estimates = {}
+        # positions of train rows kept by subsample, None - all rows are used
+        self.subsample_idx = None
+        self._row_bytes = None
+        self._feats_row_bytes = None
+
+    def _fits(self, size: float) -> bool:
+        return self.start_usage + size <= self.budget
+
+    def plan_read(self, data: Any, n_jobs: int = 1) -> int:
+        """Choose number of processes to read file.
+
+        Args:
+            data: input data.
+            n_jobs: desired number of processes.
+
+        Returns:
+            number of processes.
+
+        """
+        _, _, size = get_data_size(data)
+        if not isinstance(data, str):
+            self.estimates['read'] = size
+            return n_jobs
+
+        if n_jobs > 1 and not self._fits(2 * size):
+            logger.info('Data file is read by single process to fit into memory limit')
+            n_jobs = 1
+
+        self.estimates['read'] = size * (2 if n_jobs > 1 else 1)
+
+        return n_jobs
+
+    def _estimate_fit(self, n_rows: int, n_cols: int, row_bytes: float, n_concurrent: int,
+                      reader_jobs: int, samples: Optional[int]) -> Dict[str, float]:
+        """Estimate footprint of fit stages.
+
+        Args:
+            n_rows: number of rows.
+            n_cols: number of columns.
+            row_bytes: input data bytes per row.
+            n_concurrent: number of concurrently fitted folds.
+            reader_jobs: number of reader processes.
+            samples: reader sample size.
+
+        Returns:
+            dict stage - bytes.
+
+        """
+        values = n_rows * n_cols
+        dataset = n_rows * row_bytes + values * self._itemsize * (1 + self._features_mult)
+        fold = (values * self._itemsize * self._features_mult + values * self._binned_itemsize) * n_concurrent
+        sample = n_rows if samples is None else min(samples, n_rows)
+        roles = sample * n_cols * 8 * reader_jobs
+
+        return {'dataset': dataset, 'fold': dataset + fold, 'roles guess': dataset + roles}
+
+    def cast_float32(self, data: DataFrame, exclude: Sequence[str] = ()) -> DataFrame:
+        """Cast float64 columns to float32 inplace, column by column.
+
+        Should be applied only to data that is not referenced outside, otherwise memory is not released.
+
+        Args:
+            data: input data.
+            exclude: columns to keep, ex. target.
+
+        Returns:
+            same dataframe.
+
+        """
+        cols = [x for x in data.columns if data[x].dtype == np.float64 and x not in exclude]
+        for col in cols:
+            data[col] = data[col].astype(np.float32)
+
+        if len(cols) > 0:
+            logger.info('{0} float64 columns are casted to float32 to fit into memory limit'.format(len(cols)))
+
+        return data
+
+    def plan_fit(self, data: DataFrame, n_jobs: Dict[str, int], samples: Optional[int] = None, own_data: bool = False,
+                 exclude: Sequence[str] = ()) -> Tuple[DataFrame, Dict[str, int], Optional[int]]:
+        """Choose float32 casting, parallelism degree, reader sample and train subsample to fit into memory limit.
+
+        Args:
+            data: train data.
+            n_jobs: dict name - number of concurrent jobs. Keys ``'nested'`` and ``'tuning'``
+                are jobs that fit folds concurrently, ``'reader'`` - roles guess processes.
+                Jobs are reduced in the order of dict.
+            samples: reader sample size.
+            own_data: data is not referenced outside automl, so it may be casted inplace.
+            exclude: columns that should not be casted or dropped, ex. target.
+
+        Returns:
+            Tuple (data, n_jobs, samples).
+
+        """
+        n_jobs = dict(n_jobs)
+        n_rows, n_cols, size = get_data_size(data)
+        n_rows = max(n_rows, 1)
+
+        def estimate():
+            return self._estimate_fit(n_rows, n_cols, size / n_rows, n_jobs.get('nested', 1) * n_jobs.get('tuning', 1),
+                                      n_jobs.get('reader', 1), samples)
+
+        est = estimate()
+        if not self._fits(max(est.values())) and own_data:
+            data = self.cast_float32(data, exclude)
+            _, _, size = get_data_size(data)
+            est = estimate()
+
+        for name in n_jobs:
+            init_jobs = n_jobs[name]
+            while not self._fits(max(est.values())) and n_jobs[name] > 1:
+                n_jobs[name] //= 2
+                est = estimate()
+            if n_jobs[name] < init_jobs:
+                logger.info('Number of {0} jobs is set to {1} to fit into memory limit'.format(name, n_jobs[name]))
+
+        while not self._fits(est['roles guess']) and samples is not None and samples > self.min_rows:
+            samples //= 2
+            est = estimate()
+
+        if not self._fits(max(est.values())):
+            free = self.budget - self.start_usage
+            ratio = free / max(est.values())
+            if self.allow_subsample and ratio > 0 and n_rows * ratio >= self.min_rows:
+                sample_rows = int(n_rows * ratio)
+                logger.info('Train data is subsampled to {0} rows to fit into memory limit'.format(sample_rows))
+                self.subsample_idx = np.sort(np.random.RandomState(42).choice(n_rows, sample_rows, replace=False))
+                data = data.iloc[self.subsample_idx]
+                n_rows = sample_rows
+                est = estimate()
+            else:
+                logger.warning('Estimated memory usage {0:.2f} gb exceeds memory limit {1} gb. '
+                               'Try to allow train subsample or increase limit'
+                               .format((self.start_usage + max(est.values())) / _GB, self.memory_limit))
+
+        self.estimates.update(est)
+        self._row_bytes = size / n_rows
+        self._feats_row_bytes = n_cols * self._itemsize * (1 + self._features_mult)
+        logger.info('Estimated memory usage by stages (gb): {0}'.format(
+            ', '.join('{0} - {1:.2f}'.format(k, (self.start_usage + v) / _GB) for (k, v) in self.estimates.items())))
+
+        return data, n_jobs, samples
+
+    def plan_predict(self, data: Any, n_jobs: int = 1) -> Optional[int]:
+        """Choose inference batch size.
+
+        Args:
+            data: data to predict.
+            n_jobs: number of inference jobs.
+
+        Returns:
+            number of rows in batch or None if whole data fits into memory.
+
+        Note:
+            Only the size of data and its features is compared to the memory budget.
+            Current usage of process (fitted models, train data) is not taken into account,
+            so small inputs are never batched.
+
+        """
+        if self._row_bytes is None:
+            return None
+
+        n_rows, _, size = get_data_size(data)
+        if n_rows is None:
+            n_rows = int(size / max(self._row_bytes, 1))
+        row_cost = self._row_bytes + self._feats_row_bytes
+
+        if n_rows * row_cost <= self.budget:
+            return None
+
+        batch_size = int(self.budget / (row_cost * n_jobs))
+        batch_size = max(min(batch_size, int(np.ceil(n_rows / n_jobs))), 1000)
+        logger.info('Inference batch size is set to {0} to fit into memory limit'.format(batch_size))
+
+        return batch_size
+
+    def report(self) -> Dict[str, Optional[float]]:
+        """Log estimated and actual peak memory.
+
+        Returns:
+            dict with estimated and actual peak in gb, actual is None if it cannot be measured.
+
+        """
+        actual = get_peak_memory()
+        res = {'estimated': self.estimated_peak / _GB, 'actual': None if actual is None else actual / _GB}
+        logger.info('Peak memory usage: estimated {0:.2f} gb, actual {1} gb (limit {2} gb)'.format(
+            res['estimated'], 'n/a' if actual is None else '{0:.2f}'.format(res['actual']), self.memory_limit))
+
+        return res
@@ -0,0 +1,242 @@
+"""Thread-based parallelism helpers and CPU threads budget of parallel stages.
+
+Every parallel stage asks for its share of threads budget with :func:`split_thread_budget`,
+so number of busy threads never exceeds budget set by outer :func:`thread_budget` (cpu_limit of automl preset).
+Threads started with :func:`start_thread` and :func:`thread_map` inherit budget, processes are started
+by :func:`process_parallel` with limited BLAS/OpenMP threads.
+
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from joblib import Parallel, parallel_backend
+from threadpoolctl import threadpool_limits
+
+# log_calls decorator walks the stack up to the <module> frame on every call of decorated function.
+# Thread stack has no such frame and walking fails, so threads should run their targets from module-level code.
+_CALL_CODE = compile('_result = _func(*_args, **_kwargs)', '<lightautoml_thread>', 'exec')
+
+# budget of threads started by helpers below, threads started by third party code (ex. optuna) use main budget
+_local = threading.local()
+_main_budget: Optional[int] = None
+
+
+def call_in_module_frame(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call function from module-level frame.
+
+    Every function that is run in a separate thread should be called via this wrapper.
+
+    Args:
+        func: function to call.
+        *args: positional arguments of func.
+        **kwargs: keyword arguments of func.
+
+    Returns:
+        func result.
+
+    """
+    scope = {'_func': func, '_args': args, '_kwargs': kwargs}
+    exec(_CALL_CODE, scope)
+
+    return scope['_result']
+
+
+def get_thread_budget() -> int:
+    """Number of threads available for current thread.
+
+    Returns:
+        threads budget, number of cpus if budget is not set.
+
+    """
+    budget = getattr(_local, 'budget', None)
+    if budget is None:
+        budget = _main_budget
+
+    return os.cpu_count() if budget is None else budget
+
+
+def limit_threads(n_threads: int) -> int:
+    """Limit number of threads of single job by threads budget.
+
+    Args:
+        n_threads: desired number of threads, values < 1 mean all available threads (as in lightgbm/catboost).
+
+    Returns:
+        number of threads.
+
+    """
+    budget = get_thread_budget()
+
+    return budget if n_threads < 1 else min(n_threads, budget)
+
+
+def split_thread_budget(n_jobs: int, n_threads: Optional[int] = None) -> Tuple[int, int]:
+    """Split threads budget of current thread between concurrent jobs.
+
+    Args:
+        n_jobs: desired number of jobs, -1 - as many as budget allows.
+        n_threads: desired total number of threads, ex. threads param of model. ``None`` or < 1 - whole budget.
+
+    Returns:
+        Tuple (number of jobs, number of threads of single job).
+
+    """
+    budget = get_thread_budget() if n_threads is None else limit_threads(n_threads)
+    if n_jobs < 1:
+        n_jobs = budget
+    n_jobs = min(n_jobs, budget)
+
+    return n_jobs, max(1, budget // n_jobs)
+
+
+@contextmanager
+def _native_threads(n_threads: int):
+    """Limit BLAS/OpenMP and torch intra-op threads.
+
+    These limits are process-wide, so they are set only from main thread.
+
+    Args:
+        n_threads: number of threads.
+
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    # torch is not imported here to keep helpers light, it is limited only if already used
+    torch = sys.modules.get('torch')
+    torch_threads = None
+    if torch is not None:
+        torch_threads = torch.get_num_threads()
+        torch.set_num_threads(n_threads)
+    try:
+        with threadpool_limits(limits=n_threads):
+            yield
+    finally:
+        if torch_threads is not None:
+            torch.set_num_threads(torch_threads)
+
+
+def _set_budget(n_threads: Optional[int]) -> Optional[int]:
+    """Set budget of current thread.
+
+    Args:
+        n_threads: new budget.
+
+    Returns:
+        previous budget.
+
+    """
+    global _main_budget
+    prev = getattr(_local, 'budget', None)
+    _local.budget = n_threads
+    if threading.current_thread() is threading.main_thread():
+        _main_budget = n_threads
+
+    return prev
+
+
+@contextmanager
+def thread_budget(n_threads: int):
+    """Limit threads budget of code in context. Budget can only be decreased by nested contexts.
+
+    If used in main thread, BLAS/OpenMP pools and torch are limited too.
+
+    Args:
+        n_threads: number of threads, -1 - all cpus.
+
+    """
+    budget = get_thread_budget()
+    n_threads = budget if n_threads < 1 else max(1, min(n_threads, budget))
+    prev = _set_budget(n_threads)
+    try:
+        with _native_threads(n_threads):
+            yield n_threads
+    finally:
+        _set_budget(prev)
+
+
+def _call_with_budget(n_threads: int, func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Set budget of new thread and call function from module-level frame.
+
+    Args:
+        n_threads: budget of thread.
+        func: function to call.
+        *args: positional arguments of func.
+        **kwargs: keyword arguments of func.
+
+    Returns:
+        func result.
+
+    """
+    _local.budget = n_threads
+
+    return call_in_module_frame(func, *args, **kwargs)
+
+
+def start_thread(func: Callable, *args: Any, **kwargs: Any) -> threading.Thread:
+    """Run function in new daemon thread. Thread inherits threads budget of current thread.
+
+    Args:
+        func: thread target.
+        *args: positional arguments of func.
+        **kwargs: keyword arguments of func.
+
+    Returns:
+        started thread.
+
+    """
+    thread = threading.Thread(target=_call_with_budget, args=(get_thread_budget(), func) + args, kwargs=kwargs,
+                              daemon=True)
+    thread.start()
+
+    return thread
+
+
+def thread_map(func: Callable, iterable: Iterable, n_jobs: int = 1) -> List[Any]:
+    """Apply function to every element of iterable using thread pool.
+
+    Useful for the code that releases GIL, ex. boosters inference.
+    Number of threads is limited by threads budget, which is split equally between threads.
+
+    Args:
+        func: function to apply.
+        iterable: elements to process.
+        n_jobs: number of threads. If 1 - elements are processed serially in current thread.
+
+    Returns:
+        list of results in the order of input elements.
+
+    """
+    n_jobs, n_threads = split_thread_budget(n_jobs)
+    if n_jobs == 1:
+        return [func(x) for x in iterable]
+
+    with _native_threads(n_threads), ThreadPoolExecutor(n_jobs) as executor:
+        return list(executor.map(lambda x: _call_with_budget(n_threads, func, x), iterable))
+
+
+@contextmanager
+def process_parallel(n_jobs: int, **kwargs: Any) -> Iterator[Parallel]:
+    """Context of joblib.Parallel with loky processes, that fits into threads budget.
+
+    Number of processes is limited by budget, BLAS/OpenMP threads of every process - by its share.
+
+    Args:
+        n_jobs: desired number of processes, -1 - as many as budget allows.
+        **kwargs: other params of joblib.Parallel.
+
+    Yields:
+        Parallel object, workers are reused by its calls inside the context.
+
+    """
+    n_jobs, n_threads = split_thread_budget(n_jobs)
+
+    with parallel_backend('loky', inner_max_num_threads=n_threads):
+        with Parallel(n_jobs, **kwargs) as parallel:
+            yield parallel
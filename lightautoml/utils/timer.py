@@ -1,16 +1,188 @@
 """Timer."""
 
+import json
+import os
+import threading
 from time import time
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 
 import numpy as np
 from log_calls import record_history
+from pandas import DataFrame
 
 from .logging import get_logger, DuplicateFilter
 
 logger = get_logger(__name__)
 logger.addFilter(DuplicateFilter())
 
+# cost models shared by timers of one process, by history path
+_cost_models: Dict[str, 'RuntimeCostModel'] = {}
+_cost_models_lock = threading.Lock()
+
+
+@record_history(enabled=False)
+class RuntimeCostModel:
+    """Predict fit time of single fold from data shape, params and history of previous runs.
+
+    Log of fold time is a linear function of logs of number of rows, columns, iterations and threads.
+    Slopes are shrunk to prior that assumes linear complexity and sublinear speed up with threads,
+    so a single observation of task is enough to extrapolate its time to other shapes and params.
+    Tasks are identified by timer key, ex. ``'lgb'``, ``'cb_tuned'``.
+
+    """
+
+    _prior = np.array([1., 1., 1., -.5])
+
+    def __init__(self, path: Optional[str] = None, max_history: int = 200, alpha: float = 10.):
+        """
+
+        Args:
+            path: path to json file with history. If exists, history is loaded, :meth:`save` writes it back.
+            max_history: number of last observations of every task used to fit model.
+            alpha: l2 regularization of slopes difference from prior.
+
+        """
+        self.path = path
+        self.max_history = max_history
+        self.alpha = alpha
+        self.history: Dict[str, List[List[float]]] = {}
+        self._coefs = {}
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop('_lock')
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_features(values: np.ndarray) -> np.ndarray:
+        return np.log(np.maximum(values, 1))
+
+    def _fit(self, key: str) -> np.ndarray:
+        """Fit model of task.
+
+        Args:
+            key: task name.
+
+        Returns:
+            intercept and slopes.
+
+        """
+        hist = np.array(self.history[key], dtype=np.float64)
+        x = self._get_features(hist[:, :4])
+        y = np.log(np.maximum(hist[:, 4], 1e-3)) - x.dot(self._prior)
+        x_mean, y_mean = x.mean(axis=0), y.mean()
+        x = x - x_mean
+        coef = np.linalg.solve(x.T.dot(x) + self.alpha * np.eye(x.shape[1]), x.T.dot(y - y_mean))
+
+        return np.concatenate([[y_mean - x_mean.dot(coef)], coef + self._prior])
+
+    def predict(self, key: str, n_rows: int, n_cols: int, n_iters: Optional[int] = None,
+                n_threads: Optional[int] = None) -> Optional[float]:
+        """Predict fit time of fold.
+
+        Args:
+            key: task name.
+            n_rows: number of train rows.
+            n_cols: number of features.
+            n_iters: number of iterations (ex. trees) or ``None``.
+            n_threads: number of threads or ``None``.
+
+        Returns:
+            seconds or ``None`` if there is no history of task.
+
+        """
+        with self._lock:
+            if key not in self.history:
+                return None
+            if key not in self._coefs:
+                self._coefs[key] = self._fit(key)
+            coef = self._coefs[key]
+
+        x = self._get_features(np.array([n_rows, n_cols, n_iters or 1, n_threads or 1], dtype=np.float64))
+
+        return float(np.exp(coef[0] + x.dot(coef[1:])))
+
+    def update(self, key: str, n_rows: int, n_cols: int, fit_time: float, n_iters: Optional[int] = None,
+               n_threads: Optional[int] = None):
+        """Add observation of fold fit time.
+
+        Args:
+            key: task name.
+            n_rows: number of train rows.
+            n_cols: number of features.
+            fit_time: seconds.
+            n_iters: number of iterations or ``None``.
+            n_threads: number of threads or ``None``.
+
+        """
+        with self._lock:
+            hist = self.history.setdefault(key, [])
+            hist.append([n_rows, n_cols, n_iters or 1, n_threads or 1, fit_time])
+            del hist[:-self.max_history]
+            self._coefs.pop(key, None)
+
+    def save(self, path: Optional[str] = None):
+        """Write history to json file.
+
+        Args:
+            path: path to file, if ``None`` - path from init. Nothing is saved if both are ``None``.
+
+        """
+        path = self.path if path is None else path
+        if path is None:
+            return
+
+        with self._lock:
+            data = json.dumps(self.history)
+        # file is replaced at once, so concurrent readers never see partially written history
+        tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Add history from json file.
+
+        Args:
+            path: path to file.
+
+        """
+        with open(path) as f:
+            history = json.load(f)
+
+        with self._lock:
+            for key in history:
+                self.history[key] = (history[key] + self.history.get(key, []))[-self.max_history:]
+                self._coefs.pop(key, None)
+
+
+@record_history(enabled=False)
+def get_cost_model(path: str) -> RuntimeCostModel:
+    """Get cost model shared by all timers of process with the same history path.
+
+    Args:
+        path: path to json file with history.
+
+    Returns:
+        cost model.
+
+    """
+    path = os.path.abspath(path)
+
+    with _cost_models_lock:
+        if path not in _cost_models:
+            _cost_models[path] = RuntimeCostModel(path)
+
+        return _cost_models[path]
+
 
 @record_history(enabled=False)
 class Timer:
@@ -64,7 +236,8 @@ class PipelineTimer(Timer):
     It decides how much time spend to each algo
     """
 
-    def __init__(self, timeout: Optional[float] = None, overhead: float = .1, mode: int = 1, tuning_rate: float = 0.7):
+    def __init__(self, timeout: Optional[float] = None, overhead: float = .1, mode: int = 1, tuning_rate: float = 0.7,
+                 cost_model: bool = False, history_path: Optional[str] = None):
         """Create global automl timer.
 
         Args:
@@ -74,6 +247,12 @@ class PipelineTimer(Timer):
             mode: Timing mode. Can be 0, 1 or 2. Keep in mind - all time limitations will
                 turn on after at least single model/single fold will be computed.
             tuning_rate: Approximate fraction of all time will be used for tuning.
+            cost_model: Predict time of folds that are not computed yet in current run with
+                :class:`RuntimeCostModel`. It's used to plan number of folds, tuning time and trials,
+                and to skip tasks that are not expected to fit into time left.
+                If ``False``, folds are stopped only by time limit.
+            history_path: Path to json file to keep history of cost model between runs.
+                If ``None``, history is kept only by this timer, so runs on other data do not affect it.
 
         Note:
             Modes explanation:
@@ -92,6 +271,11 @@ class PipelineTimer(Timer):
         self._mode = mode
         self.tuning_rate = tuning_rate
         self.child_out_of_time = False
+        self.cost_model = None
+        if cost_model:
+            self.cost_model = RuntimeCostModel() if history_path is None else get_cost_model(history_path)
+        # (task key, predicted, actual) fold times of current run
+        self.run_predictions = []
 
     def add_task(self, score: float = 1.0):
         self._task_scores += score
@@ -108,6 +292,28 @@ class PipelineTimer(Timer):
     def get_task_timer(self, key: Optional[str] = None, score: float = 1.0) -> 'TaskTimer':
         return TaskTimer(self, key, score, self._rate_overhead, self._mode, self.tuning_rate)
 
+    def report(self) -> Optional[DataFrame]:
+        """Log predicted and actual fit time of tasks and save cost model history.
+
+        Returns:
+            DataFrame with number of folds, predicted and actual time by task key
+            or ``None`` if there were no predictions.
+
+        """
+        if self.cost_model is None:
+            return None
+        self.cost_model.save()
+        if len(self.run_predictions) == 0:
+            return None
+
+        preds = DataFrame(self.run_predictions, columns=['key', 'predicted', 'actual'])
+        res = preds.groupby('key').agg(folds=('actual', 'size'), predicted=('predicted', 'sum'),
+                                       actual=('actual', 'sum'))
+        logger.info('Predicted and actual fit time of tasks (secs):\n{0}'.format(res.round(2).to_string()))
+        logger.info('Time spent {0:.1f} of {1} secs timeout'.format(self.time_spent, self.timeout))
+
+        return res
+
 
 @record_history(enabled=False)
 class TaskTimer(Timer):
@@ -146,6 +352,7 @@ class TaskTimer(Timer):
         self._rate_overhead = overhead
         self._mode = mode
         self.default_tuner_rate = default_tuner_time_rate
+        self.run_params = None
 
     def start(self):
         """Starts counting down.
@@ -173,6 +380,31 @@ class TaskTimer(Timer):
         self._timeout = self.timeout - self.time_spent
         self.start_time = time()
 
+    def set_run_params(self, n_rows: int, n_cols: int, n_iters: Optional[int] = None, n_threads: Optional[int] = None):
+        """Set data shape and params of next folds for cost model.
+
+        Args:
+            n_rows: number of train rows of fold.
+            n_cols: number of features.
+            n_iters: number of iterations (ex. trees) or ``None``.
+            n_threads: number of threads or ``None``.
+
+        """
+        self.run_params = {'n_rows': n_rows, 'n_cols': n_cols, 'n_iters': n_iters, 'n_threads': n_threads}
+
+    def predict_fold_time(self) -> Optional[float]:
+        """Predict fit time of single fold by cost model.
+
+        Returns:
+            seconds or ``None`` if run params are not set or there is no history of task.
+
+        """
+        cost_model = getattr(self.pipe_timer, 'cost_model', None)
+        if cost_model is None or self.run_params is None or self.key is None:
+            return None
+
+        return cost_model.predict(self.key, **self.run_params)
+
     def write_run_info(self):
         """Collect timer history."""
 
@@ -181,6 +413,13 @@ class TaskTimer(Timer):
         else:
             self.pipe_timer.run_info[self.key] = [self.time_spent]
 
+        cost_model = getattr(self.pipe_timer, 'cost_model', None)
+        if cost_model is not None and self.run_params is not None and self.key is not None:
+            predicted = self.predict_fold_time()
+            if predicted is not None:
+                self.pipe_timer.run_predictions.append((self.key, predicted, self.time_spent))
+            cost_model.update(self.key, fit_time=self.time_spent, **self.run_params)
+
     def get_run_results(self) -> Union[None, np.ndarray]:
         """Get timer history.
 
@@ -206,12 +445,14 @@ class TaskTimer(Timer):
         """
         run_results = self.get_run_results()
         if run_results is None:
-            return None
+            # no folds in current run yet, so time is predicted from history of previous runs
+            single_run_est = self.predict_fold_time()
+            return None if single_run_est is None else single_run_est * n_folds
 
         if self._mode > 0:
             single_run_est = np.max(run_results)
         else:
-            single_run_est = run_results.mean()
+            single_run_est = np.mean(run_results)
 
         return single_run_est * n_folds
 
@@ -227,6 +468,27 @@ class TaskTimer(Timer):
             return self.default_tuner_rate * self.time_left
         return self.time_left - folds_est
 
+    def time_limit_expected(self, n_folds: int = 1) -> bool:
+        """Check if next folds are expected to exceed time limit.
+
+        Parent timer is not notified - skipping expensive folds is not an overrun of time limit.
+        Used only if cost model of parent timer is enabled.
+
+        Args:
+            n_folds: Number of next folds.
+
+        Returns:
+            `True` if estimated time of folds is more than time left.
+
+        """
+        if self._mode == 0 or getattr(self.pipe_timer, 'cost_model', None) is None:
+            return False
+
+        folds_est = self.estimate_folds_time(n_folds)
+        time_left = self.time_left - (self._overhead if self._mode == 2 else 0)
+
+        return folds_est is not None and folds_est > time_left
+
     def time_limit_exceeded(self) -> bool:
         """Estimate time limit and send results to parent timer.
 
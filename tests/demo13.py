@@ -0,0 +1,52 @@
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.automl.presets.tabular_presets import TabularAutoML
+from lightautoml.tasks import Task
+
+
+def test_predict_to_file():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+    data['cat'] = np.random.choice(['a', 'b', 'c'], size=data.shape[0])
+    data['id'] = np.arange(data.shape[0])
+    data['TARGET'] = y
+    train, test = data.iloc[:2000].reset_index(drop=True), data.iloc[2000:].reset_index(drop=True)
+
+    automl = TabularAutoML(task=Task('binary'), timeout=600, general_params={'use_algos': [['lgb']]})
+    automl.fit_predict(train, roles={'target': 'TARGET', 'drop': ['id']})
+
+    logging.debug('Predict in memory...')
+    ref_pred = automl.predict(test).data[:, 0]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_path = os.path.join(tmp_dir, 'test.csv')
+        test.to_csv(test_path, index=False)
+
+        # file is read, predicted and written by batches, batches are predicted concurrently
+        for path, n_jobs in [(os.path.join(tmp_dir, 'pred.csv'), 1), (os.path.join(tmp_dir, 'pred_par.csv'), 2)]:
+            logging.debug('Predict to file {0} with {1} jobs...'.format(path, n_jobs))
+            automl.predict_to_file(test_path, path, batch_size=300, n_jobs=n_jobs, keep_columns=['id'])
+            res = pd.read_csv(path)
+
+            assert res.shape[0] == test.shape[0]
+            assert (res['id'].values == test['id'].values).all(), 'Order of rows should be kept'
+            assert np.allclose(res.iloc[:, 1].values, ref_pred, atol=1e-5)
+
+        # dataframe input, parquet output
+        path = os.path.join(tmp_dir, 'pred.parquet')
+        automl.predict_to_file(test, path, batch_size=700)
+        res = pd.read_parquet(path)
+        assert np.allclose(res.iloc[:, 0].values, ref_pred, atol=1e-5)
+
+
+if __name__ == '__main__':
+    test_predict_to_file()
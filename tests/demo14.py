@@ -0,0 +1,67 @@
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.automl.artifact import save_automl, load_automl, list_artifact_components, LazyModels, \
+    _iter_encoders
+from lightautoml.automl.presets.tabular_presets import TabularAutoML
+from lightautoml.tasks import Task
+
+
+def test_artifact_round_trip():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+    data['cat'] = np.random.choice(['a', 'b', 'c'], size=data.shape[0])
+    data['TARGET'] = y
+    train, test = data.iloc[:2000].reset_index(drop=True), data.iloc[2000:].reset_index(drop=True)
+
+    automl = TabularAutoML(task=Task('binary'), timeout=600,
+                           general_params={'use_algos': [['linear_l2', 'lgb', 'cb']]})
+    automl.fit_predict(train, roles={'target': 'TARGET'})
+    ref_pred = automl.predict(test).data
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        logging.debug('Save artifact...')
+        save_automl(automl, tmp_dir)
+        # models of original automl are kept in memory after save
+        assert np.allclose(automl.predict(test).data, ref_pred)
+
+        # lightgbm and catboost are saved in native formats, other models with joblib
+        components = list_artifact_components(tmp_dir)
+        for comp in components:
+            fmt = 'lightgbm' if 'LightGBM' in comp['algo'] else 'catboost' if 'CatBoost' in comp['algo'] else 'joblib'
+            assert comp['format'] == fmt, comp
+            assert os.path.exists(os.path.join(tmp_dir, comp['file']))
+
+        # label encoders mappings are saved as numpy arrays, not in the graph
+        assert len(os.listdir(os.path.join(tmp_dir, 'encoders'))) > 0
+        assert all(isinstance(x.dicts, dict) for x in _iter_encoders(automl))
+
+        for lazy in [True, False]:
+            logging.debug('Load artifact, lazy = {0}...'.format(lazy))
+            loaded = load_automl(tmp_dir, lazy=lazy)
+            models = [ml_algo.models for level in loaded.levels for pipe in level for ml_algo in pipe.ml_algos]
+            assert all(isinstance(x, LazyModels) for x in models)
+            assert all(x.is_loaded for x in models) != lazy
+
+            encoders = list(_iter_encoders(loaded))
+            assert len(encoders) > 0 and all(isinstance(x.dicts, dict) for x in encoders)
+            assert np.allclose(loaded.predict(test).data, ref_pred, atol=1e-6)
+            assert all(x.is_loaded for x in models)
+
+            # graph is not memory-mapped, so its arrays may be updated inplace
+            wts = loaded.blender.wts
+            if isinstance(wts, np.ndarray):
+                assert wts.flags.writeable
+                wts[:] = wts
+
+
+if __name__ == '__main__':
+    test_artifact_round_trip()
@@ -0,0 +1,67 @@
+import logging
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.datasets import make_regression
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_cb import BoostCB
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM, merge_boosters, select_booster_features
+from lightautoml.tasks import Task
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_merge_boosters():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_regression(n_samples=2000, n_features=6, n_informative=4, noise=1., random_state=42)
+    X[np.random.rand(*X.shape) < .1] = np.nan
+    params = {'objective': 'binary', 'num_leaves': 16, 'learning_rate': .1, 'verbosity': -1, 'seed': 42}
+
+    logging.debug('Merge boosters...')
+    models = [lgb.train(params, lgb.Dataset(X[fold::3], (y[fold::3] > 0).astype(int)), num_boost_round=30 + 10 * fold)
+              for fold in range(3)]
+    weights = [.5, .3, .2]
+    merged = merge_boosters(models, weights)
+    # raw output of merged booster is weighted sum of raw outputs of fold boosters
+    ref_raw = sum(w * m.predict(X, raw_score=True) for m, w in zip(models, weights))
+    assert merged.num_trees() == sum(m.num_trees() for m in models)
+    assert np.allclose(merged.predict(X, raw_score=True), ref_raw, atol=1e-6)
+
+    logging.debug('Select booster features...')
+    # new input - permuted columns of model input and unknown feature
+    features_idx = [3, -1, 0, 5, 1, 2, 4]
+    X_new = np.stack([X[:, x] if x >= 0 else np.random.rand(X.shape[0]) for x in features_idx], axis=1)
+    selected = select_booster_features(models[0], features_idx)
+    assert selected.num_feature() == len(features_idx)
+    assert np.allclose(selected.predict(X_new), models[0].predict(X), atol=1e-6)
+
+
+def test_collapse_folds():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_regression(n_samples=2000, n_features=6, n_informative=4, noise=1., random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    dataset = NumpyDataset(X.astype(np.float32), features, roles, task=Task('reg'), target=y,
+                           folds=np.arange(X.shape[0]) % 3)
+
+    for ml_algo in [BoostLGBM(default_params={'num_trees': 50}),
+                    BoostCB(default_params={'num_trees': 50, 'thread_count': 1})]:
+        logging.debug('Collapse folds of {0}...'.format(ml_algo.name))
+        ml_algo.fit_predict(FoldsIterator(dataset))
+        assert ml_algo.is_merge_exact()
+        ref_pred = ml_algo.predict(dataset).data
+
+        diff = ml_algo.collapse_folds(dataset)
+        assert len(ml_algo.models) == 1
+        assert diff < 1e-4, diff
+        assert np.allclose(ml_algo.predict(dataset).data, ref_pred, atol=1e-4)
+
+
+if __name__ == '__main__':
+    test_merge_boosters()
+    test_collapse_folds()
@@ -0,0 +1,73 @@
+import logging
+import os
+import tempfile
+
+import lightgbm as lgb
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.ml_algo.compiled_trees import CompiledTreeEnsemble
+from lightautoml.tasks import Task
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_compiled_trees():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=8, n_informative=5, n_classes=3, random_state=42)
+    # missing values and zeros are routed by default directions of splits
+    X[np.random.rand(*X.shape) < .1] = np.nan
+    X[np.random.rand(*X.shape) < .05] = 0
+
+    for objective, target in [('regression', X[:, 0] * 2 + y), ('binary', (y > 0).astype(int)),
+                              ('multiclass', y)]:
+        logging.debug('Compile {0} boosters...'.format(objective))
+        params = {'objective': objective, 'num_leaves': 16, 'verbosity': -1, 'seed': 42}
+        if objective == 'multiclass':
+            params['num_class'] = 3
+        models = [lgb.train({**params, 'zero_as_missing': fold == 1}, lgb.Dataset(X[fold::2], target[fold::2]),
+                            num_boost_round=40) for fold in range(2)]
+
+        compiled = CompiledTreeEnsemble.from_boosters(models)
+        assert compiled.n_models == 2
+        pred = compiled.predict_per_model(X)
+        raw = compiled.predict_per_model(X, raw_score=True)
+        for n, model in enumerate(models):
+            ref_pred = model.predict(X).reshape((X.shape[0], -1))
+            ref_raw = model.predict(X, raw_score=True).reshape((X.shape[0], -1))
+            assert np.allclose(raw[:, n], ref_raw, atol=1e-6)
+            assert np.allclose(pred[:, n], ref_pred, atol=1e-6)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'compiled.npz')
+            compiled.save(path)
+            loaded = CompiledTreeEnsemble.load(path)
+            assert np.allclose(loaded.predict_per_model(X), pred)
+
+
+def test_compile_boost_lgbm():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=8, n_informative=5, random_state=42)
+    X[np.random.rand(*X.shape) < .1] = np.nan
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    dataset = NumpyDataset(X.astype(np.float32), features, roles, task=Task('binary'), target=y,
+                           folds=np.arange(X.shape[0]) % 3)
+
+    ml_algo = BoostLGBM(default_params={'num_trees': 50})
+    ml_algo.fit_predict(FoldsIterator(dataset))
+    ref_pred = ml_algo.predict(dataset).data
+
+    ml_algo.compile_models()
+    assert np.allclose(ml_algo.predict(dataset).data, ref_pred, atol=1e-5)
+
+
+if __name__ == '__main__':
+    test_compiled_trees()
+    test_compile_boost_lgbm()
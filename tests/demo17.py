@@ -0,0 +1,54 @@
+import logging
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.ml_algo.tuning.halving import SuccessiveHalvingTuner, stratified_subsample
+from lightautoml.ml_algo.tuning.optuna import OptunaTuner
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_successive_halving_tuner():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=6000, n_features=10, n_informative=5, weights=[.8], random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    dataset = NumpyDataset(X.astype(np.float32), features, roles, task=Task('binary'), target=y,
+                           folds=np.arange(X.shape[0]) % 3)
+
+    # class ratio is kept in subsample
+    sample = stratified_subsample(dataset, 600)
+    assert abs(sample.shape[0] - 600) <= 2
+    assert abs(sample.target.mean() - y.mean()) < .01
+
+    # every rung has eta times less candidates and eta times more rows
+    assert SuccessiveHalvingTuner(n_trials=27, eta=3, min_rows=400)._get_rungs_sizes(4000) == [444, 1333, 4000]
+    tuner = SuccessiveHalvingTuner(n_trials=9, timeout=600, fit_on_holdout=False, eta=3, min_rows=400)
+    assert tuner._get_rungs_sizes(4000) == [1333, 4000]
+
+    scores = {}
+    for name, tuner in [('halving', tuner), ('optuna', OptunaTuner(n_trials=9, timeout=600, fit_on_holdout=False))]:
+        logging.debug('Tune with {0}...'.format(name))
+        timer = PipelineTimer(600).start()
+        ml_algo = BoostLGBM(timer=timer.get_task_timer('lgb').start(), default_params={'num_trees': 100})
+        ml_algo, preds = tuner.fit(ml_algo, FoldsIterator(dataset))
+
+        assert tuner.best_params is not None
+        assert ml_algo.params['num_leaves'] == tuner.best_params['num_leaves']
+        assert not np.isnan(preds.data).any()
+        scores[name] = ml_algo.score(preds)
+
+    logging.debug('Scores: {0}'.format(scores))
+    # candidates are evaluated on subsamples, so quality of tuned model may be slightly worse
+    assert scores['halving'] > scores['optuna'] - .02, scores
+
+
+if __name__ == '__main__':
+    test_successive_halving_tuner()
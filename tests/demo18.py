@@ -0,0 +1,62 @@
+import logging
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.pipelines.selection.permutation_importance_based import NpPermutationImportanceEstimator
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_batched_permutation_importance():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=12, n_informative=4, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    dataset = NumpyDataset(X.astype(np.float32), features, roles, task=Task('binary'), target=y,
+                           folds=np.arange(X.shape[0]) % 3)
+    train_valid = FoldsIterator(dataset)
+
+    timer = PipelineTimer(600).start()
+    ml_algo = BoostLGBM(timer=timer.get_task_timer('lgb').start(), default_params={'num_trees': 100})
+    preds = ml_algo.fit_predict(train_valid)
+
+    # reference - one predict call per permuted column
+    valid_data = train_valid.get_validation_data().to_numpy()
+    permutation = np.random.RandomState(seed=42).permutation(valid_data.shape[0])
+    normal_score = ml_algo.score(preds)
+    reference = {}
+    for n, feat in enumerate(features):
+        data = valid_data.empty()
+        data.set_data(valid_data.data.copy(), valid_data.features, valid_data.roles)
+        data.data[:, n] = valid_data.data[permutation, n]
+        reference[feat] = normal_score - ml_algo.score(ml_algo.predict(data))
+    logging.debug('Reference importances: {0}'.format(reference))
+
+    for batch_size, n_jobs in [(None, 1), (5, 1), (5, 2), (1, 2)]:
+        estimator = NpPermutationImportanceEstimator(batch_size=batch_size, n_jobs=n_jobs)
+        estimator.fit(train_valid, ml_algo, preds)
+        importances = estimator.get_features_score()
+
+        assert set(importances.index) == set(features)
+        for feat in features:
+            assert np.isclose(importances[feat], reference[feat], atol=1e-7), (batch_size, n_jobs, feat)
+
+    # estimation on subsample with repeats - intervals should contain estimates and keep most important features
+    estimator = NpPermutationImportanceEstimator(subsample=1000, n_repeats=3)
+    estimator.fit(train_valid, ml_algo, preds)
+    ci = estimator.importances_ci
+    assert (ci['lower'] <= ci['importance']).all() and (ci['importance'] <= ci['upper']).all()
+    top = list(estimator.get_features_score().index[:2])
+    reference_top = sorted(reference, key=reference.get, reverse=True)[:4]
+    assert set(top) <= set(reference_top), (top, reference_top)
+
+
+if __name__ == '__main__':
+    test_batched_permutation_importance()
@@ -0,0 +1,74 @@
+import logging
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import linalg as sp_linalg
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset, CSRSparseDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.pipelines.selection.linear_selector import HighCorrRemoval
+from lightautoml.tasks import Task
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def _reference_pairs(train, corr_co):
+    """Pairs of correlated features and constant features computed with full correlation matrix."""
+    if type(train) is np.ndarray:
+        corr = np.corrcoef(train, rowvar=False)
+    else:
+        norm = sp_linalg.norm(train, axis=0)
+        corr = np.array((train.T @ train).toarray() / (norm[:, np.newaxis] * norm[np.newaxis, :]))
+
+    rows, cols = np.nonzero(np.triu(np.abs(corr) > corr_co, k=1))
+    const = np.isnan(np.diagonal(corr))
+
+    return set(zip(rows, cols)), const
+
+
+def _reference_selection(train, features, corr_co):
+    pairs, const = _reference_pairs(train, corr_co)
+    removed = set(np.nonzero(const)[0])
+    for y, x in sorted(pairs):
+        if x not in removed:
+            removed.add(y)
+
+    return [x for (n, x) in enumerate(features) if n not in removed]
+
+
+def test_high_corr_removal():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    n_rows, n_base = 2000, 40
+    base = np.random.randn(n_rows, n_base)
+    # noisy copies of some features, with both signs of correlation, and a constant feature
+    copies = base[:, :15] * np.sign(np.random.randn(15)) + np.random.randn(n_rows, 15) * .1
+    dense = np.hstack([base, copies, copies[:, :5] + np.random.randn(n_rows, 5) * .05, np.ones((n_rows, 1))])
+    features = ['feat_{0}'.format(i) for i in range(dense.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+
+    sp = sparse.random(n_rows, 60, density=.05, random_state=42, format='csc')
+    sp = sparse.hstack([sp, sp[:, :10] * 2, sparse.csc_matrix((n_rows, 1))]).tocsr()
+    sp_features = ['sp_{0}'.format(i) for i in range(sp.shape[1])]
+    sp_roles = {x: NumericRole(np.float32) for x in sp_features}
+
+    for train, feats, rl, dataset_cls in [(dense, features, roles, NumpyDataset),
+                                          (sp, sp_features, sp_roles, CSRSparseDataset)]:
+        ref_pairs, ref_const = _reference_pairs(train, .9)
+        ref_selected = _reference_selection(train, feats, .9)
+        assert len(ref_pairs) > 0 and ref_const.sum() == 1
+        dataset = dataset_cls(train, feats, rl, task=Task('reg'), target=np.random.randn(n_rows),
+                              folds=np.arange(n_rows) % 3)
+
+        for block_size, sketch_size in [(1000, None), (7, None), (7, 1000)]:
+            selector = HighCorrRemoval(corr_co=.9, block_size=block_size, sketch_size=sketch_size)
+            rows, cols, const = selector._get_correlated_pairs(train)
+            assert set(zip(rows, cols)) == ref_pairs, (dataset_cls, block_size, sketch_size)
+            assert (const == ref_const).all()
+
+            selector.perform_selection(FoldsIterator(dataset))
+            assert selector.selected_features == ref_selected, (dataset_cls, block_size, sketch_size)
+
+
+if __name__ == '__main__':
+    test_high_corr_removal()
@@ -0,0 +1,83 @@
+import logging
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.automl.presets.tabular_presets import TabularAutoML
+from lightautoml.tasks import Task
+from lightautoml.utils.memory import MemoryPlanner, get_data_size, get_memory_usage
+
+
+def test_memory_planner():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=20000, n_features=20, n_informative=5, random_state=42)
+    data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+    data['TARGET'] = y.astype(np.float64)
+    n_rows, n_cols, size = get_data_size(data)
+    assert (n_rows, n_cols) == data.shape and size >= data.values.nbytes
+    assert get_memory_usage() > 0
+
+    # without limit nothing is changed
+    planner = MemoryPlanner(None)
+    res, n_jobs, samples = planner.plan_fit(data, {'tuning': 4, 'reader': 4}, 100000, own_data=True)
+    assert res is data and n_jobs == {'tuning': 4, 'reader': 4} and samples == 100000
+    assert planner.plan_predict(data, 4) is None
+
+    # only 5mb are available - jobs are reduced, own data is casted, except target, and subsampled
+    planner = MemoryPlanner((get_memory_usage() + 5 * 2 ** 20) / 2 ** 30, safety_ratio=1, allow_subsample=True,
+                            min_rows=5000)
+    res, n_jobs, samples = planner.plan_fit(data.copy(), {'tuning': 4, 'reader': 4}, 100000, own_data=True,
+                                            exclude=['TARGET'])
+    assert n_jobs == {'tuning': 1, 'reader': 1}
+    assert (res.dtypes.drop('TARGET') == np.float32).all() and res['TARGET'].dtype == np.float64
+    assert 5000 <= res.shape[0] < data.shape[0]
+    assert planner.report()['estimated'] > planner.start_usage / 2 ** 30
+
+    # file is read by single process
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'train.csv')
+        data.to_csv(path, index=False)
+        assert MemoryPlanner(None).plan_read(path, 4) == 4
+        assert MemoryPlanner(get_memory_usage() / 2 ** 30).plan_read(path, 4) == 1
+
+    # automl predicts by batches if data doesn't fit into memory limit, batched predictions are the same
+    train, test = data.iloc[:5000].reset_index(drop=True), data.iloc[5000:].reset_index(drop=True)
+    automl = TabularAutoML(task=Task('binary'), timeout=600, memory_limit=2 ** -16,
+                           general_params={'use_algos': [['lgb']], 'memory_planning': True})
+    automl.fit_predict(train, roles={'target': 'TARGET'})
+    batch_size = automl.memory_planner.plan_predict(test)
+    assert batch_size is not None and batch_size < test.shape[0]
+    pred = automl.predict(test).data
+
+    automl.memory_planner.memory_limit = None
+    assert automl.memory_planner.plan_predict(test) is None
+    assert np.allclose(automl.predict(test).data, pred)
+
+    # memory planning is disabled by default
+    automl = TabularAutoML(task=Task('binary'), timeout=600, memory_limit=2 ** -16,
+                           general_params={'use_algos': [['lgb']]})
+    automl.fit_predict(train, roles={'target': 'TARGET'})
+    assert automl.memory_planner.memory_limit is None and automl.memory_planner.plan_predict(test) is None
+
+    # if train is subsampled, out-of-fold predictions are returned for all rows, rows out of subsample are NaN
+    def estimate_fit(self, *args, **kwargs):
+        return {'roles guess': 0, 'fit': 1.5 * (self.budget - self.start_usage)}
+
+    automl = TabularAutoML(task=Task('binary'), timeout=600,
+                           general_params={'use_algos': [['lgb']], 'memory_planning': True, 'memory_subsample': True})
+    with mock.patch.object(MemoryPlanner, '_estimate_fit', autospec=True, side_effect=estimate_fit):
+        oof = automl.fit_predict(data, roles={'target': 'TARGET'}).data
+    idx = automl.memory_planner.subsample_idx
+    assert idx is not None and 10000 <= len(idx) < data.shape[0]
+    assert oof.shape[0] == data.shape[0]
+    assert not np.isnan(oof[idx]).any() and np.isnan(np.delete(oof, idx, axis=0)).all()
+
+
+if __name__ == '__main__':
+    test_memory_planner()
@@ -0,0 +1,71 @@
+import logging
+import os
+import threading
+from unittest import mock
+
+import numpy as np
+from joblib import delayed
+
+from lightautoml.utils.parallel import get_thread_budget, limit_threads, process_parallel, split_thread_budget, \
+    start_thread, thread_budget, thread_map
+
+
+def _job(x):
+    return x ** 2, get_thread_budget(), threading.current_thread().name
+
+
+def _process_job(x):
+    return x ** 2, os.environ.get('OMP_NUM_THREADS')
+
+
+def test_thread_budget():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    # results should not depend on number of cpus of test machine
+    with mock.patch('os.cpu_count', return_value=8):
+        assert get_thread_budget() == 8
+
+        with thread_budget(4) as n_threads:
+            assert n_threads == get_thread_budget() == 4
+            assert split_thread_budget(2) == (2, 2)
+            assert split_thread_budget(-1) == (4, 1)
+            assert split_thread_budget(3) == (3, 1)
+            assert split_thread_budget(4, n_threads=2) == (2, 1)
+            assert limit_threads(0) == 4 and limit_threads(16) == 4 and limit_threads(2) == 2
+
+            # budget can only be decreased by nested contexts
+            with thread_budget(16) as nested:
+                assert nested == 4
+            with thread_budget(1):
+                assert get_thread_budget() == 1
+            assert get_thread_budget() == 4
+
+            # threads get equal shares of budget, results are in the order of input
+            data = list(range(20))
+            res = thread_map(_job, data, n_jobs=2)
+            assert [x[0] for x in res] == [x ** 2 for x in data]
+            assert all(x[1] == 2 for x in res)
+
+            # serial processing runs in current thread
+            res = thread_map(_job, data, n_jobs=1)
+            assert all(x[1] == 4 and x[2] == threading.current_thread().name for x in res)
+
+            # new thread inherits budget
+            result = []
+            thread = start_thread(lambda: result.append(get_thread_budget()))
+            thread.join()
+            assert result == [4]
+
+            # processes get their share of budget as native threads limit, workers are reused inside context
+            with process_parallel(2) as parallel:
+                res = parallel(delayed(_process_job)(x) for x in data)
+                res2 = parallel(delayed(_process_job)(x) for x in data)
+            assert [x[0] for x in res] == [x[0] for x in res2] == [x ** 2 for x in data]
+            assert all(x[1] == '2' for x in res)
+
+        assert get_thread_budget() == 8
+
+
+if __name__ == '__main__':
+    test_thread_budget()
@@ -0,0 +1,67 @@
+import logging
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.automl.presets.tabular_presets import TabularAutoML
+from lightautoml.tasks import Task
+from lightautoml.utils.cache import RunCache, get_fingerprint
+from lightautoml.utils.parallel import start_thread
+
+
+def test_run_cache():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+    data['cat'] = np.random.choice(['a', 'b', 'c'], size=data.shape[0])
+    data['TARGET'] = y
+    train, test = data.iloc[:2000].reset_index(drop=True), data.iloc[2000:].reset_index(drop=True)
+
+    # fingerprint depends on values only
+    assert get_fingerprint(train) == get_fingerprint(train.copy())
+    changed = train.copy()
+    changed.loc[0, 'feat_0'] += 1
+    assert get_fingerprint(changed) != get_fingerprint(train)
+    assert get_fingerprint({'data': X, 'target': y}) == get_fingerprint({'target': y.copy(), 'data': X.copy()})
+
+    # concurrent requests of the same key are computed once
+    cache = RunCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    threads = [start_thread(cache.get_or_compute, 'key', compute) for _ in range(4)]
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and cache.get_or_compute('key', compute) == 1
+    assert (cache.misses, cache.hits) == (1, 4)
+    assert len(pickle.loads(pickle.dumps(cache))) == 0
+    cache.clear()
+    assert len(cache) == 0
+
+    # automl fitted with results of another run has the same predictions as automl fitted from scratch
+    def fit(run_cache, algo):
+        automl = TabularAutoML(task=Task('binary'), timeout=600, general_params={'use_algos': [[algo]]})
+        automl.set_run_cache(run_cache)
+        oof = automl.fit_predict(train, roles={'target': 'TARGET'})
+        return oof.data, automl.predict(test).data
+
+    ref = {algo: fit(None, algo) for algo in ['lgb', 'linear_l2']}
+
+    cache = RunCache()
+    for algo in ['lgb', 'linear_l2']:
+        oof, pred = fit(cache, algo)
+        assert np.allclose(oof, ref[algo][0], equal_nan=True)
+        assert np.allclose(pred, ref[algo][1])
+    logging.debug('Run cache: {0} results, {1} hits'.format(len(cache), cache.hits))
+    assert len(cache) > 0 and cache.hits > 0
+
+
+if __name__ == '__main__':
+    test_run_cache()
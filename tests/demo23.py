@@ -0,0 +1,89 @@
+import logging
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.automl.presets.tabular_presets import TabularAutoML
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer, RuntimeCostModel, get_cost_model
+
+
+def test_runtime_cost_model():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    model = RuntimeCostModel(max_history=50)
+    assert model.predict('lgb', 1000, 10, 100, 1) is None
+
+    # single observation is extrapolated by prior - linear complexity and sublinear speed up with threads
+    model.update('lgb', 1000, 10, fit_time=2., n_iters=100, n_threads=1)
+    assert np.isclose(model.predict('lgb', 1000, 10, 100, 1), 2.)
+    assert np.isclose(model.predict('lgb', 4000, 10, 100, 1), 8.)
+    assert np.isclose(model.predict('lgb', 1000, 10, 100, 4), 1.)
+    assert model.predict('cb', 1000, 10, 100, 1) is None
+
+    # slopes are fitted to history - quadratic complexity of rows
+    for _ in range(60):
+        n_rows, n_cols, n_iters = np.random.randint(1000, 100000), np.random.randint(10, 100), 100
+        fit_time = 1e-9 * n_rows ** 2 * n_cols * np.exp(np.random.randn() * .05)
+        model.update('knn', n_rows, n_cols, fit_time=fit_time, n_iters=n_iters)
+    assert len(model.history['knn']) == 50
+    pred, real = model.predict('knn', 50000, 50, 100), 1e-9 * 50000 ** 2 * 50
+    assert abs(np.log(pred / real)) < .2, (pred, real)
+
+    # history is kept by pickling and saved to json file
+    assert np.isclose(pickle.loads(pickle.dumps(model)).predict('knn', 50000, 50, 100), pred)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'history.json')
+        model.save(path)
+        loaded = RuntimeCostModel(path, max_history=50)
+        assert np.isclose(loaded.predict('knn', 50000, 50, 100), pred)
+        assert np.isclose(loaded.predict('lgb', 4000, 10, 100, 1), 8.)
+
+        # timers with the same history path share cost model
+        assert get_cost_model(path) is get_cost_model(os.path.join(tmp_dir, '.', 'history.json'))
+        assert PipelineTimer(cost_model=True, history_path=path).cost_model is get_cost_model(path)
+        # without path history is not shared
+        assert PipelineTimer(cost_model=True).cost_model is not PipelineTimer(cost_model=True).cost_model
+        # cost model is disabled by default
+        assert PipelineTimer().cost_model is None and PipelineTimer(history_path=path).cost_model is None
+
+        # fold times of previous run are used to predict folds of the next run
+        X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+        data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+        data['TARGET'] = y
+        history_path = os.path.join(tmp_dir, 'automl_history.json')
+        preds = []
+        for _ in range(2):
+            automl = TabularAutoML(task=Task('binary'), timeout=600, general_params={'use_algos': [['lgb']]},
+                                   timing_params={'cost_model': True, 'history_path': history_path})
+            preds.append(automl.fit_predict(data, roles={'target': 'TARGET'}).data)
+            assert os.path.exists(history_path)
+        report = automl.timer.report()
+        logging.debug('Fit time report:\n{0}'.format(report))
+        assert report is not None and report['folds'].sum() > 0
+        assert (report['predicted'] > 0).all()
+        # planning by predicted time doesn't change models if time is enough
+        assert np.allclose(preds[0], preds[1])
+
+    # folds are skipped by predicted time only if cost model is enabled
+    for cost_model in [False, True]:
+        timer = PipelineTimer(10, cost_model=cost_model).start().get_task_timer('lgb').start()
+        # previous fold took longer than time left
+        timer.pipe_timer.run_info['lgb'] = [60.]
+        assert not timer.time_limit_exceeded()
+        assert timer.time_limit_expected() == cost_model
+
+    # default automl computes all folds, as without cost model
+    automl = TabularAutoML(task=Task('binary'), timeout=600, general_params={'use_algos': [['lgb']]})
+    automl.fit_predict(data, roles={'target': 'TARGET'})
+    assert automl.timer.cost_model is None
+    assert [len(x.models) for level in automl.levels for pipe in level for x in pipe.ml_algos] == [5]
+
+
+if __name__ == '__main__':
+    test_runtime_cost_model()
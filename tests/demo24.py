@@ -0,0 +1,48 @@
+import logging
+
+import numpy as np
+from scipy import sparse
+from sklearn.datasets import make_regression
+
+from lightautoml.ml_algo.torch_based.linear_model import TorchBasedLinearRegression
+
+
+def _mse_score(y_true, y_pred, sample_weight=None):
+    return -np.average((y_true - y_pred[:, 0]) ** 2, weights=sample_weight)
+
+
+def _fit(X, y, **kwargs):
+    model = TorchBasedLinearRegression(data_size=X.shape[1], loss=None, metric=_mse_score, **kwargs)
+    # without validation data model is fitted with C = 1
+    model.fit(X, y)
+    return model
+
+
+def test_linear_mini_batch():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_regression(n_samples=2000, n_features=20, n_informative=10, noise=5, random_state=42)
+    X, y = X.astype(np.float32), (y / y.std()).astype(np.float32)
+
+    full = _fit(X, y)
+    ref_pred = full.predict(X)
+
+    # batch size larger than data - the same full-batch L-BFGS
+    assert np.allclose(_fit(X, y, batch_size=5000).predict(X), ref_pred)
+
+    # batched inference of the same model gives the same predictions
+    full.batch_size = 300
+    assert np.allclose(full.predict(X), ref_pred, atol=1e-5)
+
+    # mini-batch training converges to the solution of full-batch L-BFGS
+    for data in [X, sparse.csr_matrix(X)]:
+        model = _fit(data, y, batch_size=256, n_epochs=100, lr=.05, tol=1e-6)
+        pred = model.predict(data)
+        rel_err = np.sqrt(((pred - ref_pred) ** 2).mean() / ref_pred.var())
+        logging.debug('Relative difference of mini-batch and full-batch solutions: {0:.4f}'.format(rel_err))
+        assert rel_err < .02, rel_err
+
+
+if __name__ == '__main__':
+    test_linear_mini_batch()
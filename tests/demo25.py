@@ -0,0 +1,70 @@
+import logging
+import pickle
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import CategoryRole, NumericRole
+from lightautoml.ml_algo.linear_sklearn import LinearLBFGS
+from lightautoml.ml_algo.torch_based.linear_model import PreparedDataCache
+from lightautoml.tasks import Task
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_linear_prepared_data():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    # data is converted once for the same array, while it is alive
+    cache = PreparedDataCache(max_size=2)
+    calls = []
+
+    def convert(x):
+        calls.append(1)
+        return x.sum()
+
+    arrays = [np.random.rand(10) for _ in range(3)]
+    assert cache.get(arrays[0], convert) == cache.get(arrays[0], convert) == arrays[0].sum()
+    assert len(calls) == 1
+    cache.get(arrays[1], convert)
+    cache.get(arrays[2], convert)
+    cache.get(arrays[0], convert)
+    # the oldest array is dropped if cache is full
+    assert len(calls) == 4
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    cats = np.random.randint(0, 5, size=(X.shape[0], 2))
+    data = np.hstack([X[:, :5], cats[:, :1], X[:, 5:], cats[:, 1:]]).astype(np.float32)
+    features = ['feat_{0}'.format(i) for i in range(data.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    roles['feat_5'] = roles['feat_11'] = CategoryRole(np.float32, label_encoded=True)
+    dataset = NumpyDataset(data, features, roles, task=Task('binary'), target=y, folds=np.arange(data.shape[0]) % 3)
+    train, test = dataset[:2000], dataset[2000:]
+
+    ml_algo = LinearLBFGS()
+    oof = ml_algo.fit_predict(FoldsIterator(train))
+    pred = ml_algo.predict(test).data
+
+    # numeric and categorical blocks are the same as direct conversion
+    model = ml_algo.models[0]
+    numbers, categories = model._prepare_data(test.data)
+    num_idx = [n for n in range(data.shape[1]) if n not in (5, 11)]
+    assert np.array_equal(numbers.numpy(), test.data[:, num_idx])
+    assert numbers.dtype.is_floating_point and not categories.dtype.is_floating_point
+    assert np.array_equal(categories.numpy(), test.data[:, [5, 11]].astype(np.int64))
+
+    # models shared cache in predict and dropped it after, predictions are the same as without cache
+    assert all(x.cache is None for x in ml_algo.models)
+    ref_pred = np.mean([x.predict(test.data) for x in ml_algo.models], axis=0)
+    assert np.allclose(pred[:, 0], ref_pred)
+    for n, (idx, _, valid) in enumerate(FoldsIterator(train)):
+        assert np.allclose(oof.data[idx, 0], ml_algo.models[n].predict(valid.data))
+
+    # cache is not saved with model
+    model.cache = PreparedDataCache()
+    assert pickle.loads(pickle.dumps(model)).cache is None
+
+
+if __name__ == '__main__':
+    test_linear_prepared_data()
@@ -0,0 +1,105 @@
+import logging
+import os
+import tempfile
+from functools import partial
+
+import numpy as np
+import torch
+from transformers import BertTokenizer
+
+from lightautoml.text.nn_model import LengthBucketBatchSampler, TokenizedTextCache, UniversalDataset
+from lightautoml.text.utils import collate_dict
+
+
+def _get_tokenizer(tmp_dir, words):
+    # pad token is not the first one, so padding value is checked
+    vocab = ['[UNK]', '[CLS]', '[SEP]', '[PAD]', '[MASK]'] + words
+    path = os.path.join(tmp_dir, 'vocab.txt')
+    with open(path, 'w') as f:
+        f.write('\n'.join(vocab))
+
+    return BertTokenizer(path)
+
+
+def test_pretokenized_text():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    words = ['word{0}'.format(i) for i in range(50)]
+    # texts of different length, pairs of sentences, texts longer than max_length and duplicates
+    texts = [' '.join(np.random.choice(words, np.random.randint(1, 30))) for _ in range(150)]
+    texts += ['{0} [SEP] {1}'.format(texts[i], texts[i + 1]) for i in range(20)]
+    texts += texts[:30]
+    texts = np.array(texts, dtype=object)
+    n, max_length = texts.shape[0], 24
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tokenizer = _get_tokenizer(tmp_dir, words)
+    cache = TokenizedTextCache(tokenizer, max_length)
+    assert cache.pad_token_id == 3
+
+    tokens = cache.pack(texts)
+    assert len(cache) == len(set(texts))
+    # the same texts are not encoded again
+    tokens_2 = cache.pack(texts[::-1])
+    assert len(cache) == len(set(texts))
+    assert np.array_equal(np.diff(tokens_2['offsets']), np.diff(tokens['offsets'])[::-1])
+
+    data, y = {'text': texts[:, np.newaxis]}, np.arange(n, dtype=np.float32)
+    reference = UniversalDataset(data, y, tokenizer=tokenizer, max_length=max_length)
+    padded = UniversalDataset(data, y, tokenizer=tokenizer, max_length=max_length, tokens=tokens,
+                              pad_token_id=cache.pad_token_id)
+    dynamic = UniversalDataset(data, y, tokenizer=tokenizer, max_length=max_length, tokens=tokens,
+                               pad_token_id=cache.pad_token_id, dynamic_padding=True)
+    assert reference.lengths is None and dynamic.lengths.max() == max_length
+
+    # pretokenized texts padded to max_length are the same as encoded with padding
+    for i in range(n):
+        ref, res = reference[i], padded[i]
+        assert set(ref.keys()) == set(res.keys())
+        for key in ref:
+            assert np.array_equal(np.asarray(ref[key]), np.asarray(res[key])), (i, key)
+
+    # batches with dynamic padding are cut to the longest sequence in batch
+    collate_fn = partial(collate_dict, pad_token_id=cache.pad_token_id)
+    ref_loader = torch.utils.data.DataLoader(reference, batch_size=16, collate_fn=collate_dict)
+    loader = torch.utils.data.DataLoader(dynamic, batch_size=16, collate_fn=collate_fn)
+    for ref, res in zip(ref_loader, loader):
+        length = res['input_ids'].shape[1]
+        assert length == res['attention_mask'].sum(dim=1).max()
+        for key in ref:
+            assert torch.equal(ref[key][:, :length] if ref[key].dim() > 1 else ref[key], res[key]), key
+
+    # every sample is used once per epoch, batches contain texts of similar length
+    lengths = dynamic.lengths
+    sampler = LengthBucketBatchSampler(lengths, batch_size=8, bucket_size=5)
+    epochs = [list(sampler) for _ in range(2)]
+    for batches in epochs:
+        assert len(batches) == len(sampler)
+        assert all(len(x) <= 8 for x in batches)
+        assert sorted(sum(batches, [])) == list(range(n))
+    assert epochs[0] != epochs[1]
+
+    random_batches = np.array_split(np.random.permutation(n), len(sampler))
+    padding = sum(lengths[x].max() * len(x) - lengths[x].sum() for x in epochs[0])
+    random_padding = sum(lengths[x].max() * len(x) - lengths[x].sum() for x in random_batches)
+    logging.debug('Pad tokens with buckets: {0}, random: {1}'.format(padding, random_padding))
+    assert padding < random_padding
+
+    batches = list(LengthBucketBatchSampler(lengths, batch_size=8, shuffle=False))
+    assert sum(batches, []) == list(range(n))
+
+    loader = torch.utils.data.DataLoader(dynamic, batch_sampler=sampler, collate_fn=collate_fn)
+    assert sorted(torch.cat([x['label'] for x in loader]).long().tolist()) == list(range(n))
+
+    # workers kept alive between epochs produce the same batches as main process
+    ref = [x['input_ids'] for x in torch.utils.data.DataLoader(dynamic, batch_size=16, collate_fn=collate_fn)]
+    loader = torch.utils.data.DataLoader(dynamic, batch_size=16, collate_fn=collate_fn, num_workers=2,
+                                         persistent_workers=True)
+    for _ in range(2):
+        res = [x['input_ids'] for x in loader]
+        assert len(res) == len(ref) and all(torch.equal(x, z) for (x, z) in zip(ref, res))
+
+
+if __name__ == '__main__':
+    test_pretokenized_text()
@@ -0,0 +1,50 @@
+import logging
+import threading
+from unittest import mock
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_cb import BoostCB
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_parallel_fold_predict():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 3)
+    train, test = dataset[:2000], dataset[2000:]
+
+    # results should not depend on number of cpus of test machine
+    with mock.patch('os.cpu_count', return_value=8):
+        for ml_algo in [BoostLGBM(default_params={'num_trees': 100, 'num_threads': 4}),
+                        BoostCB(default_params={'num_trees': 100, 'thread_count': 4})]:
+            ml_algo.timer = PipelineTimer(600).start().get_task_timer(ml_algo.name).start()
+            ml_algo.fit_predict(FoldsIterator(train))
+            ref_pred = ml_algo.predict(test).data
+
+            # fold models predict in separate threads
+            names = []
+            predict_single_fold = ml_algo.predict_single_fold
+
+            def predict_fold(*args, **kwargs):
+                names.append(threading.current_thread().name)
+                return predict_single_fold(*args, **kwargs)
+
+            ml_algo.predict_single_fold = predict_fold
+            pred = ml_algo.set_predict_n_jobs(3).predict(test).data
+            assert len(names) == 3 and threading.current_thread().name not in names, names
+            assert np.allclose(pred, ref_pred, atol=1e-6), ml_algo.name
+
+
+if __name__ == '__main__':
+    test_parallel_fold_predict()
@@ -0,0 +1,51 @@
+import logging
+
+import numpy as np
+import optuna
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_cb import BoostCB
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.ml_algo.tuning.optuna import OptunaTuner
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_tuning_pruning():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 3)
+
+    # no early stopping, so every completed trial reports all rounds
+    for ml_algo in [BoostLGBM(default_params={'num_trees': 300, 'early_stopping_rounds': 300}),
+                    BoostCB(default_params={'num_trees': 300, 'od_wait': 300})]:
+        ml_algo.timer = PipelineTimer(600).start().get_task_timer(ml_algo.name).start()
+        tuner = OptunaTuner(n_trials=20, timeout=600, pruner='median')
+        tuner.fit(ml_algo, FoldsIterator(dataset))
+
+        trials = tuner.study.trials
+        pruned = [x for x in trials if x.state == optuna.trial.TrialState.PRUNED]
+        completed = [x for x in trials if x.state == optuna.trial.TrialState.COMPLETE]
+        assert len(pruned) > 0 and len(completed) > 0, ml_algo.name
+
+        # pruned trials stop after warmup rounds, before the end of training
+        assert all(100 <= max(x.intermediate_values) < 290 for x in pruned), ml_algo.name
+
+        # intermediate scores have the direction of the study: the last one is close to the score of trial
+        for trial in completed:
+            last = trial.intermediate_values[max(trial.intermediate_values)]
+            assert abs(last - trial.value) < 0.01, (ml_algo.name, last, trial.value)
+
+        best = max(completed, key=lambda x: x.value)
+        assert tuner.best_params == best.params, ml_algo.name
+
+
+if __name__ == '__main__':
+    test_tuning_pruning()
@@ -0,0 +1,54 @@
+import logging
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_clone_fitted_algo():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 3)
+    train, test = dataset[:2000], dataset[2000:]
+
+    ml_algo = BoostLGBM(timer=PipelineTimer(600).start().get_task_timer('lgb').start(),
+                        default_params={'num_trees': 100})
+    ml_algo.set_fold_rounds_scale(1.1)
+    ml_algo.fit_predict(FoldsIterator(train))
+    ml_algo.compile_models()
+    ml_algo.set_init_model(ml_algo.models[0], ml_algo.features)
+    ml_algo.set_first_fold_source(object())
+    ref_pred = ml_algo.predict(test).data
+
+    # clone doesn't share state of fitted models and warm start with original algo
+    new_algo = ml_algo.clone()
+    assert new_algo.models == [] and new_algo._fold_rounds is None and new_algo._compiled is None
+    assert new_algo._init_model is None and new_algo._first_fold_source is None
+    assert new_algo.fold_rounds_scale == ml_algo.fold_rounds_scale and new_algo.params == ml_algo.params
+    assert ml_algo._compiled is not None and ml_algo._init_model is not None
+
+    # clone fitted on other data predicts with its own models, fold rounds come from its own first fold
+    new_algo.set_timer(PipelineTimer(600).start().get_task_timer('lgb').start())
+    new_algo.fit_predict(FoldsIterator(train[:1000]))
+    pred = new_algo.predict(test).data
+    own_pred = np.mean([x.predict(test.data) for x in new_algo.models], axis=0)
+    assert np.allclose(pred[:, 0], own_pred, atol=1e-6)
+    assert not np.allclose(pred, ref_pred)
+    assert new_algo._fold_rounds == max(1, int(round(new_algo.models[0].best_iteration * 1.1)))
+
+    # original algo is not changed
+    assert np.allclose(ml_algo.predict(test).data, ref_pred)
+
+
+if __name__ == '__main__':
+    test_clone_fitted_algo()
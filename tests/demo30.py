@@ -0,0 +1,68 @@
+import logging
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+import optuna
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.ml_algo.tuning.optuna import OptunaTuner, STORAGE_NAME
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def _get_algo():
+    return BoostLGBM(timer=PipelineTimer(600).start().get_task_timer('lgb').start(),
+                     default_params={'num_trees': 50})
+
+
+def test_tuning_storage():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 3)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # the first run starts the history
+        tuner = OptunaTuner(n_trials=5, timeout=600, storage_dir=tmp_dir, warm_start_trials=2)
+        tuner.fit(_get_algo(), FoldsIterator(dataset))
+        assert os.path.exists(os.path.join(tmp_dir, STORAGE_NAME))
+        first = tuner.study.trials
+        assert len(first) == 5
+        best_first = sorted([x for x in first if x.state == optuna.trial.TrialState.COMPLETE],
+                            key=lambda x: -x.value)
+
+        # the second run continues the same study and evaluates best params of the first run first
+        tuner = OptunaTuner(n_trials=3, timeout=600, storage_dir=tmp_dir, warm_start_trials=2)
+        tuner.fit(_get_algo(), FoldsIterator(dataset))
+        trials = tuner.study.trials
+        assert len(trials) == 8
+        assert [x.params for x in trials[5:7]] == [x.params for x in best_first[:2]]
+        # best params are chosen from trials of current run
+        assert tuner.best_params == max(trials[5:], key=lambda x: x.value).params
+
+        # no trial of current run is completed - best params of the history are used
+        with mock.patch.object(BoostLGBM, 'fit_predict', side_effect=optuna.exceptions.TrialPruned()):
+            tuner = OptunaTuner(n_trials=2, timeout=600, storage_dir=tmp_dir)
+            assert tuner.fit(_get_algo(), FoldsIterator(dataset)) == (None, None)
+        assert tuner.best_params == tuner.study.best_params == max(trials, key=lambda x: x.value).params
+
+        # new study without completed trials - default params are used
+        with mock.patch.object(BoostLGBM, 'fit_predict', side_effect=optuna.exceptions.TrialPruned()):
+            tuner = OptunaTuner(n_trials=2, timeout=600, storage_dir=os.path.join(tmp_dir, 'new'))
+            ml_algo = _get_algo()
+            assert tuner.fit(ml_algo, FoldsIterator(dataset)) == (None, None)
+        assert all(x.state == optuna.trial.TrialState.PRUNED for x in tuner.study.trials)
+        assert tuner.best_params == ml_algo.init_params_on_input(FoldsIterator(dataset))
+
+
+if __name__ == '__main__':
+    test_tuning_storage()
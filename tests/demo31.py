@@ -0,0 +1,52 @@
+import logging
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_cb import BoostCB
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_fold_rounds_scale():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=3000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 4)
+
+    # early stopping is triggered long before the limit of trees
+    for ml_algo, get_rounds in [
+        (BoostLGBM(default_params={'num_trees': 3000, 'early_stopping_rounds': 20, 'learning_rate': 0.3}),
+         lambda x: x.current_iteration()),
+        (BoostCB(default_params={'num_trees': 3000, 'od_wait': 20, 'learning_rate': 0.3}),
+         lambda x: x.tree_count_)
+    ]:
+        ml_algo.timer = PipelineTimer(600).start().get_task_timer(ml_algo.name).start()
+        ml_algo.set_fold_rounds_scale(1.25)
+        oof = ml_algo.fit_predict(FoldsIterator(dataset))
+        assert len(ml_algo.models) == 4 and not np.isnan(oof.data).any()
+
+        # the first fold is early stopped, others are trained for scaled number of its rounds
+        first = get_rounds(ml_algo.models[0])
+        assert first < 3000
+        rounds = max(1, int(round(first * 1.25)))
+        assert ml_algo._fold_rounds == rounds, (ml_algo.name, first, ml_algo._fold_rounds)
+        assert all(get_rounds(x) == rounds for x in ml_algo.models[1:]), ml_algo.name
+
+        # without scale every fold is early stopped independently
+        new_algo = ml_algo.clone().set_fold_rounds_scale(None)
+        new_algo.set_timer(PipelineTimer(600).start().get_task_timer(ml_algo.name).start())
+        new_algo.fit_predict(FoldsIterator(dataset))
+        assert new_algo._fold_rounds is None
+        assert len(set(get_rounds(x) for x in new_algo.models)) > 1, ml_algo.name
+
+
+if __name__ == '__main__':
+    test_fold_rounds_scale()
@@ -0,0 +1,85 @@
+import logging
+from copy import deepcopy
+from unittest import mock
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.datasets import make_classification, make_regression
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.linear_sklearn import LinearL1CD
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def _fit_path(ml_algo, train, valid):
+    """Regularization path, where every best model is copied, as it was done before warm start of the path."""
+    base_model, cs, l1_ratios, early_stopping = ml_algo._infer_params()
+    loss = ml_algo.task.losses['sklearn']
+    train_target, train_weight = loss.fw_func(train.target, train.weights)
+    valid_target, valid_weight = loss.fw_func(valid.target, valid.weights)
+    train_data, valid_data = train.data.astype(np.float64), valid.data.astype(np.float64)
+
+    best_score, best_model = -np.inf, None
+    for l1_ratio in sorted(l1_ratios, reverse=True):
+        model = clone(base_model)
+        model.set_params(l1_ratio=l1_ratio)
+        c_best_score, c_best_model, es = -np.inf, None, 0
+        for n, c in enumerate(cs):
+            ml_algo._set_c(model, c)
+            model.fit(train_data, train_target, train_weight)
+            if np.allclose(model.coef_, 0) and n < len(cs) - 1:
+                continue
+
+            score = loss.metric_func(valid_target, ml_algo._predict_w_model_type(model, valid_data), valid_weight)
+            if score >= c_best_score:
+                c_best_score, c_best_model, es = score, deepcopy(model), 0
+            else:
+                es += 1
+            if es >= early_stopping or (model.coef_ != 0).all():
+                break
+
+        if c_best_model is not None and c_best_score >= best_score:
+            best_score, best_model = c_best_score, c_best_model
+
+    return best_model
+
+
+def test_linear_l1_path():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=20, n_informative=5, random_state=42)
+    X_reg, y_reg = make_regression(n_samples=2000, n_features=20, n_informative=5, noise=10, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    roles = {x: NumericRole(np.float32) for x in features}
+    folds = np.arange(X.shape[0]) % 2
+
+    for task, data, target in [('binary', X, y), ('reg', X_reg, y_reg)]:
+        dataset = NumpyDataset(data.astype(np.float32), features, roles, task=Task(task), target=target, folds=folds)
+        ml_algo = LinearL1CD(timer=PipelineTimer(600).start().get_task_timer('linear').start(),
+                             default_params={'l1_ratios': (1, .5, .1), 'max_iter': 1000})
+        oof = ml_algo.fit_predict(FoldsIterator(dataset))
+
+        # warm started path selects the same models as the path that copies every best model,
+        # coefficients are equal up to tolerance of solver
+        for n, (idx, train, valid) in enumerate(FoldsIterator(dataset)):
+            ref_model = _fit_path(ml_algo, train, valid)
+            model = ml_algo.models[n]
+            assert model.get_params() == ref_model.get_params(), task
+            assert np.allclose(model.coef_, ref_model.coef_, atol=1e-3), task
+            assert np.allclose(model.intercept_, ref_model.intercept_, atol=1e-3), task
+            ref_pred = ml_algo._predict_w_model_type(ref_model, valid.data.astype(np.float64))
+            assert np.allclose(oof.data[idx, 0], ref_pred, atol=1e-3), task
+
+        # if metric is NaN on every path point, the last fitted model is used
+        with mock.patch.object(dataset.task.losses['sklearn'], 'metric_func', return_value=np.nan):
+            ml_algo = LinearL1CD(timer=PipelineTimer(600).start().get_task_timer('linear').start())
+            oof = ml_algo.fit_predict(FoldsIterator(dataset))
+        assert len(ml_algo.models) == 2 and not np.isnan(oof.data).any(), task
+
+
+if __name__ == '__main__':
+    test_linear_l1_path()
@@ -0,0 +1,100 @@
+import logging
+from unittest import mock
+
+import numpy as np
+from pandas import Series
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.pipelines.features.base import FeaturesPipeline
+from lightautoml.pipelines.selection.base import ImportanceEstimator
+from lightautoml.pipelines.selection.permutation_importance_based import NpIterativeFeatureSelector
+from lightautoml.tasks import Task
+from lightautoml.transformers.base import ColumnsSelector
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+class _IdentityFeatures(FeaturesPipeline):
+
+    def create_pipeline(self, train):
+        return ColumnsSelector(train.features)
+
+
+class _FixedImportance(ImportanceEstimator):
+
+    def __init__(self, importances):
+        super().__init__()
+        self.raw_importances = importances
+
+    def fit(self, *args, **kwargs):
+        pass
+
+
+def test_iterative_selection():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    # informative features go first, then noise
+    X, y = make_classification(n_samples=3000, n_features=5, n_informative=5, n_redundant=0, random_state=42)
+    X = np.hstack([X, np.random.randn(X.shape[0], 20)]).astype(np.float32)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X, features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 3)
+    importances = Series(np.arange(len(features))[::-1], index=features, dtype=float)
+
+    def get_selector(**kwargs):
+        ml_algo = BoostLGBM(timer=PipelineTimer(600).start().get_task_timer('lgb').start(),
+                            default_params={'num_trees': 100})
+        return NpIterativeFeatureSelector(_IdentityFeatures(), ml_algo, _FixedImportance(importances),
+                                          feature_group_size=5, tol=0.005, **kwargs)
+
+    # selector fits ml_algo on all features, then on every checked group,
+    # noise groups don't improve score, so selection stops after patience groups without gain
+    selector = get_selector(patience=2)
+    with mock.patch.object(BoostLGBM, 'fit_predict', autospec=True, side_effect=BoostLGBM.fit_predict) as fit:
+        selector.fit(FoldsIterator(dataset))
+    assert fit.call_count == 1 + 3
+    assert selector.selected_features == features[:5]
+
+    # without patience every group is checked
+    selector = get_selector()
+    with mock.patch.object(BoostLGBM, 'fit_predict', autospec=True, side_effect=BoostLGBM.fit_predict) as fit:
+        selector.fit(FoldsIterator(dataset))
+    assert fit.call_count == 1 + 5
+    assert selector.selected_features == features[:5]
+
+    # warm start: every group continues boosting from the model of the best features set,
+    # that is remapped to superset of features
+    init_models = []
+    _get_init_model = BoostLGBM._get_init_model
+
+    def get_init_model(self):
+        model = _get_init_model(self)
+        init_models.append((model, list(self.features)))
+        return model
+
+    selector = get_selector(patience=2, warm_start=True)
+    with mock.patch.object(BoostLGBM, 'set_init_model', autospec=True, side_effect=BoostLGBM.set_init_model) as init, \
+            mock.patch.object(BoostLGBM, '_get_init_model', autospec=True, side_effect=get_init_model):
+        selector.fit(FoldsIterator(dataset))
+    assert selector.selected_features == features[:5]
+
+    # model on all features and the first group start from scratch, next groups - from the best model
+    assert len(init_models) == 4 and init_models[0][0] is None and init_models[1][0] is None
+    assert init.call_count == 2
+    best_model, best_features = init.call_args_list[0][0][1:]
+    assert sorted(best_features) == features[:5]
+
+    data = dataset[:100]
+    ref_pred = best_model.predict(data[:, best_features].data, raw_score=True)
+    for model, model_features in init_models[2:]:
+        # remapped booster ignores added features and predicts as the best model
+        assert set(best_features) < set(model_features) and model.num_feature() == len(model_features)
+        assert np.allclose(model.predict(data[:, model_features].data, raw_score=True), ref_pred, atol=1e-6)
+
+
+if __name__ == '__main__':
+    test_iterative_selection()
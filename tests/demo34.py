@@ -0,0 +1,52 @@
+import logging
+from unittest import mock
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from lightautoml.dataset.np_pd_dataset import NumpyDataset
+from lightautoml.dataset.roles import NumericRole
+from lightautoml.ml_algo.boost_lgbm import BoostLGBM
+from lightautoml.ml_algo.tuning.optuna import OptunaTuner
+from lightautoml.pipelines.ml.nested_ml_pipe import NestedTabularMLAlgo
+from lightautoml.tasks import Task
+from lightautoml.utils.timer import PipelineTimer
+from lightautoml.validation.np_iterators import FoldsIterator
+
+
+def test_parallel_nested_cv():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=10, n_informative=5, random_state=42)
+    features = ['feat_{0}'.format(i) for i in range(X.shape[1])]
+    dataset = NumpyDataset(X.astype(np.float32), features, {x: NumericRole(np.float32) for x in features},
+                           task=Task('binary'), target=y, folds=np.arange(X.shape[0]) % 5)
+
+    results = {}
+    # results should not depend on number of cpus of test machine
+    with mock.patch('os.cpu_count', return_value=8):
+        for n_jobs in [1, 2]:
+            ml_algo = BoostLGBM(timer=PipelineTimer(600).start().get_task_timer('lgb').start(),
+                                default_params={'num_trees': 50, 'num_threads': 2})
+            tuner = OptunaTuner(n_trials=3, timeout=600)
+            nested = NestedTabularMLAlgo(ml_algo, tuner, cv=3, n_jobs=n_jobs)
+            oof = nested.fit_predict(FoldsIterator(dataset))
+            results[n_jobs] = (oof.data, tuner.best_params, [x.params for x in nested.models])
+
+    oof, best_params, models_params = results[1]
+    par_oof, par_best_params, par_models_params = results[2]
+
+    # params are tuned on the first fold and reused by others, which are fitted by pairs and share threads,
+    # shared tuner is not changed by threads limit
+    assert best_params == par_best_params and 'num_threads' not in par_best_params
+    assert models_params[0] == par_models_params[0]
+    for params, par_params in zip(models_params[1:], par_models_params[1:]):
+        assert params['num_threads'] == 2 and par_params['num_threads'] == 1
+        assert {**params, 'num_threads': 1} == par_params
+
+    assert np.allclose(oof, par_oof, atol=1e-5)
+
+
+if __name__ == '__main__':
+    test_parallel_nested_cv()
@@ -0,0 +1,62 @@
+import logging
+import os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_classification
+
+from lightautoml.addons.utilization.utilization import TimeUtilization
+from lightautoml.automl.presets.tabular_presets import TabularUtilizedAutoML, _base_dir
+from lightautoml.tasks import Task
+
+
+def test_parallel_utilization():
+    np.random.seed(42)
+    logging.basicConfig(format='[%(asctime)s] (%(levelname)s): %(message)s', level=logging.DEBUG)
+
+    X, y = make_classification(n_samples=2000, n_features=10, n_informative=5, random_state=42)
+    data = pd.DataFrame(X, columns=['feat_{0}'.format(i) for i in range(X.shape[1])])
+    data['TARGET'] = y
+    configs_list = [os.path.join(_base_dir, 'tabular_configs', x) for x in
+                    ['conf_0_sel_type_0.yml', 'conf_4_sel_type_0_no_int.yml']]
+
+    def fit_predict(n_jobs, configs):
+        # runs are grouped by configs before blending
+        groups = []
+        fit_parallel, fit_sequential = TimeUtilization._fit_predict_parallel, TimeUtilization._fit_predict_sequential
+
+        def wrap(func):
+            def wrapped(*args, **kwargs):
+                amls, aml_preds = func(*args, **kwargs)
+                groups.append(([len(x) for x in amls], [[x.shape for x in preds] for preds in aml_preds]))
+                return amls, aml_preds
+
+            return wrapped
+
+        automl = TabularUtilizedAutoML(task=Task('binary'), timeout=600, cpu_limit=2, configs_list=configs,
+                                       max_runs_per_config=2, drop_last=False, n_jobs=n_jobs,
+                                       general_params={'use_algos': [['lgb']]})
+        with mock.patch.object(TimeUtilization, '_fit_predict_parallel', wrap(fit_parallel)), \
+                mock.patch.object(TimeUtilization, '_fit_predict_sequential', wrap(fit_sequential)):
+            oof = automl.fit_predict(data, roles={'target': 'TARGET'})
+
+        assert len(groups) == 1
+        return oof, groups[0]
+
+    # results should not depend on number of cpus of test machine
+    with mock.patch('os.cpu_count', return_value=8):
+        oof, groups = fit_predict(1, configs_list)
+        par_oof, par_groups = fit_predict(2, configs_list)
+
+        # runs are trained in worker processes, that fail on missing config - failed runs are skipped
+        fail_oof, fail_groups = fit_predict(2, configs_list + ['missing_config.yml'])
+
+    assert oof.shape == par_oof.shape == fail_oof.shape == (data.shape[0], 1)
+    assert not np.isnan(par_oof.data).any()
+    assert groups == par_groups and groups[0] == [2, 2]
+    assert fail_groups[0] == [2, 2, 0] and fail_groups[1][:2] == groups[1]
+
+
+if __name__ == '__main__':
+    test_parallel_utilization()